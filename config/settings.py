@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -20,10 +21,87 @@ class Settings:
     QUESTOES_COLLECTION = "QUESTOES"
     USUARIOS_COLLECTION = "USUARIOS"
     RESULTADOS_COLLECTION = "RESULTADOS"
+    METRICS_COLLECTION = "LOGS_METRICS"
+    CATALOGO_COLLECTION = "CATALOGO"
+    PROVAS_COLLECTION = "PROVAS"
 
     # Auth / JWT
     SECRET_KEY = os.getenv('SECRET_KEY')
     ALGORITHM = os.getenv('ALGORITHM', 'HS256')
     ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES', '60'))
 
+    # Tokens: cache de tokens já verificados e perfil mínimo embutido no JWT
+    TOKEN_CACHE_MAXSIZE = int(os.getenv('TOKEN_CACHE_MAXSIZE', '10000'))
+    TOKEN_CACHE_TTL_S = float(os.getenv('TOKEN_CACHE_TTL_S', '300'))
+    JWT_EMBED_PROFILE = os.getenv('JWT_EMBED_PROFILE', 'false').lower() == 'true'
+    JWT_PROFILE_FIELDS = [f.strip() for f in os.getenv('JWT_PROFILE_FIELDS', 'id,email,nome,perfil').split(',') if f.strip()]
+    TOKEN_VERSION_CACHE_TTL_S = float(os.getenv('TOKEN_VERSION_CACHE_TTL_S', '60'))
+
+    # Verificação de senha (bcrypt) em executor dedicado
+    BCRYPT_MAX_WORKERS = int(os.getenv('BCRYPT_MAX_WORKERS', str(min(4, os.cpu_count() or 1))))
+    BCRYPT_MAX_PENDING = int(os.getenv('BCRYPT_MAX_PENDING', '32'))
+
+    # Cache de usuários autenticados (por processo)
+    USER_CACHE_MAXSIZE = int(os.getenv('USER_CACHE_MAXSIZE', '5000'))
+    USER_CACHE_TTL_S = float(os.getenv('USER_CACHE_TTL_S', '60'))
+
+    # Leitura de QUESTOES/RESULTADOS sem revalidar com pydantic (documentos gravados pela própria API)
+    TRUSTED_SERIALIZATION = os.getenv('TRUSTED_SERIALIZATION', 'true').lower() == 'true'
+
+    # Catálogo de questões em memória (por processo)
+    QUESTOES_CATALOG_ENABLED = os.getenv('QUESTOES_CATALOG_ENABLED', 'true').lower() == 'true'
+    QUESTOES_CATALOG_CHANGE_STREAM = os.getenv('QUESTOES_CATALOG_CHANGE_STREAM', 'true').lower() == 'true'
+    QUESTOES_CATALOG_POLL_S = float(os.getenv('QUESTOES_CATALOG_POLL_S', '5'))
+
+    # ETag/Cache-Control das rotas de questões (no-cache: o navegador guarda e revalida com If-None-Match)
+    QUESTOES_CACHE_CONTROL = os.getenv('QUESTOES_CACHE_CONTROL', 'private, no-cache')
+    # Sem o catálogo, por quanto tempo a versão lida do MongoDB é reaproveitada nas ETags
+    QUESTOES_VERSAO_TTL_S = float(os.getenv('QUESTOES_VERSAO_TTL_S', '1.0'))
+
+    # Perfis (campo `perfil` do usuário) que recebem o `gabarito`; vazio = todos recebem
+    QUESTOES_GABARITO_PERFIS = [p.strip() for p in os.getenv('QUESTOES_GABARITO_PERFIS', '').split(',') if p.strip()]
+
+    # Sorteio de provas sem o catálogo: ids considerados por código no $group
+    QUESTOES_PROVA_GRUPO_MAX = int(os.getenv('QUESTOES_PROVA_GRUPO_MAX', '500'))
+
+    # Importação em lote de questões (POST /questoes/lote)
+    QUESTOES_LOTE_MAX_ITENS = int(os.getenv('QUESTOES_LOTE_MAX_ITENS', '10000'))
+    QUESTOES_LOTE_CHUNK = int(os.getenv('QUESTOES_LOTE_CHUNK', '500'))
+
+    # Shuffle: ordem de cada (filtro, seed) em cache (a posição de cada questão vem do hash do seed)
+    SHUFFLE_CACHE_MAXSIZE = int(os.getenv('SHUFFLE_CACHE_MAXSIZE', '1000'))
+    SHUFFLE_CACHE_TTL_S = float(os.getenv('SHUFFLE_CACHE_TTL_S', '600'))
+
+    # Logs (escrita em lote)
+    LOG_BATCH_ENABLED = os.getenv('LOG_BATCH_ENABLED', 'true').lower() == 'true'
+    LOG_QUEUE_MAXSIZE = int(os.getenv('LOG_QUEUE_MAXSIZE', '10000'))
+    LOG_BATCH_SIZE = int(os.getenv('LOG_BATCH_SIZE', '200'))
+    LOG_FLUSH_INTERVAL_S = float(os.getenv('LOG_FLUSH_INTERVAL_S', '1.0'))
+    # drop_success | drop_oldest | drop_new (outro valor falha no startup)
+    LOG_OVERFLOW_POLICY = os.getenv('LOG_OVERFLOW_POLICY', 'drop_success')
+    LOG_DB_TIMEOUT_S = float(os.getenv('LOG_DB_TIMEOUT_S', '2.0'))
+    LOG_DB_RETRY_S = float(os.getenv('LOG_DB_RETRY_S', '10'))
+
+    # Logs (journal local quando o MongoDB está indisponível)
+    LOG_JOURNAL_ENABLED = os.getenv('LOG_JOURNAL_ENABLED', 'true').lower() == 'true'
+    LOG_JOURNAL_DIR = os.getenv('LOG_JOURNAL_DIR', 'log_journal')
+    LOG_JOURNAL_SEGMENT_BYTES = int(os.getenv('LOG_JOURNAL_SEGMENT_BYTES', str(8 * 1024 * 1024)))
+    LOG_JOURNAL_MAX_BYTES = int(os.getenv('LOG_JOURNAL_MAX_BYTES', str(256 * 1024 * 1024)))
+    LOG_JOURNAL_REPLAY_INTERVAL_S = float(os.getenv('LOG_JOURNAL_REPLAY_INTERVAL_S', '5'))
+
+    # Logs (armazenamento): TTL em dias (0 desativa) e coleção time-series
+    LOG_TTL_DAYS = int(os.getenv('LOG_TTL_DAYS', '90'))
+    LOG_TIMESERIES = os.getenv('LOG_TIMESERIES', 'false').lower() == 'true'
+    LOG_EXPORT_BATCH_SIZE = int(os.getenv('LOG_EXPORT_BATCH_SIZE', '1000'))
+
+    # Amostragem de logs de sucesso (0..1); erros e falhas de auth são sempre mantidos.
+    # A taxa efetiva é a menor entre a do endpoint (path exato) e a do resultado_consumo.
+    LOG_SAMPLE_DEFAULT_RATE = float(os.getenv('LOG_SAMPLE_DEFAULT_RATE', '1.0'))
+    LOG_SAMPLE_RATES_ENDPOINT = json.loads(os.getenv('LOG_SAMPLE_RATES_ENDPOINT', '{"/": 0.05, "/health": 0.05}'))
+    LOG_SAMPLE_RATES_RESULTADO = json.loads(os.getenv('LOG_SAMPLE_RATES_RESULTADO', '{"preflight": 0.1}'))
+
+    # Métricas de requisições (rollups por minuto)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_FLUSH_INTERVAL_S = float(os.getenv('METRICS_FLUSH_INTERVAL_S', '10'))
+
 settings = Settings()
\ No newline at end of file
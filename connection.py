@@ -17,13 +17,14 @@ mongodb_host = os.getenv('MONGODB_HOST', 'db-pi-v.b1go26j.mongodb.net')
 
 uri = f"mongodb+srv://{mongodb_user}:{mongodb_pass}@{mongodb_host}"
 
-client = MongoClient(uri, server_api=ServerApi('1'))
+# tz_aware: datetimes BSON voltam como datetime UTC com fuso
+client = MongoClient(uri, server_api=ServerApi('1'), tz_aware=True)
 
 database = client[database_name]
 
 try:
     from motor.motor_asyncio import AsyncIOMotorClient
-    async_client = AsyncIOMotorClient(uri)
+    async_client = AsyncIOMotorClient(uri, tz_aware=True)
     async_database = async_client[database_name]
 except Exception:
     async_client = None
@@ -1,10 +1,11 @@
 from fastapi import Header, HTTPException, status, Request
 
-from services.auth_service import decode_token, AuthService
+from services.auth_service import decode_token
+from services.auth_service_async import AuthServiceAsync
 from services.erros import ValidationError, NotFoundError
 
 
-def get_current_user(request: Request, authorization: str | None = Header(default=None)):
+async def get_current_user(request: Request, authorization: str | None = Header(default=None)):
     if hasattr(request.state, 'user') and request.state.user is not None:
         return request.state.user
 
@@ -21,10 +22,11 @@ def get_current_user(request: Request, authorization: str | None = Header(defaul
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
 
-    service = AuthService()
     try:
-        user = service.get_user_by_id(user_id)
+        user = await AuthServiceAsync().user_from_token(payload)
     except NotFoundError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuário não encontrado")
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
 
     return user
@@ -8,8 +8,17 @@ from fastapi.responses import JSONResponse
 from fastapi.concurrency import run_in_threadpool
 from services.log_service import LogService
 from services.log_service_async import LogServiceAsync
+from services.indexes import ensure_indexes_async
+from services.log_writer import log_writer
+from services.log_journal import log_journal
+from services.log_context import LogContext
+from services.log_sampling import sample
+from services.metrics_service import request_metrics
+from services.password_verifier import password_verifier
+from services.questao_catalog import questao_catalog
 import traceback
-from services.auth_service import decode_token, AuthService
+from services.auth_service import decode_token
+from services.auth_service_async import AuthServiceAsync
 from services.erros import ValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from fastapi import HTTPException as FastAPIHTTPException
@@ -33,41 +42,41 @@ app.add_middleware(
 )
 
 
-async def _write_log_async(log_svc_async: LogServiceAsync | None, sync_svc: LogService, origem: str, resultado: str, endpoint: str | None, detalhes: dict | None):
-    if log_svc_async and hasattr(log_svc_async, "log_consumo"):
-        try:
-            return await log_svc_async.log_consumo(origem_consumo=origem, resultado_consumo=resultado, endpoint=endpoint, detalhes=detalhes)
-        except Exception:
-            pass
+async def _write_log_async(log_svc_async: LogServiceAsync, origem: str, resultado: str, endpoint: str | None, detalhes: dict | None, sample_weight: float = 1.0):
+    # No blocking sync fallback here: when the database is down or slow,
+    # LogServiceAsync spills the event to the local journal instead
     try:
-        return await run_in_threadpool(sync_svc.log_consumo, origem, resultado, endpoint, detalhes)
+        return await log_svc_async.log_consumo(origem_consumo=origem, resultado_consumo=resultado, endpoint=endpoint, detalhes=detalhes, sample_weight=sample_weight)
     except Exception:
         return None
 
 
-async def _log_preflight(log_svc_async, sync_svc, request: Request, path: str):
+async def _log_preflight(log_svc_async, request: Request, path: str):
+    sample_weight = sample(path, "preflight")
+    if sample_weight is None:
+        return
     detalhes_pf = {"method": request.method, "path": path, "query": None, "client": request.client.host if request.client else None}
-    await _write_log_async(log_svc_async, sync_svc, "middleware", "preflight", path, detalhes_pf)
+    await _write_log_async(log_svc_async, "middleware", "preflight", path, detalhes_pf, sample_weight)
 
 
-async def _log_unauthenticated(log_svc_async, sync_svc, request: Request, path: str, query: str, client_host: str):
+async def _log_unauthenticated(log_svc_async, request: Request, path: str, query: str, client_host: str):
     detalhes_na = {"method": request.method, "path": path, "query": query, "client": client_host}
-    await _write_log_async(log_svc_async, sync_svc, "middleware", "unauthenticated", path + (f"?{query}" if query else ""), detalhes_na)
+    await _write_log_async(log_svc_async, "middleware", "unauthenticated", path + (f"?{query}" if query else ""), detalhes_na)
 
 
-async def _log_invalid_token(log_svc_async, sync_svc, request: Request, path: str, query: str, client_host: str):
+async def _log_invalid_token(log_svc_async, request: Request, path: str, query: str, client_host: str):
     detalhes_it = {"method": request.method, "path": path, "query": query, "client": client_host}
-    await _write_log_async(log_svc_async, sync_svc, "middleware", "invalid_token", path + (f"?{query}" if query else ""), detalhes_it)
+    await _write_log_async(log_svc_async, "middleware", "invalid_token", path + (f"?{query}" if query else ""), detalhes_it)
 
 
-async def _log_validation_error(log_svc_async, sync_svc, request: Request, path: str, query: str, client_host: str, validation: str):
+async def _log_validation_error(log_svc_async, request: Request, path: str, query: str, client_host: str, validation: str):
     detalhes_val = {"method": request.method, "path": path, "query": query, "client": client_host, "validation": validation}
-    await _write_log_async(log_svc_async, sync_svc, "middleware", "validation_error", path + (f"?{query}" if query else ""), detalhes_val)
+    await _write_log_async(log_svc_async, "middleware", "validation_error", path + (f"?{query}" if query else ""), detalhes_val)
 
 
-async def _log_unhandled_exception(log_svc_async, sync_svc, path: str, query: str, exc: Exception):
+async def _log_unhandled_exception(log_svc_async, path: str, query: str, exc: Exception):
     detalhes = {"error": "unhandled_exception", "exception": str(exc), "trace": traceback.format_exc()}
-    await _write_log_async(log_svc_async, sync_svc, "middleware", "error", path + (f"?{query}" if query else ""), detalhes)
+    await _write_log_async(log_svc_async, "middleware", "error", path + (f"?{query}" if query else ""), detalhes)
 
 
 @app.middleware("http")
@@ -80,11 +89,11 @@ async def log_requests(request: Request, call_next):
     allow_prefixes = ()
 
     request.state.user = None
+    request.state.log_context = LogContext()
 
     path = request.url.path
     query = str(request.url.query) if request.url.query else None
     client_host = request.client.host if request.client else None
-    sync_log_service = LogService()
     async_log_service = LogServiceAsync()
 
     # CORS preflight
@@ -92,7 +101,7 @@ async def log_requests(request: Request, call_next):
         response = await call_next(request)
         process_time = time.time() - start_time
         try:
-            await _log_preflight(async_log_service, sync_log_service, request, path)
+            await _log_preflight(async_log_service, request, path)
         except Exception:
             pass
         print(f"[REQ] {request.method} {request.url.path} - {response.status_code} - {process_time:.2f}s")
@@ -101,25 +110,23 @@ async def log_requests(request: Request, call_next):
     if not (path in allow_paths or any(path.startswith(p) for p in allow_prefixes)):
         auth_header = request.headers.get("Authorization")
         if not auth_header or not auth_header.startswith("Bearer "):
-            await _log_unauthenticated(async_log_service, sync_log_service, request, path, query, client_host)
+            await _log_unauthenticated(async_log_service, request, path, query, client_host)
             return JSONResponse(status_code=401, content={"error": {"code": 401, "message": "Not authenticated"}})
         access_token = auth_header[7:]  # Remove 'Bearer '
         try:
             payload = decode_token(access_token)
             user_id = payload.get("sub")
             if not user_id:
-                await _log_invalid_token(async_log_service, sync_log_service, request, path, query, client_host)
+                await _log_invalid_token(async_log_service, request, path, query, client_host)
                 return JSONResponse(status_code=401, content={"error": {"code": 401, "message": "Invalid token"}})
-            service = AuthService()
-            user = service.get_user_by_id(user_id)
-            request.state.user = user
+            request.state.user = await AuthServiceAsync().user_from_token(payload)
         except ValidationError as e:
-            await _log_validation_error(async_log_service, sync_log_service, request, path, query, client_host, str(e))
+            await _log_validation_error(async_log_service, request, path, query, client_host, str(e))
             return JSONResponse(status_code=401, content={"error": {"code": 401, "message": str(e)}})
         except Exception as e:
             # Log authentication failure
             detalhes = {"error": "authentication_failed", "exception": str(e), "trace": traceback.format_exc()}
-            await _write_log_async(async_log_service, sync_log_service, "middleware", "failure", path, detalhes)
+            await _write_log_async(async_log_service, "middleware", "failure", path, detalhes)
             return JSONResponse(status_code=401, content={"error": {"code": 401, "message": "Authentication failed"}})
 
     try:
@@ -127,7 +134,7 @@ async def log_requests(request: Request, call_next):
     except Exception as exc:
         # Log and re-raise
         try:
-            await _log_unhandled_exception(async_log_service, sync_log_service, path, query, exc)
+            await _log_unhandled_exception(async_log_service, path, query, exc)
         except Exception:
             pass
         raise
@@ -143,31 +150,59 @@ async def log_requests(request: Request, call_next):
     except Exception:
         user_info = None
 
-    detalhes = {"method": request.method, "path": path, "query": query, "client": client_host, "user": user_info, "status_code": getattr(response, "status_code", None), "duration_s": f"{process_time:.3f}"}
+    # One document per request: the router's context plus the middleware fields
+    log_context = request.state.log_context
+    status_code = getattr(response, "status_code", None)
+    detalhes = log_context.mesclar({"method": request.method, "path": path, "query": query, "client": client_host, "user": user_info, "status_code": status_code, "duration_s": f"{process_time:.3f}", "duration_ms": round(process_time * 1000, 3)})
+    # without a result from the route, the status code decides
+    resultado = log_context.resultado or ("sucesso" if (status_code or 0) < 400 else "erro")
 
-    try:
-        await _write_log_async(async_log_service, sync_log_service, "api", "success", path + (f"?{query}" if query else ""), detalhes)
-    except Exception:
-        pass
+    sample_weight = sample(path, resultado, status_code)
+    if sample_weight is not None:
+        try:
+            await _write_log_async(async_log_service, client_host or "unknown", resultado, path + (f"?{query}" if query else ""), detalhes, sample_weight)
+        except Exception:
+            pass
 
     print(f"[REQ] {request.method} {request.url.path} - {response.status_code} - {process_time:.2f}s")
     return response
 
 
+# Registered after log_requests, so it wraps it and also sees the early 401 responses
+@app.middleware("http")
+async def collect_metrics(request: Request, call_next):
+    if not request_metrics.running or request.url.path in ["/openapi.json", "/docs", "/redoc", "/api/docs"]:
+        return await call_next(request)
+
+    start_time = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # route template (e.g. /questoes/{questao_id}) keeps the rollup cardinality bounded
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", None) or "unmatched"
+        request_metrics.record(route_path, request.method, status_code, time.perf_counter() - start_time)
+
+
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     status = exc.status_code
+    headers = getattr(exc, "headers", None)
     if status in (401, 403, 500):
-        return JSONResponse(status_code=status, content={"error": {"code": status, "message": exc.detail}})
-    return JSONResponse(status_code=status, content={"detail": exc.detail})
+        return JSONResponse(status_code=status, content={"error": {"code": status, "message": exc.detail}}, headers=headers)
+    return JSONResponse(status_code=status, content={"detail": exc.detail}, headers=headers)
 
 
 @app.exception_handler(FastAPIHTTPException)
 async def fastapi_http_exception_handler(request: Request, exc: FastAPIHTTPException):
     status = exc.status_code
+    headers = getattr(exc, "headers", None)
     if status in (401, 403, 500):
-        return JSONResponse(status_code=status, content={"error": {"code": status, "message": exc.detail}})
-    return JSONResponse(status_code=status, content={"detail": exc.detail})
+        return JSONResponse(status_code=status, content={"error": {"code": status, "message": exc.detail}}, headers=headers)
+    return JSONResponse(status_code=status, content={"detail": exc.detail}, headers=headers)
 
 
 @app.exception_handler(Exception)
@@ -186,6 +221,32 @@ async def startup_event():
         print("Connection to MongoDB established!")
     else:
         print("Failed to connect to MongoDB!")
+    log_service_async = LogServiceAsync()
+    if log_service_async.collection is not None:
+        await log_service_async.ensure_collection()
+    else:
+        await run_in_threadpool(LogService().ensure_collection)
+    # depois de ensure_collection: LOGS time-series precisa existir antes dos índices
+    for nome, indexes in (await ensure_indexes_async()).items():
+        if indexes:
+            print(f"{nome} indexes ready: {', '.join(indexes)}")
+    if settings.LOG_BATCH_ENABLED and await log_writer.start():
+        print("Log batch writer started")
+    if settings.LOG_JOURNAL_ENABLED and await log_journal.start():
+        print("Log journal replay started")
+    if settings.METRICS_ENABLED and await request_metrics.start():
+        print("Request metrics rollups started")
+    if settings.QUESTOES_CATALOG_ENABLED and await questao_catalog.start():
+        print(f"Questao catalog loaded: {questao_catalog.stats()['questoes']} questoes")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await questao_catalog.stop()
+    await request_metrics.stop()
+    await log_writer.stop()
+    await log_journal.stop()
+    password_verifier.shutdown()
 
 
 if __name__ == "__main__":
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, ValidationError, model_validator
-from typing import Dict, Optional
+from typing import Annotated, Dict, List, Optional, Union
+from datetime import datetime
 from enum import Enum
 
 
@@ -35,8 +36,55 @@ class QuestaoCreate(BaseModel):
 
 class QuestaoResponse(QuestaoCreate):
     id: str = Field(alias="_id")
-    created_at: Optional[str] = None
-    updated_at: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
     class Config:
-        populate_by_name = True
\ No newline at end of file
+        populate_by_name = True
+
+
+class QuestaoInnerParcial(BaseModel):
+    enunciado: Optional[str] = None
+    alternativas: Optional[Dict[str, str]] = None
+    gabarito: Optional[str] = None
+    url: Optional[str] = None
+
+
+class QuestaoParcialResponse(BaseModel):
+    """Questão recortada por `fields`: só os campos pedidos aparecem"""
+    id: str
+    disciplina: Optional[DisciplinaEnum] = None
+    ano: Optional[str] = None
+    codigo: Optional[str] = None
+    questao: Optional[QuestaoInnerParcial] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class QuestoesBatch(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=500, description="Ids das questões, na ordem desejada")
+
+
+class QuestoesBatchResponse(BaseModel):
+    data: List[Union[QuestaoResponse, QuestaoParcialResponse]]
+    missing: List[str] = Field(default_factory=list, description="Ids não encontrados (ou inválidos)")
+
+
+class ProvaCreate(BaseModel):
+    disciplina: DisciplinaEnum
+    ano: str
+    tamanho: int = Field(10, ge=1, le=100, description="Número de questões")
+    cotas: Optional[Dict[str, Annotated[int, Field(ge=1)]]] = Field(None, description="Quantidade exata de questões por `codigo`; o restante é distribuído entre os demais códigos")
+    seed: Optional[int] = Field(None, description="Seed do sorteio (a mesma entrada com o mesmo seed gera a mesma prova)")
+
+
+class ProvaResponse(BaseModel):
+    id: str
+    disciplina: DisciplinaEnum
+    ano: str
+    tamanho: int
+    cotas: Optional[Dict[str, int]] = None
+    seed: int
+    email: Optional[str] = None
+    created_at: Optional[datetime] = None
+    questoes: List[Union[QuestaoResponse, QuestaoParcialResponse]]
@@ -49,8 +49,8 @@ class ResultadoResponse(BaseModel):
     pontuacao: int = Field(..., description="Pontuação obtida")
     total_questoes: int = Field(..., description="Total de questões")
     percentual_acerto: float = Field(..., description="Percentual de acerto")
-    created_at: Optional[str] = Field(None, description="Data de criação")
-    updated_at: Optional[str] = Field(None, description="Data de atualização")
+    created_at: Optional[datetime] = Field(None, description="Data de criação")
+    updated_at: Optional[datetime] = Field(None, description="Data de atualização")
 
     class Config:
         json_schema_extra = {
@@ -5,6 +5,11 @@ from routers.logs_routes import router as logs_router
 from routers.resultado_routes import router as resultado_router
 from connection import test_connection
 from config.settings import settings
+from services.log_writer import log_writer
+from services.log_journal import log_journal
+from services.auth_service_async import user_cache
+from services.password_verifier import password_verifier
+from services.questao_catalog import questao_catalog
 
 router = APIRouter()
 
@@ -32,4 +37,9 @@ async def detailed_health_check():
         "api_status": "online",
         "mongodb_status": mongodb_status,
         "version": settings.API_VERSION,
+        "log_writer": log_writer.stats(),
+        "log_journal": log_journal.stats(),
+        "user_cache": user_cache.stats(),
+        "password_verifier": password_verifier.stats(),
+        "questao_catalog": questao_catalog.stats(),
     }
@@ -1,18 +1,15 @@
-from fastapi import APIRouter, HTTPException, status, Response, Depends, Request
+from fastapi import APIRouter, HTTPException, status, Response, Depends, Request, Header
 from pydantic import BaseModel, EmailStr
 import os
 
-from services.auth_service import AuthService
-from services.erros import ValidationError, NotFoundError
+from services.auth_service import decode_token
+from services.auth_service_async import AuthServiceAsync
+from services.erros import ValidationError, NotFoundError, OverloadedError
 from dependencies.auth import get_current_user
-from services.log_service_async import LogServiceAsync
+from services.log_context import get_log_context
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-AUTH_LOGIN = "/auth/login"
-AUTH_ME = "/auth/me"
-AUTH_LOGOUT = "/auth/logout"
-
 
 class LoginRequest(BaseModel):
     email: EmailStr
@@ -21,66 +18,48 @@ class LoginRequest(BaseModel):
 
 @router.post('/login')
 async def login(payload: LoginRequest, response: Response, request: Request):
-    origem = request.client.host if request.client else 'auth'
-    async_log = LogServiceAsync()
+    log_context = get_log_context(request)
 
-    service = AuthService()
+    service = AuthServiceAsync()
     try:
-        result = service.login(payload.email, payload.senha)
+        result = await service.login(payload.email, payload.senha)
+    except OverloadedError as e:
+        log_context.registrar('erro', {"email": payload.email, "result": "overloaded"})
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e), headers={"Retry-After": "1"})
     except NotFoundError:
-        detalhes = {"email": payload.email, "result": "not_found"}
-        try:
-            if async_log.collection is not None:
-                await async_log.log_consumo(origem_consumo=origem, resultado_consumo='erro', endpoint=AUTH_LOGIN, detalhes=detalhes)
-        except Exception:
-            pass
+        log_context.registrar('erro', {"email": payload.email, "result": "not_found"})
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuário não encontrado")
     except ValidationError as e:
-        detalhes = {"email": payload.email, "result": "validation_error", "reason": str(e)}
-        try:
-            if async_log.collection is not None:
-                await async_log.log_consumo(origem_consumo=origem, resultado_consumo='erro', endpoint=AUTH_LOGIN, detalhes=detalhes)
-        except Exception:
-            pass
+        log_context.registrar('erro', {"email": payload.email, "result": "validation_error", "reason": str(e)})
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
 
     token = result["access_token"]
 
-    detalhes = {"email": payload.email, "result": "success", "user": result.get("user")}
-    try:
-        if async_log.collection is not None:
-            await async_log.log_consumo(origem_consumo=origem, resultado_consumo='sucesso', endpoint=AUTH_LOGIN, detalhes=detalhes)
-    except Exception:
-        pass
+    log_context.registrar('sucesso', {"email": payload.email, "result": "success", "user": result.get("user")})
 
     return {"message": "Login realizado", "user": result["user"], "access_token": token}
 
 
 @router.get('/me')
 async def me(request: Request, current_user: dict = Depends(get_current_user)):
-    origem = request.client.host if request.client else 'auth'
-    async_log = LogServiceAsync()
-    
-    detalhes = {"action": "me", "user": current_user}
-    try:
-        if async_log.collection is not None:
-            await async_log.log_consumo(origem_consumo=origem, resultado_consumo='sucesso', endpoint=AUTH_ME, detalhes=detalhes)
-    except Exception:
-        pass
+    get_log_context(request).registrar('sucesso', {"action": "me", "user": current_user})
 
     return {"user": current_user}
 
 
 @router.post('/logout')
-async def logout(request: Request):
-    origem = request.client.host if request.client else 'auth'
-    async_log = LogServiceAsync()
-    
-    detalhes = {"action": "logout"}
+async def logout(request: Request, current_user: dict = Depends(get_current_user), authorization: str | None = Header(default=None)):
+    """Revoga todos os tokens do usuário (incrementa `token_version`)"""
+    log_context = get_log_context(request)
+
+    # o perfil embutido no token pode não ter o id; o `sub` sempre tem
+    user_id = decode_token(authorization[7:]).get("sub") if authorization else current_user.get("id")
     try:
-        if async_log.collection is not None:
-            await async_log.log_consumo(origem_consumo=origem, resultado_consumo='sucesso', endpoint=AUTH_LOGOUT, detalhes=detalhes)
-    except Exception:
-        pass
+        await AuthServiceAsync().revoke_tokens(user_id)
+    except NotFoundError:
+        log_context.registrar('erro', {"action": "logout", "user_id": user_id, "result": "not_found"})
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuário não encontrado")
+
+    log_context.registrar('sucesso', {"action": "logout", "user_id": user_id})
 
     return {"message": "Logout realizado"}
@@ -1,25 +1,94 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Request, Response, HTTPException
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
+from fastapi.responses import StreamingResponse
 from services.log_service import LogService
 from services.log_service_async import LogServiceAsync
-from typing import Optional
+from services.erros import ValidationError
+from services.metrics_service import request_metrics
+from services.log_context import get_log_context
+from services.log_export import EXPORT_FIELDS, stream_export
+from datetime import datetime
+from typing import Optional, Literal
 
 router = APIRouter(prefix="/logs", tags=["logs"])
 
 @router.get("/", response_model=list)
 @router.get("", response_model=list)  # Aceita sem trailing slash também
-async def listar_logs(page: int = Query(1, ge=1), limit: int = Query(50, ge=1, le=200), origem: Optional[str] = None, resultado: Optional[str] = None):
-    """Lista logs com paginação e filtragem simples"""
+async def listar_logs(
+    response: Response,
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1, le=200),
+    origem: Optional[str] = None,
+    resultado: Optional[str] = None,
+    endpoint: Optional[str] = Query(None, description="Endpoint exato; termine com `*` para filtrar por prefixo"),
+    inicio: Optional[datetime] = Query(None, description="Timestamp mínimo (inclusivo)"),
+    fim: Optional[datetime] = Query(None, description="Timestamp máximo (exclusivo)"),
+    cursor: Optional[str] = Query(None, description="Cursor keyset; quando informado, `page` é ignorado"),
+):
+    """Lista logs com paginação e filtragem no MongoDB.
+
+    O cursor da próxima página é devolvido no header `X-Next-Cursor`.
+    """
     skip = (page - 1) * limit
+    filtros = {"origem": origem, "resultado": resultado, "endpoint": endpoint, "inicio": inicio, "fim": fim}
+    async_svc = LogServiceAsync()
+    try:
+        if async_svc.collection is not None:
+            pagina = await async_svc.buscar_logs_pagina(limite=limit, skip=skip, cursor=cursor, **filtros)
+        else:
+            pagina = await run_in_threadpool(LogService().buscar_logs_pagina, limit, skip, cursor, **filtros)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if pagina["next_cursor"]:
+        response.headers["X-Next-Cursor"] = pagina["next_cursor"]
+    return pagina["data"]
+
+
+@router.get("/stats")
+async def estatisticas(
+    request: Request,
+    inicio: Optional[datetime] = Query(None, description="Minuto inicial (inclusivo)"),
+    fim: Optional[datetime] = Query(None, description="Minuto final (exclusivo)"),
+    route: Optional[str] = Query(None, description="Rota (template), ex.: /questoes/{questao_id}"),
+    por_minuto: bool = Query(False, description="Inclui a série de contagens por minuto"),
+):
+    """Latência (p50/p95/p99) e taxa de erro por rota, a partir dos rollups de métricas"""
+    try:
+        return await request_metrics.buscar_stats(inicio=inicio, fim=fim, route=route, por_minuto=por_minuto)
+    except Exception as e:
+        get_log_context(request).registrar("erro", {"exception": str(e), "route": route})
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/export")
+async def exportar_logs(
+    formato: Literal["ndjson", "csv"] = Query("ndjson"),
+    gzip: bool = Query(False, description="Comprime o stream (arquivo .gz)"),
+    campos: Optional[str] = Query(None, description=f"Campos separados por vírgula ({', '.join(EXPORT_FIELDS)})"),
+    origem: Optional[str] = None,
+    resultado: Optional[str] = None,
+    endpoint: Optional[str] = Query(None, description="Endpoint exato; termine com `*` para filtrar por prefixo"),
+    inicio: Optional[datetime] = Query(None, description="Timestamp mínimo (inclusivo)"),
+    fim: Optional[datetime] = Query(None, description="Timestamp máximo (exclusivo)"),
+):
+    """Exporta logs em streaming direto do cursor, sem paginação"""
+    lista_campos = [c.strip() for c in campos.split(",") if c.strip()] if campos else list(EXPORT_FIELDS)
+    invalidos = [c for c in lista_campos if c not in EXPORT_FIELDS]
+    if invalidos:
+        raise HTTPException(status_code=400, detail=f"Campos inválidos: {', '.join(invalidos)}")
+
+    filtros = {"origem": origem, "resultado": resultado, "endpoint": endpoint, "inicio": inicio, "fim": fim}
     async_svc = LogServiceAsync()
-    sync_svc = LogService()
     if async_svc.collection is not None:
-        items = await async_svc.buscar_logs(limite=limit, skip=skip)
+        docs = async_svc.cursor_exportacao(lista_campos, **filtros)
     else:
-        items = sync_svc.buscar_logs(limite=limit)
-
-    if origem:
-        items = [i for i in items if i.get("origem_consumo") == origem]
-    if resultado:
-        items = [i for i in items if i.get("resultado_consumo") == resultado]
+        docs = iterate_in_threadpool(LogService().cursor_exportacao(lista_campos, **filtros))
 
-    return items
+    filename = f"logs.{formato}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else ("text/csv" if formato == "csv" else "application/x-ndjson")
+    return StreamingResponse(
+        stream_export(docs, lista_campos, formato=formato, comprimir=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
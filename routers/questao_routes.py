@@ -1,139 +1,327 @@
 from fastapi import APIRouter, HTTPException, Request, Query
-from models.questao_model import QuestaoCreate, QuestaoResponse
-from services.questao_service import QuestaoService
-from services.log_service_async import LogServiceAsync
+from fastapi.concurrency import run_in_threadpool
+from models.questao_model import ProvaCreate, ProvaResponse, QuestaoCreate, QuestaoResponse, QuestaoParcialResponse, QuestoesBatch, QuestoesBatchResponse
+from services.questao_service import QuestaoService, resolver_campos
+from services.questao_service_async import QuestaoServiceAsync
+from services.questao_catalog import questao_catalog
+from services.erros import ValidationError
+from services.serializacao import json_response, pagina_json, prova_confiavel
+from services.etag import cache_headers, gerar_etag, nao_modificado, resposta_304
+from services.cache import TTLCache
+from services.log_context import get_log_context
+from config.settings import settings
 from typing import Optional, Union, List
-import random
+import json
 
 from models.questao_model import DisciplinaEnum
 
 router = APIRouter(prefix="/questoes", tags=["questoes"])
 questao_service = QuestaoService()
-async_log = LogServiceAsync()
+questao_service_async = QuestaoServiceAsync()
+# sem o catálogo, a versão lida do MongoDB vale por alguns instantes (uma leitura a menos por GET)
+versao_cache = TTLCache(maxsize=1, ttl=settings.QUESTOES_VERSAO_TTL_S)
 
-questoes_endpoint = "/questoes"
 
-@router.get("/", response_model=Union[List[QuestaoResponse], dict])
-@router.get("", response_model=Union[List[QuestaoResponse], dict])
+async def _questoes(metodo: str, *args, **kwargs):
+    """Chama o serviço Motor; sem Motor, a versão síncrona em threadpool"""
+    if questao_service_async.collection is not None:
+        return await getattr(questao_service_async, metodo)(*args, **kwargs)
+    return await run_in_threadpool(getattr(questao_service, metodo), *args, **kwargs)
+
+
+async def _listar_paginated(**kwargs) -> dict:
+    """Serve do catálogo em memória quando carregado; senão consulta o MongoDB"""
+    if questao_catalog.ready:
+        return questao_catalog.listar_questoes_paginated(**kwargs)
+    return await _questoes("listar_questoes_paginated", **kwargs)
+
+
+def _ve_gabarito(request: Request) -> bool:
+    """Com QUESTOES_GABARITO_PERFIS, só esses perfis recebem o gabarito"""
+    perfis = settings.QUESTOES_GABARITO_PERFIS
+    if not perfis:
+        return True
+    user = getattr(request.state, "user", None) or {}
+    return user.get("perfil") in perfis
+
+
+def _campos(request: Request, fields: str | None) -> frozenset | None:
+    try:
+        return resolver_campos(fields, _ve_gabarito(request))
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _versao() -> int:
+    if questao_catalog.ready:
+        return questao_catalog.version
+    versao = versao_cache.get("versao")
+    if versao is None:
+        versao = await _questoes("versao_catalogo")
+        versao_cache.set("versao", versao)
+    return versao
+
+
+async def _etag(request: Request, campos: frozenset | None = None) -> str | None:
+    """ETag da URL na versão atual do catálogo; None se a versão não puder ser lida"""
+    try:
+        versao = await _versao()
+    except Exception as e:
+        print(f"❌ Erro ao ler versão do catálogo: {e}")
+        return None
+    # a mesma URL muda de conteúdo conforme o perfil vê ou não o gabarito
+    extra = ",".join(sorted(campos)) if campos is not None else ""
+    return gerar_etag(versao, request.url.path, request.url.query, extra)
+
+
+async def _questoes_por_ids(ids: list[str], campos: frozenset | None = None) -> list[dict]:
+    """Resolve pelo catálogo; só as que faltarem vão ao MongoDB, em um único $in"""
+    encontradas = {}
+    if questao_catalog.ready:
+        for questao_id in ids:
+            questao = questao_catalog.buscar_questao_por_id(questao_id, campos)
+            if questao is not None:
+                encontradas[questao_id] = questao
+    faltando = [i for i in dict.fromkeys(ids) if i not in encontradas]
+    if faltando:
+        for questao in await _questoes("buscar_questoes_por_ids", faltando, campos):
+            encontradas[questao["id"]] = questao
+    return [encontradas[i] for i in ids if i in encontradas]
+
+
+async def _prova_json(prova: dict, campos: frozenset | None) -> bytes:
+    questoes = await _questoes_por_ids([str(i) for i in prova["questoes"]], campos)
+    return pagina_json({**prova_confiavel(prova), "questoes": None}, [questao_catalog.json_de(q) for q in questoes], chave="questoes")
+
+
+async def _ler_lote(request: Request) -> tuple[list, dict[int, str]]:
+    """Lê o corpo como array JSON ou NDJSON (em streaming); linhas inválidas viram erro pelo índice"""
+    max_itens = settings.QUESTOES_LOTE_MAX_ITENS
+    content_type = request.headers.get("content-type", "")
+
+    if "ndjson" not in content_type and "jsonl" not in content_type:
+        try:
+            itens = json.loads(await request.body())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"JSON inválido: {e}")
+        if not isinstance(itens, list):
+            raise HTTPException(status_code=400, detail="O corpo deve ser um array JSON ou NDJSON")
+        if len(itens) > max_itens:
+            raise HTTPException(status_code=413, detail=f"Máximo de {max_itens} questões por lote")
+        return itens, {}
+
+    itens, erros = [], {}
+
+    def adicionar(linha: bytes):
+        if not linha.strip():
+            return
+        if len(itens) >= max_itens:
+            raise HTTPException(status_code=413, detail=f"Máximo de {max_itens} questões por lote")
+        try:
+            itens.append(json.loads(linha))
+        except ValueError as e:
+            erros[len(itens)] = f"JSON inválido: {e}"
+            itens.append(None)
+
+    pendente = b""
+    async for chunk in request.stream():
+        *linhas, pendente = (pendente + chunk).split(b"\n")
+        for linha in linhas:
+            adicionar(linha)
+    adicionar(pendente)
+    return itens, erros
+
+
+@router.get("/", response_model=Union[List[QuestaoResponse], List[QuestaoParcialResponse], dict])
+@router.get("", response_model=Union[List[QuestaoResponse], List[QuestaoParcialResponse], dict])
 async def listar_questoes(
     request: Request,
-    page: int = Query(..., ge=1),
+    page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=20),
     disciplina: Optional[DisciplinaEnum] = Query(None),
     ano: Optional[str] = Query(None),
-    shuffle: bool = Query(False)
+    shuffle: bool = Query(False),
+    seed: Optional[int] = Query(None, description="Seed do shuffle; repita o valor devolvido para paginar na mesma ordem"),
+    cursor: Optional[str] = Query(None, description="`next_cursor` da página anterior; quando informado, `page` é ignorado"),
+    include_total: bool = Query(True, description="Calcula `total`/`totalPages` (false evita a contagem)"),
+    fields: Optional[str] = Query(None, description="Campos devolvidos, separados por vírgula (ex.: `id,codigo,disciplina,ano`; `questao.enunciado`)"),
 ):
     """Lista todas as questões"""
-    origem = request.client.host if request.client else "unknown"
-    
+    log_context = get_log_context(request)
+    campos = _campos(request, fields)
+
+    # sem seed o shuffle é aleatório a cada chamada: não há o que revalidar
+    etag = await _etag(request, campos) if not (shuffle and seed is None and not cursor) else None
+    if etag and nao_modificado(request, etag):
+        log_context.registrar("sucesso", {"page": page, "not_modified": True})
+        return resposta_304(etag)
+    headers = cache_headers(etag) if etag else None
+
     try:
-        paginated = questao_service.listar_questoes_paginated(page=page, limit=limit, disciplina=(disciplina.value if disciplina else None), ano=ano, shuffle=shuffle)
-
-        total_pages = paginated.get("totalPages", 0)
-        if total_pages == 0 or page > total_pages:
-            try:
-                if async_log.collection is not None:
-                    await async_log.log_consumo(
-                        origem_consumo=origem,
-                        resultado_consumo="sucesso",
-                        endpoint=questoes_endpoint,
-                        detalhes={"page": page, "out_of_range": True, "total": paginated.get('total', 0), "shuffle": shuffle}
-                    )
-            except Exception:
-                pass
-            return []
-        
-        
-        if shuffle and isinstance(paginated, dict) and "data" in paginated:
-            questoes_data = paginated["data"]
-            random.shuffle(questoes_data)
-            paginated["data"] = questoes_data
+        paginated = await _listar_paginated(page=page, limit=limit, disciplina=(disciplina.value if disciplina else None), ano=ano, shuffle=shuffle, seed=seed, cursor=cursor, include_total=include_total, campos=campos)
 
-        try:
-            if async_log.collection is not None:
-                await async_log.log_consumo(
-                    origem_consumo=origem,
-                    resultado_consumo="sucesso",
-                    endpoint=questoes_endpoint,
-                    detalhes={"page": page, "limit": limit, "disciplina": str(disciplina) if disciplina else None, "total": paginated.get('total', 0), "shuffle": shuffle}
-                )
-        except Exception:
-            pass
-
-        return paginated
+        if not paginated.get("data"):
+            log_context.registrar("sucesso", {"page": page, "out_of_range": True, "total": paginated.get('total', 0), "shuffle": shuffle})
+            return json_response(b"[]", headers=headers)
+
+        log_context.registrar("sucesso", {"page": page, "limit": limit, "disciplina": str(disciplina) if disciplina else None, "total": paginated.get('total', 0), "shuffle": shuffle, "seed": paginated.get("seed")})
+
+        # itens já serializados pelo serviço/catálogo: sem nova validação pelo response_model
+        return json_response(pagina_json(paginated, [questao_catalog.json_de(q) for q in paginated["data"]]), headers=headers)
+    except ValidationError as e:
+        log_context.registrar("erro", {"exception": str(e)})
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        try:
-            if async_log.collection is not None:
-                await async_log.log_consumo(
-                    origem_consumo=origem,
-                    resultado_consumo="erro",
-                    endpoint=questoes_endpoint,
-                    detalhes={"exception": str(e)}
-                )
-        except Exception:
-            pass
-        
+        log_context.registrar("erro", {"exception": str(e)})
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/busca", response_model=dict)
+async def buscar_questoes(
+    request: Request,
+    q: Optional[str] = Query(None, min_length=2, description="Palavras-chave do enunciado (sem diferença de acentos/maiúsculas)"),
+    codigo: Optional[str] = Query(None, min_length=2, description="Prefixo do código BNCC (ex.: `EF05LP`)"),
+    disciplina: Optional[DisciplinaEnum] = Query(None),
+    ano: Optional[str] = Query(None),
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=50),
+    fields: Optional[str] = Query(None, description="Campos devolvidos, separados por vírgula"),
+):
+    """Busca questões por palavra-chave e/ou prefixo de código, ordenadas por relevância"""
+    log_context = get_log_context(request)
+    if not q and not codigo:
+        raise HTTPException(status_code=400, detail="Informe `q` e/ou `codigo`")
+    campos = _campos(request, fields)
+
+    etag = await _etag(request, campos)
+    if etag and nao_modificado(request, etag):
+        log_context.registrar("sucesso", {"q": q, "codigo": codigo, "not_modified": True})
+        return resposta_304(etag)
+
+    try:
+        filtros = dict(q=q, codigo=codigo, disciplina=(disciplina.value if disciplina else None), ano=ano, page=page, limit=limit, campos=campos)
+        resultado = questao_catalog.buscar(**filtros) if questao_catalog.ready else await _questoes("buscar_questoes", **filtros)
+
+        log_context.registrar("sucesso", {"q": q, "codigo": codigo, "page": page, "total": resultado["total"]})
+
+        return json_response(pagina_json(resultado, [questao_catalog.json_de(x) for x in resultado["data"]]), headers=cache_headers(etag) if etag else None)
+    except Exception as e:
+        log_context.registrar("erro", {"exception": str(e), "q": q, "codigo": codigo})
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch", response_model=QuestoesBatchResponse)
+async def buscar_questoes_batch(
+    dados: QuestoesBatch,
+    request: Request,
+    fields: Optional[str] = Query(None, description="Campos devolvidos, separados por vírgula"),
+):
+    """Busca várias questões de uma vez, na ordem pedida; ids não encontrados vão em `missing`"""
+    log_context = get_log_context(request)
+    campos = _campos(request, fields)
+    ids = list(dict.fromkeys(dados.ids))
+
+    try:
+        questoes = await _questoes_por_ids(ids, campos)
+        encontrados = {q["id"] for q in questoes}
+        missing = [i for i in ids if i not in encontrados]
+
+        log_context.registrar("sucesso", {"message": "Questões em lote", "total": len(ids), "missing": len(missing)})
+
+        return json_response(pagina_json({"missing": missing}, [questao_catalog.json_de(q) for q in questoes]))
+    except Exception as e:
+        log_context.registrar("erro", {"exception": str(e), "total": len(ids)})
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/prova", response_model=ProvaResponse, status_code=201)
+async def gerar_prova(dados: ProvaCreate, request: Request):
+    """Monta uma prova com questões sorteadas por código (cotas opcionais) e a grava para consulta posterior"""
+    log_context = get_log_context(request)
+    campos = _campos(request, None)
+    user = getattr(request.state, "user", None) or {}
+
+    try:
+        # com o catálogo carregado, o sorteio usa os índices em memória e não consulta QUESTOES
+        grupos = questao_catalog.grupos_por_codigo(dados.disciplina.value, dados.ano) if questao_catalog.ready else None
+        prova = await _questoes("gerar_prova", dados, user.get("email"), grupos)
+
+        log_context.registrar("sucesso", {"message": "Prova gerada", "prova_id": str(prova["_id"]), "disciplina": prova["disciplina"], "ano": prova["ano"], "tamanho": prova["tamanho"], "seed": prova["seed"]})
+
+        return json_response(await _prova_json(prova, campos), status_code=201)
+    except ValidationError as e:
+        log_context.registrar("erro", {"exception": str(e)})
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        log_context.registrar("erro", {"exception": str(e)})
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/prova/{prova_id}", response_model=ProvaResponse)
+async def buscar_prova(prova_id: str, request: Request):
+    """Busca uma prova gerada pelo usuário, com as questões atuais"""
+    log_context = get_log_context(request)
+    campos = _campos(request, None)
+    user = getattr(request.state, "user", None) or {}
+
+    try:
+        prova = await _questoes("buscar_prova", prova_id, user.get("email"))
+        if not prova:
+            raise HTTPException(status_code=404, detail="Prova não encontrada")
+
+        log_context.registrar("sucesso", {"message": "Prova encontrada", "prova_id": prova_id})
+
+        return json_response(await _prova_json(prova, campos))
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        log_context.registrar("erro", {"exception": str(e), "prova_id": prova_id})
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{questao_id}", response_model=QuestaoResponse)
-async def buscar_questao(questao_id: str, request: Request):
+
+@router.get("/{questao_id}", response_model=Union[QuestaoResponse, QuestaoParcialResponse])
+async def buscar_questao(
+    questao_id: str,
+    request: Request,
+    fields: Optional[str] = Query(None, description="Campos devolvidos, separados por vírgula"),
+):
     """Busca uma questão pelo ID"""
-    origem = request.client.host if request.client else "unknown"
-    
+    log_context = get_log_context(request)
+    campos = _campos(request, fields)
+
+    etag = await _etag(request, campos)
+    if etag and nao_modificado(request, etag):
+        log_context.registrar("sucesso", {"questao_id": questao_id, "not_modified": True})
+        return resposta_304(etag)
+
     try:
-        questao = questao_service.buscar_questao_por_id(questao_id)
+        questao = questao_catalog.buscar_questao_por_id(questao_id, campos) if questao_catalog.ready else None
+        if questao is None:
+            # questões recém-criadas podem ainda não ter chegado ao catálogo
+            questao = await _questoes("buscar_questao_por_id", questao_id, campos)
         if not questao:
             raise HTTPException(status_code=404, detail="Questão não encontrada")
         
-        try:
-            if async_log.collection is not None:
-                await async_log.log_consumo(
-                    origem_consumo=origem,
-                    resultado_consumo="sucesso",
-                    endpoint=f"{questoes_endpoint}/{questao_id}",
-                    detalhes={"message": "Questão encontrada", "questao_id": questao_id}
-                )
-        except Exception:
-            pass
-
-        qr = QuestaoResponse.model_validate(questao)
-        return qr.model_dump()
+        log_context.registrar("sucesso", {"message": "Questão encontrada", "questao_id": questao_id})
+
+        return json_response(questao_catalog.json_de(questao), headers=cache_headers(etag) if etag else None)
     except HTTPException as he:
         raise he
     except Exception as e:
-        try:
-            if async_log.collection is not None:
-                await async_log.log_consumo(
-                    origem_consumo=origem,
-                    resultado_consumo="erro",
-                    endpoint=f"{questoes_endpoint}/{questao_id}",
-                    detalhes={"exception": str(e)}
-                )
-        except Exception:
-            pass
-        
+        log_context.registrar("erro", {"exception": str(e), "questao_id": questao_id})
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/adicionar", response_model=dict)
 async def adicionar_questao(questao: QuestaoCreate, request: Request):
     """Adiciona uma nova questão"""
-    origem = request.client.host if request.client else "unknown"
-    
+    log_context = get_log_context(request)
+
     try:
-        nova_questao = questao_service.adicionar_questao(questao)
+        nova_questao = await _questoes("adicionar_questao", questao)
+        versao_cache.clear()
 
         questao_id = nova_questao.get("id")
 
-        try:
-            if async_log.collection is not None:
-                await async_log.log_consumo(
-                    origem_consumo=origem,
-                    resultado_consumo="sucesso",
-                    endpoint=f"{questoes_endpoint}/adicionar",
-                    detalhes={"message": "Questão adicionada", "questao_id": questao_id}
-                )
-        except Exception:
-            pass
+        log_context.registrar("sucesso", {"message": "Questão adicionada", "questao_id": questao_id})
 
         return {
             "message": "Questão adicionada com sucesso!",
@@ -142,15 +330,26 @@ async def adicionar_questao(questao: QuestaoCreate, request: Request):
         }
         
     except Exception as e:
-        try:
-            if async_log.collection is not None:
-                await async_log.log_consumo(
-                    origem_consumo=origem,
-                    resultado_consumo="erro",
-                    endpoint=f"{questoes_endpoint}/adicionar",
-                    detalhes={"exception": str(e)}
-                )
-        except Exception:
-            pass
-        
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        log_context.registrar("erro", {"exception": str(e)})
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/lote", response_model=dict)
+async def importar_lote(
+    request: Request,
+    upsert: bool = Query(False, description="Atualiza questões existentes com o mesmo `codigo` e enunciado em vez de duplicar"),
+):
+    """Importa várias questões (array JSON ou NDJSON); erros são devolvidos pelo índice do item"""
+    log_context = get_log_context(request)
+
+    itens, erros_previos = await _ler_lote(request)
+    try:
+        resultado = await _questoes("importar_lote", itens, erros_previos, upsert=upsert)
+        versao_cache.clear()
+
+        log_context.registrar("sucesso", {"message": "Lote importado", "total": resultado["total"], "inseridos": resultado["inseridos"], "atualizados": resultado["atualizados"], "erros": len(resultado["erros"]), "upsert": upsert})
+
+        return resultado
+    except Exception as e:
+        log_context.registrar("erro", {"exception": str(e), "total": len(itens)})
+        raise HTTPException(status_code=500, detail=str(e))
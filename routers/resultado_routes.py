@@ -1,41 +1,35 @@
 from fastapi import APIRouter, HTTPException, Request, Query
 from models.resultado_model import ResultadoCreate, ResultadoResponse
 from services.resultado_service import ResultadoService
-from services.log_service_async import LogServiceAsync
+from services.log_context import get_log_context
+from services.erros import ValidationError
+from services.serializacao import dumps, json_response, pagina_json
 from typing import Optional, Union, List
 
 router = APIRouter(prefix="/resultados", tags=["resultados"])
 resultado_service = ResultadoService()
-log_service = LogServiceAsync()
-
-resultados_endpoint = "/resultados"
 
 @router.put("/", response_model=dict)
 @router.put("", response_model=dict)
 async def salvar_resultado(resultado: ResultadoCreate, request: Request):
     """Salva um resultado de prova/exercício"""
-    origem = request.client.host if request.client else "unknown"
-    
+    log_context = get_log_context(request)
+
     try:
         novo_resultado = resultado_service.salvar_resultado(resultado)
         resultado_id = novo_resultado.get("id")
         percentual_calculado = novo_resultado.get("percentual_acerto", 0)
 
-        await log_service.log_consumo(
-            origem_consumo=origem,
-            resultado_consumo="sucesso",
-            endpoint=resultados_endpoint,
-            detalhes={
-                "message": "Resultado salvo",
-                "resultado_id": resultado_id,
-                "email": resultado.email,
-                "disciplina": resultado.disciplina,
-                "ano": resultado.ano,
-                "pontuacao": resultado.pontuacao,
-                "total_questoes": resultado.total_questoes,
-                "percentual_acerto": percentual_calculado
-            }
-        )
+        log_context.registrar("sucesso", {
+            "message": "Resultado salvo",
+            "resultado_id": resultado_id,
+            "email": resultado.email,
+            "disciplina": resultado.disciplina,
+            "ano": resultado.ano,
+            "pontuacao": resultado.pontuacao,
+            "total_questoes": resultado.total_questoes,
+            "percentual_acerto": percentual_calculado
+        })
 
         return {
             "success": True,
@@ -47,13 +41,7 @@ async def salvar_resultado(resultado: ResultadoCreate, request: Request):
         }
         
     except Exception as e:
-        await log_service.log_consumo(
-            origem_consumo=origem,
-            resultado_consumo="erro",
-            endpoint=resultados_endpoint,
-            detalhes={"error": str(e), "message": "Erro ao salvar resultado"}
-        )
-        
+        log_context.registrar("erro", {"error": str(e), "message": "Erro ao salvar resultado"})
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/", response_model=Union[List[ResultadoResponse], dict])
@@ -64,90 +52,70 @@ async def listar_resultados(
     limit: int = Query(10, ge=1, le=50),
     disciplina: Optional[str] = Query(None),
     ano: Optional[int] = Query(None, ge=1, le=12),
-    email: Optional[str] = Query(None)
+    email: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="`next_cursor` da página anterior; quando informado, `page` é ignorado"),
+    include_total: bool = Query(True, description="Calcula `total`/`totalPages` (false evita a contagem)"),
 ):
     """Lista todos os resultados com paginação"""
-    origem = request.client.host if request.client else "unknown"
-    
+    log_context = get_log_context(request)
+
     try:
         paginated = resultado_service.listar_resultados_paginated(
             page=page, 
             limit=limit, 
             disciplina=disciplina, 
             ano=ano,
-            email=email
+            email=email,
+            cursor=cursor,
+            include_total=include_total
         )
 
-        total_pages = paginated.get("totalPages", 0)
-        if total_pages == 0 or page > total_pages:
-            await log_service.log_consumo(
-                origem_consumo=origem,
-                resultado_consumo="sucesso",
-                endpoint=resultados_endpoint,
-                detalhes={
-                    "message": "Página fora do range",
-                    "page": page,
-                    "total": paginated.get('total', 0),
-                    "disciplina": disciplina,
-                    "ano": ano,
-                    "email": email
-                }
-            )
-            return []
-
-        await log_service.log_consumo(
-            origem_consumo=origem,
-            resultado_consumo="sucesso",
-            endpoint=resultados_endpoint,
-            detalhes={
-                "message": "Listagem resultados",
+        total_pages = paginated.get("totalPages")
+        if not paginated.get("data"):
+            log_context.registrar("sucesso", {
+                "message": "Página fora do range",
                 "page": page,
-                "total_pages": total_pages,
-                "limit": limit,
                 "total": paginated.get('total', 0),
                 "disciplina": disciplina,
                 "ano": ano,
                 "email": email
-            }
-        )
+            })
+            return []
 
-        return paginated
+        log_context.registrar("sucesso", {
+            "message": "Listagem resultados",
+            "page": page,
+            "total_pages": total_pages,
+            "limit": limit,
+            "total": paginated.get('total', 0),
+            "disciplina": disciplina,
+            "ano": ano,
+            "email": email
+        })
+
+        return json_response(pagina_json(paginated, [dumps(r) for r in paginated["data"]]))
+    except ValidationError as e:
+        log_context.registrar("erro", {"error": str(e), "message": "Cursor inválido"})
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        await log_service.log_consumo(
-            origem_consumo=origem,
-            resultado_consumo="erro",
-            endpoint=resultados_endpoint,
-            detalhes={"error": str(e), "message": "Erro ao listar resultados"}
-        )
-        
+        log_context.registrar("erro", {"error": str(e), "message": "Erro ao listar resultados"})
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{resultado_id}", response_model=ResultadoResponse)
 async def buscar_resultado(resultado_id: str, request: Request):
     """Busca um resultado pelo ID"""
-    origem = request.client.host if request.client else "unknown"
-    
+    log_context = get_log_context(request)
+
     try:
         resultado = resultado_service.buscar_resultado_por_id(resultado_id)
         if not resultado:
             raise HTTPException(status_code=404, detail="Resultado não encontrado")
         
-        await log_service.log_consumo(
-            origem_consumo=origem,
-            resultado_consumo="sucesso",
-            endpoint=f"{resultados_endpoint}/{resultado_id}",
-            detalhes={"message": "Resultado encontrado", "resultado_id": resultado_id}
-        )
+        log_context.registrar("sucesso", {"message": "Resultado encontrado", "resultado_id": resultado_id})
 
-        return resultado
+        return json_response(dumps(resultado))
     except HTTPException as he:
         raise he
     except Exception as e:
-        await log_service.log_consumo(
-            origem_consumo=origem,
-            resultado_consumo="erro",
-            endpoint=f"{resultados_endpoint}/{resultado_id}",
-            detalhes={"error": str(e), "message": "Erro ao buscar resultado"}
-        )
-        
+        log_context.registrar("erro", {"error": str(e), "message": "Erro ao buscar resultado", "resultado_id": resultado_id})
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,104 @@
+"""Benchmark do custo de CPU por página na serialização de questões.
+
+Uso:
+  python scripts/bench_serialization.py [--limit 20] [--pages 2000]
+
+Compara, sobre documentos sintéticos no formato gravado em QUESTOES:
+- pydantic: `model_validate` + `model_dump(mode="json")` no serviço e de
+  novo pela validação do `response_model`, mais a codificação do JSONResponse
+  (caminho anterior ao TRUSTED_SERIALIZATION);
+- confiavel: projeção direta do documento + codificação única;
+- catalogo: itens já codificados no catálogo, só a montagem da página.
+
+Não acessa o MongoDB.
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bson import ObjectId
+from pydantic import TypeAdapter
+
+from models.questao_model import QuestaoResponse
+from services.serializacao import dumps, pagina_json, questao_confiavel
+
+
+def documento(i: int) -> dict:
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    return {
+        "_id": ObjectId(),
+        "disciplina": "MA",
+        "ano": "5",
+        "codigo": f"EF05MA{i % 30:02d}",
+        "questao": {
+            "enunciado": f"Questão {i}: " + "texto do enunciado " * 20,
+            "alternativas": {k: f"alternativa {k} da questão {i}" for k in "ABCDE"},
+            "gabarito": "B",
+            "url": None,
+        },
+        "enunciado_hash": "0" * 64,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def meta(limit: int) -> dict:
+    return {"total": 1000, "totalPages": 1000 // limit, "page": 1, "limit": limit, "hasNext": True, "hasPrev": False, "next_cursor": None}
+
+
+def pagina_pydantic(docs: list[dict], limit: int) -> bytes:
+    data = []
+    for doc in docs:
+        doc = dict(doc)
+        doc["id"] = str(doc.pop("_id"))
+        data.append(QuestaoResponse.model_validate(doc).model_dump(mode="json"))
+    # validação do response_model + JSONResponse
+    data = [QuestaoResponse.model_validate(q).model_dump(mode="json") for q in data]
+    return json.dumps({**meta(limit), "data": data}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def pagina_confiavel(docs: list[dict], limit: int) -> bytes:
+    return pagina_json(meta(limit), [dumps(questao_confiavel(doc)) for doc in docs])
+
+
+def pagina_catalogo(itens: list[bytes], limit: int) -> bytes:
+    return pagina_json(meta(limit), itens)
+
+
+def medir(nome: str, fn, arg, limit: int, pages: int) -> float:
+    inicio = time.process_time()
+    for _ in range(pages):
+        fn(arg, limit)
+    por_pagina = (time.process_time() - inicio) / pages * 1e6
+    print(f"{nome:>10}: {por_pagina:9.1f} µs de CPU por página")
+    return por_pagina
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o custo de serialização por página")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=2000)
+    args = parser.parse_args()
+
+    docs = [documento(i) for i in range(args.limit)]
+    itens = [dumps(questao_confiavel(doc)) for doc in docs]
+
+    # as duas saídas precisam ser equivalentes
+    esperado = json.loads(pagina_pydantic(docs, args.limit))
+    assert json.loads(pagina_confiavel(docs, args.limit)) == esperado
+    TypeAdapter(list[QuestaoResponse]).validate_python(esperado["data"])
+
+    print(f"{args.pages} páginas de {args.limit} questões")
+    base = medir("pydantic", pagina_pydantic, docs, args.limit, args.pages)
+    confiavel = medir("confiavel", pagina_confiavel, docs, args.limit, args.pages)
+    catalogo = medir("catalogo", pagina_catalogo, itens, args.limit, args.pages)
+    print(f"confiavel: {base / confiavel:.1f}x mais rápido; catalogo: {base / catalogo:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Confere com `explain()` que as consultas canônicas dos serviços usam índice.
+
+Uso:
+  python scripts/check_indexes.py [--ensure] [--verbose]
+
+Cada consulta é montada pelos mesmos construtores de filtro dos serviços e
+executada com `explain` no banco configurado (`.env`). Se o plano vencedor de
+alguma delas tiver um estágio COLLSCAN, o script lista as consultas e sai com
+código 1. `--ensure` cria antes os índices do registro (`services/indexes.py`).
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bson import ObjectId
+
+from connection import get_database
+from config.settings import settings
+from services.indexes import ensure_indexes
+from services.log_service import LOG_SORT, build_log_query
+from services.questao_service import QuestaoServiceBase
+from services.resultado_service import RESULTADO_SORT, ResultadoService
+
+AGORA = datetime.now(timezone.utc)
+
+
+def canonical_queries() -> list[tuple[str, str, dict]]:
+    """(coleção, descrição, comando explain) das consultas que precisam de índice"""
+    questoes = QuestaoServiceBase()
+    resultados = ResultadoService()
+    id_sort = {"_id": 1}
+    consultas = [
+        (settings.QUESTOES_COLLECTION, "listagem por disciplina e ano", {"filter": questoes._build_query("MA", "5"), "sort": id_sort, "limit": 11}),
+        (settings.QUESTOES_COLLECTION, "listagem por disciplina", {"filter": questoes._build_query("MA", None), "sort": id_sort, "limit": 11}),
+        (settings.QUESTOES_COLLECTION, "listagem por ano", {"filter": questoes._build_query(None, "5"), "sort": id_sort, "limit": 11}),
+        (settings.QUESTOES_COLLECTION, "listagem sem filtro", {"filter": {}, "sort": id_sort, "limit": 11}),
+        (settings.QUESTOES_COLLECTION, "lote por ids", {"filter": {"_id": {"$in": [ObjectId(), ObjectId()]}}}),
+        (settings.QUESTOES_COLLECTION, "upsert por codigo + enunciado", {"filter": {"codigo": "EF05MA01", "enunciado_hash": "0" * 64}}),
+        (settings.QUESTOES_COLLECTION, "busca por texto", {"filter": questoes._busca_query("fração", None, "MA", None), "sort": dict(questoes._busca_sort("fração")), "limit": 10}),
+        (settings.QUESTOES_COLLECTION, "busca por prefixo de código", {"filter": questoes._busca_query(None, "EF05LP", None, None), "sort": dict(questoes._busca_sort(None)), "limit": 10}),
+        (settings.QUESTOES_COLLECTION, "sincronização do catálogo", {"filter": {"updated_at": {"$gte": AGORA}}}),
+        (settings.RESULTADOS_COLLECTION, "listagem sem filtro", {"filter": {}, "sort": dict(RESULTADO_SORT), "limit": 11}),
+        (settings.RESULTADOS_COLLECTION, "listagem por email", {"filter": resultados._build_query(None, None, "aluno@exemplo.com"), "sort": dict(RESULTADO_SORT), "limit": 11}),
+        (settings.RESULTADOS_COLLECTION, "listagem por disciplina e ano", {"filter": resultados._build_query("LP", 5, None), "sort": dict(RESULTADO_SORT), "limit": 11}),
+        (settings.RESULTADOS_COLLECTION, "listagem por ano", {"filter": resultados._build_query(None, 5, None), "sort": dict(RESULTADO_SORT), "limit": 11}),
+        (settings.USUARIOS_COLLECTION, "login por email", {"filter": {"email": "aluno@exemplo.com"}}),
+        (settings.LOG_COLLECTION, "listagem sem filtro", {"filter": build_log_query(), "sort": dict(LOG_SORT), "limit": 51}),
+        (settings.LOG_COLLECTION, "listagem por origem", {"filter": build_log_query(origem="/questoes"), "sort": dict(LOG_SORT), "limit": 51}),
+        (settings.LOG_COLLECTION, "listagem por resultado", {"filter": build_log_query(resultado="erro"), "sort": dict(LOG_SORT), "limit": 51}),
+        (settings.LOG_COLLECTION, "listagem por endpoint", {"filter": build_log_query(endpoint="/questoes"), "sort": dict(LOG_SORT), "limit": 51}),
+        (settings.LOG_COLLECTION, "listagem por prefixo de endpoint", {"filter": build_log_query(endpoint="/questoes*"), "sort": dict(LOG_SORT), "limit": 51}),
+        (settings.METRICS_COLLECTION, "stats por período", {"filter": {"minute": {"$gte": AGORA - timedelta(hours=1), "$lt": AGORA}}}),
+        (settings.METRICS_COLLECTION, "stats por rota", {"filter": {"route": "/questoes", "minute": {"$gte": AGORA - timedelta(hours=1)}}}),
+    ]
+    return [(colecao, descricao, {"find": colecao, **find}) for colecao, descricao, find in consultas]
+
+
+def winning_stages(explain: dict) -> list[str]:
+    """Estágios dos planos vencedores (inclui os aninhados em agregações e shards)"""
+    stages = []
+
+    def walk(node, in_winning: bool):
+        if isinstance(node, dict):
+            if in_winning and "stage" in node:
+                stages.append(node["stage"])
+            for key, value in node.items():
+                if key == "rejectedPlans":
+                    continue
+                walk(value, in_winning or key == "winningPlan")
+        elif isinstance(node, list):
+            for item in node:
+                walk(item, in_winning)
+
+    walk(explain, False)
+    return stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Falha se alguma consulta canônica usar COLLSCAN")
+    parser.add_argument("--ensure", action="store_true", help="Cria os índices do registro antes de conferir")
+    parser.add_argument("--verbose", action="store_true", help="Mostra os estágios de cada plano")
+    args = parser.parse_args()
+
+    if args.ensure:
+        for nome, indexes in ensure_indexes().items():
+            print(f"{nome}: {', '.join(indexes)}")
+
+    database = get_database()
+    falhas = []
+    for colecao, descricao, comando in canonical_queries():
+        try:
+            explain = database.command("explain", comando, verbosity="queryPlanner")
+        except Exception as e:
+            print(f"❌ Erro ao executar explain em {colecao} ({descricao}): {e}")
+            falhas.append((colecao, descricao))
+            continue
+        stages = winning_stages(explain)
+        collscan = "COLLSCAN" in stages
+        if collscan:
+            falhas.append((colecao, descricao))
+        detalhe = f" [{' > '.join(stages)}]" if args.verbose else ""
+        print(f"{'❌' if collscan else '✅'} {colecao}: {descricao}{detalhe}")
+
+    if falhas:
+        print(f"{len(falhas)} consulta(s) sem índice (ou com erro no explain)")
+        sys.exit(1)
+    print("Todas as consultas canônicas usam índice")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,25 @@
 """Script para gerar senhas hashed a partir de CPFs.
 
 Uso:
-  python scripts/generate_hashed_cpfs.py input.json output.json
+  python scripts/generate_hashed_cpfs.py input.json output.json [--workers N] [--chunk-size N]
 
-input.json deve ser um array de objetos: [{ "email": "...", "cpf": "..." }, ...]
+input pode ser um array JSON [{ "email": "...", "cpf": "..." }, ...] ou NDJSON
+(um objeto por linha); é lido em streaming, sem carregar o arquivo inteiro.
 output.json será: [{ "email": "...", "senha": "<bcrypt-hash>" }, ...]
+(com extensão .ndjson/.jsonl a saída é NDJSON).
+
+Os hashes são calculados em um pool de processos (todos os núcleos por
+padrão) e gravados à medida que ficam prontos. O progresso é salvo em
+`<output>.ckpt`; se a execução for interrompida, rodar o mesmo comando
+continua de onde parou sem recalcular o que já foi gravado.
 
 O script reutiliza a função `get_password_hash` do `services.auth_service` para garantir compatibilidade.
 """
+import argparse
 import json
+import os
 import re
-import sys
+from multiprocessing import Pool
 from pathlib import Path
 
 try:
@@ -22,33 +31,145 @@ except Exception:
         return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
 
+READ_CHUNK = 64 * 1024
+NDJSON_SUFFIXES = {".ndjson", ".jsonl"}
+
+
 def clean_cpf(cpf: str) -> str:
     return re.sub(r"\D", "", cpf or "")
 
 
-def process(input_path: Path, output_path: Path):
-    data = json.loads(input_path.read_text(encoding='utf-8'))
-    out = []
-    for item in data:
-        email = item.get('email')
-        cpf = clean_cpf(item.get('cpf', ''))
-        if not email or not cpf:
-            continue
-        senha = get_password_hash(cpf)
-        out.append({"email": email, "senha": senha})
+def hash_record(item: dict) -> dict | None:
+    """Gera {email, senha} para um registro; None se faltar email ou CPF."""
+    email = item.get('email') if isinstance(item, dict) else None
+    cpf = clean_cpf(item.get('cpf', '')) if isinstance(item, dict) else ''
+    if not email or not cpf:
+        return None
+    return {"email": email, "senha": get_password_hash(cpf)}
+
+
+def _iter_json_array(f, first: str):
+    """Itera os objetos de um array JSON lendo o arquivo em blocos."""
+    decoder = json.JSONDecoder()
+    buf = first[first.index('[') + 1:]
+    eof = False
+    while True:
+        buf = buf.lstrip().lstrip(',').lstrip()
+        if buf.startswith(']'):
+            return
+        if buf:
+            try:
+                obj, end = decoder.raw_decode(buf)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield obj
+                buf = buf[end:]
+                continue
+        elif eof:
+            return
+        chunk = f.read(READ_CHUNK)
+        eof = not chunk
+        buf += chunk
+
+
+def iter_records(input_path: Path):
+    """Itera os registros de entrada (array JSON ou NDJSON) em streaming."""
+    with open(input_path, encoding='utf-8') as f:
+        first = f.read(READ_CHUNK)
+        if first.lstrip().startswith('['):
+            yield from _iter_json_array(f, first)
+            return
+        pending = first
+        while True:
+            *lines, pending = pending.split('\n')
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                break
+            pending += chunk
+        if pending.strip():
+            yield json.loads(pending)
+
+
+def hash_records(items, workers: int | None = None, chunk_size: int = 8):
+    """Hash em paralelo preservando a ordem da entrada (um resultado por item, ou None)."""
+    with Pool(processes=workers or os.cpu_count() or 1) as pool:
+        yield from pool.imap(hash_record, items, chunksize=chunk_size)
+
+
+def _load_checkpoint(ckpt_path: Path) -> dict | None:
+    try:
+        return json.loads(ckpt_path.read_text(encoding='utf-8'))
+    except Exception:
+        return None
+
+
+def _save_checkpoint(ckpt_path: Path, state: dict):
+    tmp = ckpt_path.with_name(ckpt_path.name + '.tmp')
+    tmp.write_text(json.dumps(state), encoding='utf-8')
+    os.replace(tmp, ckpt_path)
+
+
+def process(input_path: Path, output_path: Path, workers: int | None = None, chunk_size: int = 8, checkpoint_every: int = 200):
+    ndjson = output_path.suffix.lower() in NDJSON_SUFFIXES
+    ckpt_path = output_path.with_name(output_path.name + '.ckpt')
+
+    state = _load_checkpoint(ckpt_path) if output_path.exists() else None
+    if state:
+        # descarta o que foi escrito depois do último checkpoint
+        with open(output_path, 'r+b') as out:
+            out.truncate(state["output_bytes"])
+        print(f"Resuming: {state['consumed']} input records already processed, {state['written']} entries written")
+    else:
+        state = {"consumed": 0, "written": 0, "output_bytes": 0}
+        with open(output_path, 'wb') as out:
+            if not ndjson:
+                out.write(b'[\n')
+            state["output_bytes"] = out.tell()
+        _save_checkpoint(ckpt_path, state)
+
+    def pending_records():
+        for i, item in enumerate(iter_records(input_path)):
+            if i >= state["consumed"]:
+                yield item
+
+    with open(output_path, 'ab') as out:
+        for result in hash_records(pending_records(), workers=workers, chunk_size=chunk_size):
+            state["consumed"] += 1
+            if result is not None:
+                line = json.dumps(result, ensure_ascii=False)
+                if ndjson:
+                    out.write((line + '\n').encode('utf-8'))
+                else:
+                    out.write((('  ' if state["written"] == 0 else ',\n  ') + line).encode('utf-8'))
+                state["written"] += 1
+            if state["consumed"] % checkpoint_every == 0:
+                out.flush()
+                os.fsync(out.fileno())
+                state["output_bytes"] = out.tell()
+                _save_checkpoint(ckpt_path, state)
+
+        if not ndjson:
+            out.write(b'\n]\n')
 
-    output_path.write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding='utf-8')
-    print(f"Wrote {len(out)} entries to {output_path}")
+    ckpt_path.unlink(missing_ok=True)
+    print(f"Wrote {state['written']} entries to {output_path}")
 
 
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: python scripts/generate_hashed_cpfs.py input.json output.json")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Gera senhas bcrypt a partir de CPFs")
+    parser.add_argument("input", type=Path)
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--workers", type=int, default=None, help="Processos no pool (padrão: todos os núcleos)")
+    parser.add_argument("--chunk-size", type=int, default=8, help="Registros por tarefa enviada ao pool")
+    parser.add_argument("--checkpoint-every", type=int, default=200, help="Registros entre checkpoints")
+    args = parser.parse_args()
 
-    input_path = Path(sys.argv[1])
-    output_path = Path(sys.argv[2])
-    process(input_path, output_path)
+    process(args.input, args.output, workers=args.workers, chunk_size=args.chunk_size, checkpoint_every=args.checkpoint_every)
 
 
 if __name__ == '__main__':
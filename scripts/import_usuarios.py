@@ -0,0 +1,112 @@
+"""Script para carregar as senhas geradas por `generate_hashed_cpfs.py` em USUARIOS.
+
+Uso:
+  python scripts/import_usuarios.py output.json [--batch-size 1000] [--dry-run]
+
+Aceita a saída do gerador em array JSON ou NDJSON, lida em streaming. Cada
+registro vira um `UpdateOne` por `email` com upsert (`$set` da senha,
+`$setOnInsert` de `created_at`), enviado em lotes com `bulk_write` não
+ordenado. Garante antes um índice único em `email`.
+"""
+import argparse
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from connection import get_collection
+from config.settings import settings
+from generate_hashed_cpfs import iter_records
+from services.indexes import USUARIO_INDEXES
+
+
+def ensure_email_index(collection):
+    # mesmo índice registrado para USUARIOS no startup da API
+    collection.create_indexes(USUARIO_INDEXES)
+
+
+def build_ops(records: list[dict], now: datetime) -> tuple[list[UpdateOne], list[str], int]:
+    """Monta os upserts do lote. Retorna (operações, emails, registros inválidos)."""
+    ops = []
+    emails = []
+    invalid = 0
+    for item in records:
+        email = (item.get("email") or "").strip() if isinstance(item, dict) else ""
+        senha = item.get("senha") if isinstance(item, dict) else None
+        if not email or not senha:
+            invalid += 1
+            continue
+        ops.append(UpdateOne(
+            {"email": email},
+            {"$set": {"senha": senha, "updated_at": now}, "$setOnInsert": {"created_at": now}},
+            upsert=True,
+        ))
+        emails.append(email)
+    return ops, emails, invalid
+
+
+def apply_batch(collection, ops: list[UpdateOne], emails: list[str], counts: dict):
+    try:
+        result = collection.bulk_write(ops, ordered=False)
+        counts["inserted"] += result.upserted_count
+        counts["updated"] += result.matched_count
+    except BulkWriteError as e:
+        # com ordered=False as demais operações do lote são aplicadas
+        details = e.details
+        counts["inserted"] += details.get("nUpserted", 0)
+        counts["updated"] += details.get("nMatched", 0)
+        counts["failed"] += len(details.get("writeErrors", []))
+        for err in details.get("writeErrors", [])[:3]:
+            print(f"❌ Erro ao importar {emails[err['index']]}: {err.get('errmsg')}")
+
+
+def import_file(input_path: Path, batch_size: int, dry_run: bool) -> dict:
+    collection = get_collection(settings.USUARIOS_COLLECTION)
+    counts = {"inserted": 0, "updated": 0, "failed": 0, "invalid": 0}
+    processed = 0
+    if not dry_run:
+        ensure_email_index(collection)
+
+    def flush(batch):
+        nonlocal processed
+        ops, emails, invalid = build_ops(batch, datetime.now(timezone.utc))
+        counts["invalid"] += invalid
+        if ops and not dry_run:
+            apply_batch(collection, ops, emails, counts)
+        processed += len(batch)
+        print(f"  {processed} registros processados...")
+
+    batch = []
+    for item in iter_records(input_path):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa senhas hashed para a coleção de usuários")
+    parser.add_argument("input", type=Path)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="Apenas valida o arquivo, sem gravar")
+    args = parser.parse_args()
+
+    try:
+        counts = import_file(args.input, args.batch_size, args.dry_run)
+    except Exception as e:
+        print(f"❌ Erro ao importar usuários: {e}")
+        sys.exit(1)
+    print(f"{settings.USUARIOS_COLLECTION}: {counts['inserted']} inseridos, {counts['updated']} atualizados, {counts['failed']} falhas, {counts['invalid']} inválidos")
+    if counts["failed"]:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Script para converter timestamps gravados como string ISO em datetime BSON.
+
+Uso:
+  python scripts/migrate_timestamps.py [--batch-size 1000] [--dry-run]
+
+Percorre LOGS (`timestamp`), QUESTOES e RESULTADOS (`created_at`/`updated_at`)
+em lotes ordenados por `_id`, convertendo apenas os campos que ainda são
+string. Pode ser interrompido e executado de novo sem efeitos colaterais.
+"""
+import argparse
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pymongo import UpdateOne
+
+from connection import get_collection
+from config.settings import settings
+
+TARGETS = {
+    settings.LOG_COLLECTION: ("timestamp",),
+    settings.QUESTOES_COLLECTION: ("created_at", "updated_at"),
+    settings.RESULTADOS_COLLECTION: ("created_at", "updated_at"),
+}
+
+
+def parse_iso(value: str) -> datetime | None:
+    """Aceita os formatos já gravados: '...Z', '...+00:00' e '...+00:00Z'."""
+    raw = value.strip()
+    if raw.endswith("Z"):
+        raw = raw[:-1]
+    try:
+        parsed = datetime.fromisoformat(raw)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def migrate_collection(name: str, fields: tuple, batch_size: int, dry_run: bool) -> dict:
+    collection = get_collection(name)
+    pending = {"$or": [{field: {"$type": "string"}} for field in fields]}
+    projection = {field: 1 for field in fields}
+    counts = {"converted": 0, "invalid": 0}
+    last_id = None
+
+    while True:
+        query = dict(pending)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        docs = list(collection.find(query, projection).sort("_id", 1).limit(batch_size))
+        if not docs:
+            break
+        last_id = docs[-1]["_id"]
+
+        ops = []
+        for doc in docs:
+            update = {}
+            for field in fields:
+                if isinstance(doc.get(field), str):
+                    parsed = parse_iso(doc[field])
+                    if parsed is None:
+                        counts["invalid"] += 1
+                    else:
+                        update[field] = parsed
+            if update:
+                ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": update}))
+
+        if ops and not dry_run:
+            collection.bulk_write(ops, ordered=False)
+        counts["converted"] += len(ops)
+        print(f"  {name}: {counts['converted']} documentos convertidos...")
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converte timestamps string em datetime BSON")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="Apenas conta, sem gravar")
+    args = parser.parse_args()
+
+    for name, fields in TARGETS.items():
+        counts = migrate_collection(name, fields, args.batch_size, args.dry_run)
+        print(f"{name}: {counts['converted']} convertidos, {counts['invalid']} campos inválidos")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,13 +3,7 @@ from pathlib import Path
 import streamlit as st
 from io import BytesIO
 
-try:
-    from services.auth_service import get_password_hash
-except Exception:
-    import bcrypt
-
-    def get_password_hash(p):
-        return bcrypt.hashpw(p.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+from generate_hashed_cpfs import hash_records
 
 
 st.title('Gerador de senhas hashed a partir de CPFs')
@@ -22,15 +16,13 @@ if uploaded_file is not None:
         st.error(f'Erro ao ler JSON: {e}')
         st.stop()
 
+    # hashes calculados em paralelo (todos os núcleos), na ordem do arquivo
     out = []
-    for item in data:
-        email = item.get('email')
-        cpf = item.get('cpf')
-        if not email or not cpf:
-            continue
-        cpf_digits = ''.join(c for c in cpf if c.isdigit())
-        senha = get_password_hash(cpf_digits)
-        out.append({'email': email, 'senha': senha})
+    progresso = st.progress(0.0)
+    for i, result in enumerate(hash_records(data), start=1):
+        if result is not None:
+            out.append(result)
+        progresso.progress(i / len(data))
 
     result_bytes = json.dumps(out, ensure_ascii=False, indent=2).encode('utf-8')
     st.write('Resultado gerado:')
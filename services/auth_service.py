@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
+import hashlib
+import time
 import jwt
 import bcrypt
 from bson import ObjectId
@@ -7,6 +9,10 @@ from bson import ObjectId
 from connection import get_collection
 from config.settings import settings
 from services.erros import NotFoundError, ValidationError
+from services.cache import TTLCache
+
+# Payloads de tokens já verificados, por sha256 do token; expiram no `exp`
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_MAXSIZE, ttl=settings.TOKEN_CACHE_TTL_S)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
@@ -19,8 +25,23 @@ def get_password_hash(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+def build_token_profile(user: dict) -> dict:
+    """Perfil mínimo do usuário para embutir no token (`JWT_PROFILE_FIELDS`)."""
+    return {field: user.get(field) for field in settings.JWT_PROFILE_FIELDS if user.get(field) is not None}
+
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None, profile: Optional[dict] = None, token_version: Optional[int] = None) -> str:
+    """Gera o JWT.
+
+    `token_version` vai no claim `ver` (revogação: o token só vale enquanto for
+    igual ao `token_version` do usuário) e `profile`, quando informado, no claim
+    `usr`, permitindo autenticar sem ler o usuário no banco.
+    """
     to_encode = data.copy()
+    if token_version is not None:
+        to_encode["ver"] = token_version
+    if profile is not None:
+        to_encode["usr"] = profile
     now = datetime.now(timezone.utc)
     if expires_delta:
         expire = now + expires_delta
@@ -32,14 +53,25 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def decode_token(token: str) -> dict:
+    digest = hashlib.sha256(token.encode('utf-8')).digest()
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return dict(payload)
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         raise ValidationError("Token expirado")
     except jwt.InvalidTokenError:
         raise ValidationError("Token inválido")
 
+    # nunca além do `exp`: depois dele o token volta a ser verificado (e recusado)
+    ttl = settings.TOKEN_CACHE_TTL_S
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - time.time())
+    token_cache.set(digest, payload, ttl=ttl)
+    return dict(payload)
+
 
 class AuthService:
     def __init__(self):
@@ -68,7 +100,8 @@ class AuthService:
     def login(self, email: str, password: str) -> dict:
         user = self.authenticate_user(email, password)
         token_data = {"sub": user.get("id"), "email": user.get("email")}
-        token = create_access_token(token_data)
+        profile = build_token_profile(user) if settings.JWT_EMBED_PROFILE else None
+        token = create_access_token(token_data, profile=profile, token_version=user.get("token_version", 0))
         return {"access_token": token, "token_type": "bearer", "user": user}
 
     def get_user_by_id(self, user_id: str) -> dict:
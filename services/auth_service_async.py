@@ -0,0 +1,129 @@
+from bson import ObjectId
+from pymongo import ReturnDocument
+from fastapi.concurrency import run_in_threadpool
+
+from connection import get_async_collection
+from config.settings import settings
+from services.auth_service import AuthService, build_token_profile, create_access_token
+from services.cache import TTLCache
+from services.erros import NotFoundError, ValidationError
+from services.password_verifier import password_verifier
+
+# Usuários autenticados por `sub`, compartilhado entre o middleware e `get_current_user`
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAXSIZE, ttl=settings.USER_CACHE_TTL_S)
+
+# `token_version` atual por usuário, para validar tokens com perfil embutido
+token_version_cache = TTLCache(maxsize=settings.USER_CACHE_MAXSIZE, ttl=settings.TOKEN_VERSION_CACHE_TTL_S)
+
+
+def invalidate_user(user_id: str | None = None):
+    """Remove um usuário do cache (ou todos, sem `user_id`) após alterar o documento."""
+    if user_id is None:
+        user_cache.clear()
+        token_version_cache.clear()
+    else:
+        user_cache.invalidate(str(user_id))
+        token_version_cache.invalidate(str(user_id))
+
+
+class AuthServiceAsync:
+    def __init__(self):
+        self.collection = get_async_collection(settings.USUARIOS_COLLECTION)
+
+    async def authenticate_user(self, email: str, password: str) -> dict:
+        """Valida credenciais e retorna o documento do usuário (sem senha).
+
+        O bcrypt roda no executor limitado de `password_verifier`; com a fila
+        cheia levanta `OverloadedError`.
+        """
+        if self.collection is None:
+            user = await run_in_threadpool(AuthService().collection.find_one, {"email": email})
+        else:
+            user = await self.collection.find_one({"email": email})
+        if not user:
+            raise NotFoundError("Usuário não encontrado")
+
+        hashed = user.get("senha") or user.get("password")
+        if not hashed:
+            raise ValidationError("Usuário sem senha cadastrada")
+
+        if not await password_verifier.verify(password, hashed):
+            raise ValidationError("Credenciais inválidas")
+
+        user["id"] = str(user.get("_id"))
+        user.pop("_id", None)
+        user.pop("senha", None)
+        user.pop("password", None)
+        return user
+
+    async def login(self, email: str, password: str) -> dict:
+        user = await self.authenticate_user(email, password)
+        token_data = {"sub": user.get("id"), "email": user.get("email")}
+        profile = build_token_profile(user) if settings.JWT_EMBED_PROFILE else None
+        token = create_access_token(token_data, profile=profile, token_version=user.get("token_version", 0))
+        return {"access_token": token, "token_type": "bearer", "user": user}
+
+    async def _find_user_by_id(self, user_id: str) -> dict:
+        if self.collection is None:
+            return await run_in_threadpool(AuthService().get_user_by_id, user_id)
+        user = await self.collection.find_one({"_id": ObjectId(user_id)}, {"senha": 0, "password": 0})
+        if not user:
+            raise NotFoundError("Usuário não encontrado")
+        user["id"] = str(user.get("_id"))
+        user.pop("_id", None)
+        return user
+
+    async def get_user_by_id(self, user_id: str) -> dict:
+        """Busca o usuário pelo id, passando pelo cache TTL/LRU"""
+        user = user_cache.get(user_id)
+        if user is None:
+            user = await self._find_user_by_id(user_id)
+            user_cache.set(user_id, user)
+        return dict(user)
+
+    async def get_token_version(self, user_id: str) -> int:
+        version = token_version_cache.get(user_id)
+        if version is None:
+            if self.collection is None:
+                user = await run_in_threadpool(AuthService().get_user_by_id, user_id)
+            else:
+                user = await self.collection.find_one({"_id": ObjectId(user_id)}, {"token_version": 1})
+                if not user:
+                    raise NotFoundError("Usuário não encontrado")
+            version = user.get("token_version", 0)
+            token_version_cache.set(user_id, version)
+        return version
+
+    async def user_from_token(self, payload: dict) -> dict:
+        """Resolve o usuário do token.
+
+        Com o claim `usr` (perfil embutido) o usuário vem do próprio token e só a
+        versão é conferida (em cache); sem ele, o documento vem do cache de
+        usuários. Em ambos os casos `ver` diferente do `token_version` atual
+        significa token revogado.
+        """
+        user_id = payload.get("sub")
+        version = payload.get("ver", 0)
+        profile = payload.get("usr")
+        if profile is not None:
+            if version != await self.get_token_version(user_id):
+                raise ValidationError("Token revogado")
+            return dict(profile)
+
+        user = await self.get_user_by_id(user_id)
+        if version != user.get("token_version", 0):
+            raise ValidationError("Token revogado")
+        return user
+
+    async def revoke_tokens(self, user_id: str) -> int:
+        """Invalida todos os tokens emitidos para o usuário (incrementa `token_version`)"""
+        if self.collection is None:
+            sync_collection = AuthService().collection
+            user = await run_in_threadpool(sync_collection.find_one_and_update, {"_id": ObjectId(user_id)}, {"$inc": {"token_version": 1}}, {"token_version": 1}, return_document=ReturnDocument.AFTER)
+        else:
+            user = await self.collection.find_one_and_update({"_id": ObjectId(user_id)}, {"$inc": {"token_version": 1}}, {"token_version": 1}, return_document=ReturnDocument.AFTER)
+        if not user:
+            raise NotFoundError("Usuário não encontrado")
+        invalidate_user(user_id)
+        token_version_cache.set(user_id, user["token_version"])
+        return user["token_version"]
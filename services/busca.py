@@ -0,0 +1,105 @@
+"""Índice invertido em memória para a busca de questões por palavra-chave.
+
+Os textos são normalizados (minúsculas, sem acentos: "ação" -> "acao") e
+quebrados em tokens alfanuméricos, sem stopwords do português. Cada termo
+aponta para as questões em que aparece, com a frequência, e o ranking é
+tf-idf: termos raros pesam mais. Todos os termos da consulta precisam
+aparecer (AND); o último também casa por prefixo, para busca enquanto se
+digita.
+"""
+import math
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+
+STOPWORDS = frozenset("""
+a ao aos as com da das de do dos e em na nas no nos o os ou para pela pelas pelo pelos por que se um uma umas uns
+""".split())
+
+PREFIXO_MIN = 3
+
+
+def normalizar(texto: str) -> str:
+    decomposto = unicodedata.normalize("NFKD", texto or "")
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def tokens(texto: str) -> list[str]:
+    return [t for t in re.findall(r"[a-z0-9]+", normalizar(texto)) if len(t) > 1 and t not in STOPWORDS]
+
+
+class IndiceInvertido:
+    def __init__(self):
+        # termo -> {id: frequência}
+        self._postings: dict[str, dict[str, int]] = {}
+        self._termos: dict[str, list[str]] = {}
+        # termos ordenados para a busca por prefixo; refeito só depois de mudanças
+        self._vocabulario: list[str] | None = None
+
+    def __len__(self) -> int:
+        return len(self._termos)
+
+    def adicionar(self, doc_id: str, texto: str):
+        self.remover(doc_id)
+        contagem = Counter(tokens(texto))
+        for termo, n in contagem.items():
+            self._postings.setdefault(termo, {})[doc_id] = n
+        self._termos[doc_id] = list(contagem)
+        self._vocabulario = None
+
+    def remover(self, doc_id: str):
+        for termo in self._termos.pop(doc_id, []):
+            docs = self._postings[termo]
+            docs.pop(doc_id, None)
+            if not docs:
+                del self._postings[termo]
+        self._vocabulario = None
+
+    def _expandir(self, termo: str, prefixo: bool) -> list[str]:
+        if not prefixo:
+            return [termo] if termo in self._postings else []
+        if self._vocabulario is None:
+            self._vocabulario = sorted(self._postings)
+        termos = []
+        for candidato in self._vocabulario[bisect_left(self._vocabulario, termo):]:
+            if not candidato.startswith(termo):
+                break
+            termos.append(candidato)
+        return termos
+
+    def _peso(self, termo: str, doc_id: str, total: int) -> float:
+        docs = self._postings[termo]
+        return docs[doc_id] * math.log(1 + total / len(docs))
+
+    def buscar(self, consulta: str) -> dict[str, float]:
+        """Pontuação tf-idf das questões que contêm todos os termos da consulta"""
+        termos = list(dict.fromkeys(tokens(consulta)))
+        if not termos:
+            return {}
+        total = len(self._termos)
+        ultimo = len(termos) - 1
+        grupos = [self._expandir(termo, i == ultimo and len(termo) >= PREFIXO_MIN) for i, termo in enumerate(termos)]
+        # termos mais raros primeiro: os seguintes só olham os candidatos que sobraram
+        grupos.sort(key=lambda variantes: sum(len(self._postings[v]) for v in variantes))
+        scores = None
+        for variantes in grupos:
+            parciais: dict[str, float] = {}
+            if scores is not None and len(variantes) > 1:
+                # prefixo com muitas variantes: mais barato olhar os termos de cada candidato
+                variantes = set(variantes)
+                for doc_id in scores:
+                    for termo in self._termos[doc_id]:
+                        if termo in variantes:
+                            parciais[doc_id] = max(parciais.get(doc_id, 0.0), self._peso(termo, doc_id, total))
+            else:
+                for variante in variantes:
+                    docs = self._postings[variante]
+                    alvo = scores if scores is not None and len(scores) < len(docs) else docs
+                    for doc_id in alvo:
+                        if doc_id in docs:
+                            parciais[doc_id] = max(parciais.get(doc_id, 0.0), self._peso(variante, doc_id, total))
+            scores = parciais if scores is None else {d: s + parciais[d] for d, s in scores.items() if d in parciais}
+            if not scores:
+                return {}
+        return scores
@@ -0,0 +1,27 @@
+"""Cursores opacos para paginação keyset.
+
+O cursor é a posição do último item entregue (ex.: `timestamp` e `_id`),
+serializada com `bson.json_util` para preservar datetimes e ObjectIds e
+codificada em base64 url-safe.
+"""
+import base64
+
+from bson import json_util
+
+from services.erros import ValidationError
+
+
+def encode_cursor(posicao: dict) -> str:
+    raw = json_util.dumps(posicao).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        posicao = json_util.loads(raw)
+    except Exception:
+        raise ValidationError("Cursor inválido")
+    if not isinstance(posicao, dict):
+        raise ValidationError("Cursor inválido")
+    return posicao
@@ -5,6 +5,7 @@ Definições:
 - NotFoundError: recurso não encontrado (mapeável para 404 na API).
 - ValidationError: erro de validação de dados de entrada.
 - DatabaseError: encapsula erros da camada de persistência.
+- OverloadedError: capacidade esgotada (mapeável para 429 na API).
 """
 from __future__ import annotations
 
@@ -26,3 +27,8 @@ class ValidationError(ServiceError):
 class DatabaseError(ServiceError):
     """Erros relacionados ao banco de dados."""
     pass
+
+
+class OverloadedError(ServiceError):
+    """Capacidade do serviço esgotada; a requisição deve ser tentada depois."""
+    pass
@@ -0,0 +1,37 @@
+"""ETags para respostas derivadas do catálogo de questões.
+
+A ETag combina a versão do catálogo (incrementada a cada escrita em
+QUESTOES) com um hash do path e da query normalizada. Enquanto a versão não
+muda, a mesma URL tem a mesma ETag e um `If-None-Match` igual recebe 304 sem
+consultar o banco nem serializar nada.
+"""
+import hashlib
+from urllib.parse import parse_qsl, urlencode
+
+from fastapi import Request, Response
+
+from config.settings import settings as app_settings
+
+
+def gerar_etag(versao: int, path: str, query: str = "", extra: str = "") -> str:
+    params = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    digest = hashlib.sha256(f"{path}?{params}#{extra}".encode("utf-8")).hexdigest()[:16]
+    return f'"q{versao}-{digest}"'
+
+
+def cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": app_settings.QUESTOES_CACHE_CONTROL}
+
+
+def nao_modificado(request: Request, etag: str) -> bool:
+    """Compara com If-None-Match (comparação fraca, como manda a RFC 9110)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def resposta_304(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
@@ -0,0 +1,61 @@
+"""Registro declarativo dos índices de todas as coleções.
+
+Cada coleção aponta para a função que devolve seus `IndexModel`s (algumas
+dependem de settings, como o TTL de LOGS). O startup chama
+`ensure_indexes_async`; `create_indexes` é idempotente, então índices que já
+existem com a mesma definição não custam nada. Um índice que conflita com
+outro já existente (mesmo nome, definição diferente) só gera o aviso e não
+impede o startup.
+
+`scripts/check_indexes.py` confere com `explain()` que as consultas
+canônicas dos serviços usam esses índices.
+"""
+from fastapi.concurrency import run_in_threadpool
+from pymongo import ASCENDING, IndexModel
+
+from connection import get_async_collection, get_collection
+from config.settings import settings as app_settings
+from services.log_service import log_indexes
+from services.metrics_service import METRICS_INDEXES
+from services.questao_service import QUESTAO_INDEXES
+from services.resultado_service import RESULTADO_INDEXES
+
+USUARIO_INDEXES = [
+    IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+]
+
+INDEX_REGISTRY = {
+    app_settings.LOG_COLLECTION: log_indexes,
+    app_settings.QUESTOES_COLLECTION: lambda: QUESTAO_INDEXES,
+    app_settings.RESULTADOS_COLLECTION: lambda: RESULTADO_INDEXES,
+    app_settings.USUARIOS_COLLECTION: lambda: USUARIO_INDEXES,
+    app_settings.METRICS_COLLECTION: lambda: METRICS_INDEXES,
+}
+
+
+def _colecoes(nomes: list[str] | None) -> list[str]:
+    return list(INDEX_REGISTRY) if nomes is None else [n for n in nomes if n in INDEX_REGISTRY]
+
+
+def ensure_indexes(nomes: list[str] | None = None) -> dict[str, list[str]]:
+    """Cria os índices registrados (todas as coleções ou só `nomes`); retorna os nomes por coleção"""
+    criados = {}
+    for nome in _colecoes(nomes):
+        try:
+            criados[nome] = get_collection(nome).create_indexes(INDEX_REGISTRY[nome]())
+        except Exception as e:
+            print(f"❌ Erro ao criar índices de {nome}: {e}")
+    return criados
+
+
+async def ensure_indexes_async(nomes: list[str] | None = None) -> dict[str, list[str]]:
+    """Versão Motor de `ensure_indexes`; sem Motor, a síncrona em threadpool"""
+    if get_async_collection(app_settings.QUESTOES_COLLECTION) is None:
+        return await run_in_threadpool(ensure_indexes, nomes)
+    criados = {}
+    for nome in _colecoes(nomes):
+        try:
+            criados[nome] = await get_async_collection(nome).create_indexes(INDEX_REGISTRY[nome]())
+        except Exception as e:
+            print(f"❌ Erro ao criar índices de {nome}: {e}")
+    return criados
@@ -0,0 +1,36 @@
+"""Contexto de log por requisição.
+
+O middleware cria um `LogContext` em `request.state.log_context`; as rotas o
+enriquecem (página, total, ids, exceções...) e, ao final da resposta, o
+middleware grava um único documento de log com tudo o que foi coletado.
+"""
+from fastapi import Request
+
+
+class LogContext:
+    def __init__(self):
+        self.resultado: str | None = None
+        self.detalhes: dict = {}
+
+    def registrar(self, resultado: str | None = None, detalhes: dict | None = None):
+        """Define o resultado da operação e acrescenta detalhes ao log."""
+        if resultado:
+            self.resultado = resultado
+        if detalhes:
+            self.detalhes.update(detalhes)
+
+    def mesclar(self, base: dict) -> dict:
+        """Combina os campos do middleware com os detalhes da rota.
+
+        Em caso de conflito prevalece o que a rota registrou (ex.: `user` em
+        `/auth/login`, onde o middleware ainda não conhece o usuário).
+        """
+        return {**base, **self.detalhes}
+
+
+def get_log_context(request: Request) -> LogContext:
+    ctx = getattr(request.state, "log_context", None)
+    if ctx is None:
+        ctx = LogContext()
+        request.state.log_context = ctx
+    return ctx
@@ -0,0 +1,82 @@
+"""Exportação de logs em NDJSON ou CSV, em streaming.
+
+Os documentos são lidos do cursor em lotes de `LOG_EXPORT_BATCH_SIZE`,
+formatados um a um e entregues em blocos de ~64 KB (opcionalmente gzip),
+então a memória fica constante independentemente do volume exportado.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ASCENDING
+
+EXPORT_FIELDS = ("id", "timestamp", "origem_consumo", "resultado_consumo", "endpoint", "detalhes", "sample_weight")
+EXPORT_SORT = [("timestamp", ASCENDING), ("_id", ASCENDING)]
+CHUNK_BYTES = 64 * 1024
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    return str(value)
+
+
+def export_projection(campos: list[str]) -> dict:
+    """Projeção Mongo para os campos exportados (`id` vem de `_id`)."""
+    return {campo: 1 for campo in campos if campo != "id"}
+
+
+def _linha(doc: dict, campos: list[str]) -> dict:
+    return {campo: doc.get("_id") if campo == "id" else doc.get(campo) for campo in campos}
+
+
+def _formatar_ndjson(doc: dict, campos: list[str]) -> str:
+    return json.dumps(_linha(doc, campos), default=_json_default, ensure_ascii=False) + "\n"
+
+
+def _formatar_csv(doc: dict, campos: list[str]) -> str:
+    valores = []
+    for valor in _linha(doc, campos).values():
+        if isinstance(valor, (dict, list)):
+            valor = json.dumps(valor, default=_json_default, ensure_ascii=False)
+        elif isinstance(valor, (datetime, ObjectId)):
+            valor = _json_default(valor)
+        valores.append("" if valor is None else valor)
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(valores)
+    return buffer.getvalue()
+
+
+async def stream_export(docs, campos: list[str], formato: str = "ndjson", comprimir: bool = False):
+    """Gera os bytes da exportação a partir de um iterável assíncrono de documentos."""
+    compressor = zlib.compressobj(wbits=31) if comprimir else None  # wbits=31: formato gzip
+    formatar = _formatar_csv if formato == "csv" else _formatar_ndjson
+
+    partes: list[str] = []
+    tamanho = 0
+    if formato == "csv":
+        cabecalho = ",".join(campos) + "\r\n"
+        partes.append(cabecalho)
+        tamanho += len(cabecalho)
+
+    async for doc in docs:
+        linha = formatar(doc, campos)
+        partes.append(linha)
+        tamanho += len(linha)
+        if tamanho >= CHUNK_BYTES:
+            data = "".join(partes).encode("utf-8")
+            partes, tamanho = [], 0
+            data = compressor.compress(data) if compressor else data
+            if data:
+                yield data
+
+    data = "".join(partes).encode("utf-8")
+    if compressor:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
@@ -0,0 +1,295 @@
+"""Journal local de logs para quando o MongoDB está lento ou indisponível.
+
+Os eventos são anexados a segmentos JSONL (`bson.json_util`, preservando
+datetimes e ObjectIds) em `LOG_JOURNAL_DIR`. Um laço em segundo plano os
+reenvia com `insert_many` assim que o banco volta.
+
+- Limites: cada segmento tem até `LOG_JOURNAL_SEGMENT_BYTES`; acima de
+  `LOG_JOURNAL_MAX_BYTES` os segmentos mais antigos são descartados.
+- Cursor de replay: `cursor.json` guarda (segmento, offset) e só avança depois
+  que o lote foi gravado; a troca é atômica (arquivo temporário + os.replace).
+  Como todo evento tem `_id` próprio, reenviar um lote após uma queda gera
+  apenas erros de chave duplicada, que são ignorados. Coleções time-series
+  não têm `_id` único: com `LOG_TIMESERIES`, o replay consulta antes os `_id`
+  do lote que já estão no banco e só insere os que faltam.
+- Queda no meio de uma escrita: a primeira gravação do processo corta o resto
+  de linha no fim do segmento ativo, para o próximo evento não colar nele.
+"""
+import asyncio
+import json
+import os
+import threading
+from pathlib import Path
+
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError
+
+from connection import get_async_collection, get_collection
+from config.settings import settings as app_settings
+
+DUPLICATE_KEY = 11000
+CURSOR_FILE = "cursor.json"
+
+
+class LogJournal:
+    def __init__(self, directory: str | None = None, segment_max_bytes: int | None = None, max_bytes: int | None = None, batch_size: int | None = None, replay_interval: float | None = None):
+        self.directory = Path(directory or app_settings.LOG_JOURNAL_DIR)
+        self.segment_max_bytes = segment_max_bytes or app_settings.LOG_JOURNAL_SEGMENT_BYTES
+        self.max_bytes = max_bytes or app_settings.LOG_JOURNAL_MAX_BYTES
+        self.batch_size = batch_size or app_settings.LOG_BATCH_SIZE
+        self.replay_interval = replay_interval or app_settings.LOG_JOURNAL_REPLAY_INTERVAL_S
+        self.collection = None
+        self._lock = threading.Lock()
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self._tail_checked = False
+
+        self.appended = 0
+        self.replayed = 0
+        self.dropped = 0
+        self.corrupted = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def stats(self) -> dict:
+        segments = self._segments()
+        return {
+            "running": self.running,
+            "segments": len(segments),
+            "bytes": sum(s.stat().st_size for s in segments),
+            "appended": self.appended,
+            "replayed": self.replayed,
+            "dropped": self.dropped,
+            "corrupted": self.corrupted,
+        }
+
+    # segmentos ------------------------------------------------------------
+
+    def _segments(self) -> list[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob("*.jsonl"))
+
+    def _new_segment(self, segments: list[Path]) -> Path:
+        seq = int(segments[-1].stem) + 1 if segments else 1
+        return self.directory / f"{seq:012d}.jsonl"
+
+    def _read_cursor(self) -> tuple[str | None, int]:
+        try:
+            data = json.loads((self.directory / CURSOR_FILE).read_text(encoding="utf-8"))
+            return data.get("segment"), int(data.get("offset", 0))
+        except Exception:
+            return None, 0
+
+    def _write_cursor(self, segment: str | None, offset: int):
+        tmp = self.directory / (CURSOR_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"segment": segment, "offset": offset}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.directory / CURSOR_FILE)
+
+    def _enforce_cap(self, segments: list[Path], incoming: int) -> list[Path]:
+        """Descarta os segmentos mais antigos (exceto o ativo) até caber `incoming` bytes."""
+        total = sum(s.stat().st_size for s in segments)
+        while len(segments) > 1 and total + incoming > self.max_bytes:
+            oldest = segments.pop(0)
+            size = oldest.stat().st_size
+            with open(oldest, "rb") as f:
+                self.dropped += sum(1 for _ in f)
+            oldest.unlink()
+            total -= size
+        return segments
+
+    def _repair_tail(self, path: Path):
+        """Trunca o segmento na última quebra de linha (resto de uma escrita interrompida)."""
+        size = path.stat().st_size
+        if size == 0:
+            return
+        with open(path, "r+b") as f:
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            end = size
+            while end > 0:
+                start = max(0, end - 65536)
+                f.seek(start)
+                chunk = f.read(end - start)
+                pos = chunk.rfind(b"\n")
+                if pos >= 0:
+                    end = start + pos + 1
+                    break
+                end = start
+            f.truncate(end)
+        self.corrupted += 1
+
+    # escrita ----------------------------------------------------------------
+
+    def append(self, docs: list[dict]) -> int:
+        """Anexa eventos ao segmento ativo. Retorna quantos foram gravados."""
+        if not docs:
+            return 0
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+        data = "".join(json_util.dumps(doc) + "\n" for doc in docs).encode("utf-8")
+
+        with self._lock:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                segments = self._enforce_cap(self._segments(), len(data))
+                if sum(s.stat().st_size for s in segments) + len(data) > self.max_bytes:
+                    self.dropped += len(docs)
+                    return 0
+                if segments and not self._tail_checked:
+                    self._repair_tail(segments[-1])
+                self._tail_checked = True
+                if not segments or segments[-1].stat().st_size >= self.segment_max_bytes:
+                    segments.append(self._new_segment(segments))
+                with open(segments[-1], "ab") as f:
+                    f.write(data)
+                    f.flush()
+            except Exception as e:
+                self.dropped += len(docs)
+                print(f"❌ Erro ao gravar journal de logs: {e}")
+                return 0
+
+        self.appended += len(docs)
+        return len(docs)
+
+    async def append_async(self, docs: list[dict]) -> int:
+        return await asyncio.to_thread(self.append, docs)
+
+    # replay -------------------------------------------------------------------
+
+    def _read_batch(self) -> tuple[list[dict], str | None, int, bool]:
+        """Lê até `batch_size` linhas completas a partir do cursor.
+
+        Retorna (docs, segmento, offset após o lote, houve_avanço).
+        """
+        with self._lock:
+            segments = self._segments()
+            if not segments:
+                return [], None, 0, False
+            names = [s.name for s in segments]
+            segment, offset = self._read_cursor()
+            if segment not in names:
+                # cursor ausente ou segmento já descartado pelo limite de tamanho
+                segment, offset = names[0], 0
+            path = self.directory / segment
+            i = names.index(segment)
+
+            if offset >= path.stat().st_size:
+                if i + 1 == len(names):
+                    return [], segment, offset, False
+                # segmento consumido e fechado: apaga e segue para o próximo
+                path.unlink()
+                self._write_cursor(names[i + 1], 0)
+                return [], names[i + 1], 0, True
+
+            docs = []
+            start = offset
+            with open(path, "rb") as f:
+                f.seek(offset)
+                while len(docs) < self.batch_size:
+                    line = f.readline()
+                    if not line.endswith(b"\n"):
+                        break  # linha incompleta: escrita em andamento ou interrompida
+                    offset += len(line)
+                    try:
+                        docs.append(json_util.loads(line))
+                    except Exception:
+                        self.corrupted += 1
+            if offset == start and i + 1 < len(names):
+                # resto de linha de um segmento fechado (queda no meio da escrita)
+                self.corrupted += 1
+                path.unlink()
+                self._write_cursor(names[i + 1], 0)
+                return [], names[i + 1], 0, True
+            return docs, segment, offset, offset > start
+
+    def _commit(self, segment: str, offset: int):
+        with self._lock:
+            self._write_cursor(segment, offset)
+
+    @staticmethod
+    def _ja_gravados_query(docs: list[dict]) -> dict:
+        """`_id` do lote já presentes; o intervalo de `timestamp` restringe os buckets lidos"""
+        query = {"_id": {"$in": [doc["_id"] for doc in docs]}}
+        timestamps = [doc["timestamp"] for doc in docs if doc.get("timestamp") is not None]
+        if len(timestamps) == len(docs):
+            query["timestamp"] = {"$gte": min(timestamps), "$lte": max(timestamps)}
+        return query
+
+    async def _insert(self, docs: list[dict]):
+        sync = get_collection(app_settings.LOG_COLLECTION) if self.collection is None else None
+        try:
+            if app_settings.LOG_TIMESERIES:
+                # sem índice único em `_id`: descarta o que um envio anterior já gravou
+                query = self._ja_gravados_query(docs)
+                if sync is None:
+                    gravados = {doc["_id"] async for doc in self.collection.find(query, {"_id": 1})}
+                else:
+                    gravados = await asyncio.to_thread(lambda: {doc["_id"] for doc in sync.find(query, {"_id": 1})})
+                docs = [doc for doc in docs if doc["_id"] not in gravados]
+                if not docs:
+                    return
+            if sync is None:
+                await self.collection.insert_many(docs, ordered=False)
+            else:
+                await asyncio.to_thread(sync.insert_many, docs, ordered=False)
+        except BulkWriteError as e:
+            outros = [err for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY]
+            if outros:
+                raise
+
+    async def replay(self) -> int:
+        """Reenvia o journal até esvaziá-lo ou o banco falhar. Retorna quantos foram gravados."""
+        total = 0
+        while True:
+            docs, segment, offset, avancou = await asyncio.to_thread(self._read_batch)
+            if not avancou:
+                return total
+            if docs:
+                try:
+                    await self._insert(docs)
+                except Exception as e:
+                    print(f"❌ Replay do journal de logs interrompido: {e}")
+                    return total
+            await asyncio.to_thread(self._commit, segment, offset)
+            self.replayed += len(docs)
+            total += len(docs)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.replay_interval)
+            except asyncio.TimeoutError:
+                pass
+            if not self._stopping:
+                try:
+                    await self.replay()
+                except Exception as e:
+                    # erro de disco ao ler o segmento ou gravar o cursor: tenta de novo no próximo ciclo
+                    print(f"❌ Erro no replay do journal de logs: {e}")
+
+    async def start(self, collection=None) -> bool:
+        if self.running:
+            return True
+        self.collection = collection if collection is not None else get_async_collection(app_settings.LOG_COLLECTION)
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        return True
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+
+
+log_journal = LogJournal()
@@ -0,0 +1,36 @@
+"""Amostragem de logs de sucesso.
+
+A política vem de `config/settings.py`: taxa por endpoint, por
+`resultado_consumo` e uma taxa padrão. Erros (resultado fora dos de sucesso ou
+status >= 400) são sempre mantidos. Cada documento mantido grava
+`sample_weight` = 1 / taxa, para que contagens possam ser reconstruídas
+somando os pesos.
+"""
+import random
+
+from config.settings import settings as app_settings
+from services.log_writer import is_success
+
+
+def sample_rate(path: str, resultado_consumo: str, status_code: int | None = None) -> float:
+    if not is_success({"resultado_consumo": resultado_consumo}) or (status_code or 0) >= 400:
+        return 1.0
+
+    rates = [
+        rate for rate in (
+            app_settings.LOG_SAMPLE_RATES_ENDPOINT.get(path),
+            app_settings.LOG_SAMPLE_RATES_RESULTADO.get(resultado_consumo),
+        ) if rate is not None
+    ]
+    rate = min(rates) if rates else app_settings.LOG_SAMPLE_DEFAULT_RATE
+    return max(0.0, min(1.0, float(rate)))
+
+
+def sample(path: str, resultado_consumo: str, status_code: int | None = None) -> float | None:
+    """Decide se o log é mantido. Retorna o peso do documento ou None se descartado."""
+    rate = sample_rate(path, resultado_consumo, status_code)
+    if rate >= 1.0:
+        return 1.0
+    if rate <= 0.0 or random.random() >= rate:
+        return None
+    return 1.0 / rate
@@ -1,66 +1,175 @@
 from connection import get_collection
-from datetime import datetime
+from datetime import datetime, timezone
+import re
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from config.settings import settings as app_settings
+from services.cursor import encode_cursor, decode_cursor
+from services.erros import ValidationError
+from services.log_export import EXPORT_SORT, export_projection
+
+LOG_SORT = [("timestamp", DESCENDING), ("_id", DESCENDING)]
+
+
+def log_indexes() -> list:
+    """Índices que atendem às consultas de `/logs`: ordenação por (timestamp, _id)
+    com e sem os filtros de igualdade, mais o TTL em `timestamp`. Um prefixo de
+    endpoint (`/questoes*`) usa o índice só para o filtro; a ordenação é em memória.
+
+    Coleções time-series não aceitam índice TTL (a expiração é uma opção da
+    coleção) nem índices secundários com `_id`.
+    """
+    sort_keys = [("timestamp", DESCENDING)] if app_settings.LOG_TIMESERIES else LOG_SORT
+    indexes = [
+        IndexModel(sort_keys, name="timestamp_id"),
+        IndexModel([("origem_consumo", ASCENDING)] + sort_keys, name="origem_timestamp_id"),
+        IndexModel([("resultado_consumo", ASCENDING)] + sort_keys, name="resultado_timestamp_id"),
+        IndexModel([("endpoint", ASCENDING)] + sort_keys, name="endpoint_timestamp_id"),
+    ]
+    if app_settings.LOG_TTL_DAYS > 0 and not app_settings.LOG_TIMESERIES:
+        indexes.append(IndexModel([("timestamp", ASCENDING)], name="timestamp_ttl", expireAfterSeconds=app_settings.LOG_TTL_DAYS * 86400))
+    return indexes
+
+
+def timeseries_options() -> dict:
+    """Opções de `create_collection` para LOGS como coleção time-series."""
+    options = {"timeseries": {"timeField": "timestamp", "metaField": "origem_consumo", "granularity": "seconds"}}
+    if app_settings.LOG_TTL_DAYS > 0:
+        options["expireAfterSeconds"] = app_settings.LOG_TTL_DAYS * 86400
+    return options
+
+
+def _timestamp_value(value: datetime) -> datetime:
+    """Normaliza um datetime do filtro para UTC (datetimes sem fuso já são UTC)."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def build_log_query(origem: str | None = None, resultado: str | None = None, endpoint: str | None = None, inicio: datetime | None = None, fim: datetime | None = None, cursor: str | None = None) -> dict:
+    """Monta o filtro de logs; `endpoint` é exato (ou prefixo, terminado em `*`) e `cursor` a posição keyset."""
+    query = {}
+
+    if origem:
+        query["origem_consumo"] = origem
+
+    if resultado:
+        query["resultado_consumo"] = resultado
+
+    if endpoint and endpoint.endswith("*"):
+        # prefixo ancorado: o índice limita o intervalo, mas não entrega a ordenação
+        query["endpoint"] = {"$regex": f"^{re.escape(endpoint[:-1])}"}
+    elif endpoint:
+        query["endpoint"] = endpoint
+
+    if inicio or fim:
+        query["timestamp"] = {}
+        if inicio:
+            query["timestamp"]["$gte"] = _timestamp_value(inicio)
+        if fim:
+            query["timestamp"]["$lt"] = _timestamp_value(fim)
+
+    if cursor:
+        posicao = decode_cursor(cursor)
+        ts, last_id = posicao.get("ts"), posicao.get("id")
+        if not isinstance(last_id, ObjectId):
+            raise ValidationError("Cursor inválido")
+        query["$or"] = [
+            {"timestamp": {"$lt": ts}},
+            {"timestamp": ts, "_id": {"$lt": last_id}},
+        ]
+
+    return query
+
+
+def next_log_cursor(raw_logs: list, limite: int) -> str | None:
+    """Cursor para a próxima página, a partir dos documentos ainda com `_id`."""
+    if not raw_logs or len(raw_logs) < limite:
+        return None
+    last = raw_logs[-1]
+    return encode_cursor({"ts": last.get("timestamp"), "id": last["_id"]})
+
+
+def build_log_document(origem_consumo: str, resultado_consumo: str, endpoint: str | None = None, detalhes=None, sample_weight: float = 1.0) -> dict:
+    """Documento de log com `_id` gerado no cliente (idempotente no replay do journal).
+
+    `sample_weight` é quantos eventos o documento representa (1 / taxa de amostragem).
+    """
+    return {
+        "_id": ObjectId(),
+        "origem_consumo": origem_consumo,
+        "resultado_consumo": resultado_consumo,
+        "endpoint": endpoint,
+        "detalhes": detalhes,
+        "timestamp": datetime.now(timezone.utc),
+        "sample_weight": sample_weight,
+    }
+
+
+def serialize_log(log: dict) -> dict:
+    """Troca `_id` por `id`; o `timestamp` segue como datetime até a resposta."""
+    log["id"] = str(log["_id"]) if "_id" in log else log.get("id")
+    if "_id" in log:
+        del log["_id"]
+    return log
+
 
 class LogService:
     def __init__(self):
         self.collection = get_collection(app_settings.LOG_COLLECTION)
 
+    def ensure_collection(self):
+        """Cria LOGS como time-series quando habilitado e a coleção ainda não existe"""
+        if not app_settings.LOG_TIMESERIES:
+            return False
+        try:
+            database = self.collection.database
+            if self.collection.name in database.list_collection_names():
+                return False
+            database.create_collection(self.collection.name, **timeseries_options())
+            return True
+        except Exception as e:
+            print(f"❌ Erro ao criar coleção time-series de logs: {e}")
+            return False
+
     def log_consumo(self, origem_consumo: str, resultado_consumo: str, endpoint: str = None, detalhes: str = None):
         """Registra o consumo da API"""
         try:
-            now_iso = datetime.utcnow().isoformat() + "Z"
-            log_data = {
-                "origem_consumo": origem_consumo,
-                "resultado_consumo": resultado_consumo,
-                "endpoint": endpoint,
-                "detalhes": detalhes,
-                "timestamp": now_iso
-            }
-            
+            log_data = build_log_document(origem_consumo, resultado_consumo, endpoint, detalhes)
             result = self.collection.insert_one(log_data)
             return str(result.inserted_id)
-            
+
         except Exception as e:
             print(f"❌ Erro ao registrar log: {e}")
             return None
-    
-    def buscar_logs(self, limite: int = 100):
-        """Busca os logs mais recentes"""
+
+    def buscar_logs_pagina(self, limite: int = 100, skip: int = 0, cursor: str | None = None, **filtros) -> dict:
+        """Busca logs filtrados no MongoDB.
+
+        Com `cursor` a paginação é keyset em (timestamp, _id) e `skip` é ignorado.
+        Retorna { 'data': list, 'next_cursor': str | None }.
+        """
+        query = build_log_query(cursor=cursor, **filtros)
         try:
-            logs = list(self.collection.find().sort("timestamp", -1).limit(limite))
-            for log in logs:
-                log["id"] = str(log["_id"]) if "_id" in log else log.get("id")
-                if "_id" in log:
-                    del log["_id"]
-                if "timestamp" in log and not isinstance(log["timestamp"], str):
-                    try:
-                        log["timestamp"] = log["timestamp"].isoformat() + "Z"
-                    except Exception:
-                        log["timestamp"] = str(log["timestamp"])
-            return logs
+            find = self.collection.find(query).sort(LOG_SORT)
+            if skip and not cursor:
+                find = find.skip(skip)
+            logs = list(find.limit(limite))
+            next_cursor = next_log_cursor(logs, limite)
+            return {"data": [serialize_log(log) for log in logs], "next_cursor": next_cursor}
         except Exception as e:
             print(f"❌ Erro ao buscar logs: {e}")
-            return []
-    
+            return {"data": [], "next_cursor": None}
+
+    def cursor_exportacao(self, campos: list[str], **filtros):
+        """Cursor ordenado por (timestamp, _id) para a exportação em streaming"""
+        query = build_log_query(**filtros)
+        return self.collection.find(query, export_projection(campos)).sort(EXPORT_SORT).batch_size(app_settings.LOG_EXPORT_BATCH_SIZE)
+
+    def buscar_logs(self, limite: int = 100, skip: int = 0, **filtros):
+        """Busca os logs mais recentes"""
+        return self.buscar_logs_pagina(limite=limite, skip=skip, **filtros)["data"]
+
     def buscar_logs_por_origem(self, origem: str, limite: int = 50):
         """Busca logs por origem específica"""
-        try:
-            logs = list(
-                self.collection.find({"origem_consumo": origem})
-                .sort("timestamp", -1)
-                .limit(limite)
-            )
-            for log in logs:
-                log["id"] = str(log["_id"]) if "_id" in log else log.get("id")
-                if "_id" in log:
-                    del log["_id"]
-                if "timestamp" in log and not isinstance(log["timestamp"], str):
-                    try:
-                        log["timestamp"] = log["timestamp"].isoformat() + "Z"
-                    except Exception:
-                        log["timestamp"] = str(log["timestamp"])
-            return logs
-        except Exception as e:
-            print(f"❌ Erro ao buscar logs por origem: {e}")
-            return []
\ No newline at end of file
+        return self.buscar_logs(limite=limite, origem=origem)
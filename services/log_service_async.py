@@ -1,44 +1,73 @@
+import asyncio
 from connection import get_async_collection
-from datetime import datetime
 from config.settings import settings as app_settings
+from services.log_writer import log_writer
+from services.log_journal import log_journal
+from services.log_export import EXPORT_SORT, export_projection
+from services.log_service import LOG_SORT, timeseries_options, build_log_document, build_log_query, next_log_cursor, serialize_log
 
 
 class LogServiceAsync:
     def __init__(self):
         self.collection = get_async_collection(app_settings.LOG_COLLECTION)
 
-    async def log_consumo(self, origem_consumo: str, resultado_consumo: str, endpoint: str = None, detalhes: dict | None = None):
-        """Registra o consumo da API de forma assíncrona"""
-        if self.collection is None:
-            return None
+    async def ensure_collection(self):
+        """Cria LOGS como time-series quando habilitado e a coleção ainda não existe"""
+        if self.collection is None or not app_settings.LOG_TIMESERIES:
+            return False
+        try:
+            database = self.collection.database
+            if self.collection.name in await database.list_collection_names():
+                return False
+            await database.create_collection(self.collection.name, **timeseries_options())
+            return True
+        except Exception as e:
+            print(f"❌ Erro ao criar coleção time-series de logs async: {e}")
+            return False
+
+    async def log_consumo(self, origem_consumo: str, resultado_consumo: str, endpoint: str = None, detalhes: dict | None = None, sample_weight: float = 1.0):
+        """Registra o consumo da API de forma assíncrona.
+
+        Com o escritor em lote ativo o evento é apenas enfileirado; o `_id` é
+        gerado aqui para que o retorno continue sendo o id do documento. Sem
+        Motor, com o banco fora do ar ou acima de `LOG_DB_TIMEOUT_S`, o evento
+        vai para o journal local e é reenviado depois.
+        """
+        detalhes_json = detalhes if isinstance(detalhes, dict) else {"raw": str(detalhes)}
+        log_data = build_log_document(origem_consumo, resultado_consumo, endpoint, detalhes_json, sample_weight)
         try:
-            now_iso = datetime.utcnow().isoformat() + "Z"
-            detalhes_json = detalhes if isinstance(detalhes, dict) else {"raw": str(detalhes)}
-            log_data = {
-                "origem_consumo": origem_consumo,
-                "resultado_consumo": resultado_consumo,
-                "endpoint": endpoint,
-                "detalhes": detalhes_json,
-                "timestamp": now_iso
-            }
-            result = await self.collection.insert_one(log_data)
+            if self.collection is None:
+                raise RuntimeError("Motor indisponível")
+            if log_writer.running:
+                return str(log_data["_id"]) if log_writer.enqueue(log_data) else None
+            result = await asyncio.wait_for(self.collection.insert_one(log_data), timeout=app_settings.LOG_DB_TIMEOUT_S)
             return str(result.inserted_id)
         except Exception as e:
-            print(f"❌ Erro ao registrar log async: {e}")
+            print(f"❌ Erro ao registrar log async: {e!r}")
+            if app_settings.LOG_JOURNAL_ENABLED and await log_journal.append_async([log_data]):
+                return str(log_data["_id"])
             return None
 
-    async def buscar_logs(self, limite: int = 100, skip: int = 0):
+    async def buscar_logs_pagina(self, limite: int = 100, skip: int = 0, cursor: str | None = None, **filtros) -> dict:
+        """Busca logs filtrados no MongoDB (keyset em (timestamp, _id) quando há `cursor`)"""
         if self.collection is None:
-            return []
+            return {"data": [], "next_cursor": None}
+        query = build_log_query(cursor=cursor, **filtros)
         try:
-            cursor = self.collection.find().sort("timestamp", -1).skip(skip).limit(limite)
-            items = []
-            async for doc in cursor:
-                doc["id"] = str(doc["_id"]) if "_id" in doc else doc.get("id")
-                if "_id" in doc:
-                    del doc["_id"]
-                items.append(doc)
-            return items
+            find = self.collection.find(query).sort(LOG_SORT)
+            if skip and not cursor:
+                find = find.skip(skip)
+            logs = await find.limit(limite).to_list(length=limite)
+            next_cursor = next_log_cursor(logs, limite)
+            return {"data": [serialize_log(doc) for doc in logs], "next_cursor": next_cursor}
         except Exception as e:
             print(f"❌ Erro ao buscar logs async: {e}")
-            return []
+            return {"data": [], "next_cursor": None}
+
+    def cursor_exportacao(self, campos: list[str], **filtros):
+        """Cursor Motor ordenado por (timestamp, _id) para a exportação em streaming"""
+        query = build_log_query(**filtros)
+        return self.collection.find(query, export_projection(campos)).sort(EXPORT_SORT).batch_size(app_settings.LOG_EXPORT_BATCH_SIZE)
+
+    async def buscar_logs(self, limite: int = 100, skip: int = 0, **filtros):
+        return (await self.buscar_logs_pagina(limite=limite, skip=skip, **filtros))["data"]
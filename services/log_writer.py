@@ -0,0 +1,189 @@
+"""Escritor de logs em lote (em processo).
+
+Os eventos são enfileirados em memória e gravados com `insert_many` quando o
+lote atinge `LOG_BATCH_SIZE` ou a cada `LOG_FLUSH_INTERVAL_S` segundos.
+
+Política de estouro da fila (`LOG_OVERFLOW_POLICY`):
+- drop_success: descarta logs de sucesso; um log de erro que chega com a fila
+  cheia expulsa o log de sucesso mais antigo.
+- drop_oldest: descarta o evento mais antigo da fila (de sucesso ou de erro)
+  para abrir espaço ao novo.
+- drop_new: descarta qualquer evento que chegue com a fila cheia.
+
+Qualquer outro valor é rejeitado na criação do escritor (no import).
+
+Lotes que falham ou passam de `LOG_DB_TIMEOUT_S` vão para o journal local
+(`services/log_journal.py`); depois de uma falha, os lotes seguintes vão
+direto para o journal por `LOG_DB_RETRY_S` segundos.
+"""
+import asyncio
+import time
+from collections import deque
+
+from pymongo.errors import BulkWriteError
+
+from connection import get_async_collection
+from config.settings import settings as app_settings
+from services.log_journal import log_journal
+
+DUPLICATE_KEY = 11000
+
+RESULTADOS_SUCESSO = {"sucesso", "preflight"}
+
+OVERFLOW_POLICIES = ("drop_success", "drop_oldest", "drop_new")
+
+
+def is_success(log_data: dict) -> bool:
+    return log_data.get("resultado_consumo") in RESULTADOS_SUCESSO
+
+
+class LogBatchWriter:
+    def __init__(self, maxsize: int | None = None, batch_size: int | None = None, flush_interval: float | None = None, overflow_policy: str | None = None):
+        self.maxsize = maxsize or app_settings.LOG_QUEUE_MAXSIZE
+        self.batch_size = batch_size or app_settings.LOG_BATCH_SIZE
+        self.flush_interval = flush_interval or app_settings.LOG_FLUSH_INTERVAL_S
+        self.overflow_policy = overflow_policy or app_settings.LOG_OVERFLOW_POLICY
+        if self.overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"LOG_OVERFLOW_POLICY inválida: {self.overflow_policy!r} (use {', '.join(OVERFLOW_POLICIES)})")
+        self.collection = None
+
+        # erros e sucessos em filas separadas para que o descarte seja O(1)
+        self._erros: deque = deque()
+        self._sucessos: deque = deque()
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self._db_indisponivel_ate = 0.0
+
+        self.queued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.spilled = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self) -> int:
+        return len(self._erros) + len(self._sucessos)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "pending": self.pending,
+            "queued": self.queued,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "spilled": self.spilled,
+        }
+
+    def enqueue(self, log_data: dict) -> bool:
+        """Enfileira um evento. Retorna False se ele foi descartado."""
+        if self.pending >= self.maxsize and not self._make_room(log_data):
+            self.dropped += 1
+            return False
+
+        (self._sucessos if is_success(log_data) else self._erros).append(log_data)
+        self.queued += 1
+        if self.pending >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def _make_room(self, log_data: dict) -> bool:
+        if self.overflow_policy == "drop_success" and not is_success(log_data) and self._sucessos:
+            self._sucessos.popleft()
+            self.dropped += 1
+            return True
+        if self.overflow_policy == "drop_oldest" and self.pending:
+            self._mais_antiga().popleft()
+            self.dropped += 1
+            return True
+        return False
+
+    def _mais_antiga(self) -> deque:
+        """Fila cujo primeiro evento é o mais antigo (pelo `timestamp` do log)"""
+        if not self._erros or not self._sucessos:
+            return self._erros or self._sucessos
+        try:
+            return self._erros if self._erros[0]["timestamp"] <= self._sucessos[0]["timestamp"] else self._sucessos
+        except (KeyError, TypeError):
+            return self._sucessos
+
+    def _take(self, n: int) -> list:
+        batch = []
+        while self._erros and len(batch) < n:
+            batch.append(self._erros.popleft())
+        while self._sucessos and len(batch) < n:
+            batch.append(self._sucessos.popleft())
+        return batch
+
+    async def _spill(self, batch: list):
+        if not app_settings.LOG_JOURNAL_ENABLED:
+            self.failed += len(batch)
+            return
+        gravados = await log_journal.append_async(batch)
+        self.spilled += gravados
+        self.failed += len(batch) - gravados
+
+    async def _write(self, batch: list):
+        if time.monotonic() < self._db_indisponivel_ate:
+            await self._spill(batch)
+            return
+        try:
+            await asyncio.wait_for(self.collection.insert_many(batch, ordered=False), timeout=app_settings.LOG_DB_TIMEOUT_S)
+            self.flushed += len(batch)
+        except BulkWriteError as e:
+            erros = e.details.get("writeErrors", [])
+            # chave duplicada: o documento já foi gravado (ex.: reenvio após timeout)
+            falhas = [batch[err["index"]] for err in erros if err.get("code") != DUPLICATE_KEY]
+            self.flushed += len(batch) - len(falhas)
+            if falhas:
+                await self._spill(falhas)
+        except Exception as e:
+            # timeout ou banco indisponível; o lote pode ter sido gravado em parte,
+            # o replay do journal não regrava os `_id` que já estão no banco
+            self._db_indisponivel_ate = time.monotonic() + app_settings.LOG_DB_RETRY_S
+            print(f"❌ Erro ao gravar lote de logs, enviando ao journal: {e!r}")
+            await self._spill(batch)
+
+    async def flush(self):
+        """Grava tudo o que estiver pendente, em lotes de `batch_size`."""
+        while self.pending:
+            await self._write(self._take(self.batch_size))
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def start(self, collection=None) -> bool:
+        if self.running:
+            return True
+        self.collection = collection if collection is not None else get_async_collection(app_settings.LOG_COLLECTION)
+        if self.collection is None:
+            return False
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        return True
+
+    async def stop(self):
+        """Interrompe o laço de gravação e drena a fila."""
+        if self._task is not None:
+            # não cancela: um lote em gravação não pode ser perdido
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if self.collection is not None:
+            await self.flush()
+
+
+log_writer = LogBatchWriter()
@@ -0,0 +1,200 @@
+"""Métricas de requisições agregadas em memória.
+
+Cada requisição é somada a um rollup por (minuto, rota, método, status), com
+um histograma de latência em buckets fixos. Um laço em segundo plano grava os
+rollups com `$inc` na coleção `METRICS_COLLECTION`; `/logs/stats` lê esses
+agregados em vez de varrer LOGS.
+"""
+import asyncio
+from bisect import bisect_left
+from datetime import datetime, timezone
+
+from pymongo import ASCENDING, IndexModel, UpdateOne
+
+from connection import get_async_collection
+from config.settings import settings as app_settings
+
+# limites superiores (ms); o último bucket acumula o que passar de 5000 ms
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+BUCKET_NAMES = tuple(f"le_{b}" for b in LATENCY_BUCKETS_MS) + (f"gt_{LATENCY_BUCKETS_MS[-1]}",)
+
+METRICS_INDEXES = [
+    IndexModel([("minute", ASCENDING), ("route", ASCENDING), ("method", ASCENDING), ("status", ASCENDING)], name="minute_route_method_status", unique=True),
+    IndexModel([("route", ASCENDING), ("minute", ASCENDING)], name="route_minute"),
+]
+
+
+def _novo_rollup() -> dict:
+    return {"count": 0, "duration_ms_sum": 0.0, "duration_ms_max": 0.0, "buckets": [0] * len(BUCKET_NAMES)}
+
+
+def percentil(buckets: list, count: int, p: float, maximo: float) -> float | None:
+    """Estima o percentil pelo limite superior do bucket que o contém."""
+    if count <= 0:
+        return None
+    alvo = p * count
+    acumulado = 0
+    for i, n in enumerate(buckets):
+        acumulado += n
+        if acumulado >= alvo:
+            return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else maximo
+    return maximo
+
+
+class RequestMetrics:
+    def __init__(self, flush_interval: float | None = None):
+        self.flush_interval = flush_interval or app_settings.METRICS_FLUSH_INTERVAL_S
+        self.collection = None
+        self._rollups: dict[tuple, dict] = {}
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def record(self, route: str, method: str, status: int, duration_s: float):
+        minute = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        key = (minute, route, method, status)
+        rollup = self._rollups.get(key)
+        if rollup is None:
+            rollup = self._rollups[key] = _novo_rollup()
+
+        duration_ms = duration_s * 1000
+        rollup["count"] += 1
+        rollup["duration_ms_sum"] += duration_ms
+        rollup["duration_ms_max"] = max(rollup["duration_ms_max"], duration_ms)
+        rollup["buckets"][bisect_left(LATENCY_BUCKETS_MS, duration_ms)] += 1
+
+    def _merge_back(self, rollups: dict):
+        """Devolve rollups não gravados para a próxima tentativa."""
+        for key, antigo in rollups.items():
+            atual = self._rollups.setdefault(key, _novo_rollup())
+            atual["count"] += antigo["count"]
+            atual["duration_ms_sum"] += antigo["duration_ms_sum"]
+            atual["duration_ms_max"] = max(atual["duration_ms_max"], antigo["duration_ms_max"])
+            atual["buckets"] = [a + b for a, b in zip(atual["buckets"], antigo["buckets"])]
+
+    async def flush(self):
+        if not self._rollups or self.collection is None:
+            return
+        rollups, self._rollups = self._rollups, {}
+        ops = []
+        for (minute, route, method, status), rollup in rollups.items():
+            inc = {"count": rollup["count"], "duration_ms_sum": rollup["duration_ms_sum"]}
+            inc.update({f"buckets.{name}": n for name, n in zip(BUCKET_NAMES, rollup["buckets"]) if n})
+            ops.append(UpdateOne(
+                {"minute": minute, "route": route, "method": method, "status": status},
+                {"$inc": inc, "$max": {"duration_ms_max": rollup["duration_ms_max"]}},
+                upsert=True,
+            ))
+        try:
+            await self.collection.bulk_write(ops, ordered=False)
+        except Exception as e:
+            self._merge_back(rollups)
+            print(f"❌ Erro ao gravar métricas: {e}")
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def start(self, collection=None) -> bool:
+        if self.running:
+            return True
+        self.collection = collection if collection is not None else get_async_collection(app_settings.METRICS_COLLECTION)
+        if self.collection is None:
+            return False
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        return True
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def buscar_stats(self, inicio: datetime | None = None, fim: datetime | None = None, route: str | None = None, por_minuto: bool = False) -> dict:
+        """Agrega os rollups gravados por rota/método, com percentis e taxa de erro."""
+        if self.collection is None:
+            self.collection = get_async_collection(app_settings.METRICS_COLLECTION)
+        if self.collection is None:
+            return {"routes": [], "series": []}
+
+        match = {}
+        if inicio or fim:
+            match["minute"] = {}
+            if inicio:
+                match["minute"]["$gte"] = inicio
+            if fim:
+                match["minute"]["$lt"] = fim
+        if route:
+            match["route"] = route
+
+        soma_buckets = {name: {"$sum": f"$buckets.{name}"} for name in BUCKET_NAMES}
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {"route": "$route", "method": "$method", "status": "$status"},
+                "count": {"$sum": "$count"},
+                "duration_ms_sum": {"$sum": "$duration_ms_sum"},
+                "duration_ms_max": {"$max": "$duration_ms_max"},
+                **soma_buckets,
+            }},
+        ]
+
+        rotas: dict[tuple, dict] = {}
+        async for row in self.collection.aggregate(pipeline):
+            key = (row["_id"]["route"], row["_id"]["method"])
+            status = row["_id"]["status"]
+            rota = rotas.setdefault(key, {"route": key[0], "method": key[1], "count": 0, "errors_4xx": 0, "errors_5xx": 0, "duration_ms_sum": 0.0, "duration_ms_max": 0.0, "buckets": [0] * len(BUCKET_NAMES), "by_status": {}})
+            rota["count"] += row["count"]
+            rota["duration_ms_sum"] += row["duration_ms_sum"]
+            rota["duration_ms_max"] = max(rota["duration_ms_max"], row["duration_ms_max"] or 0.0)
+            rota["buckets"] = [a + (row.get(name) or 0) for a, name in zip(rota["buckets"], BUCKET_NAMES)]
+            rota["by_status"][str(status)] = rota["by_status"].get(str(status), 0) + row["count"]
+            if 400 <= status < 500:
+                rota["errors_4xx"] += row["count"]
+            elif status >= 500:
+                rota["errors_5xx"] += row["count"]
+
+        routes = []
+        for rota in rotas.values():
+            count = rota["count"]
+            buckets = rota.pop("buckets")
+            duration_sum = rota.pop("duration_ms_sum")
+            rota["error_rate"] = round(rota["errors_5xx"] / count, 4) if count else 0.0
+            rota["avg_ms"] = round(duration_sum / count, 3) if count else None
+            rota["p50_ms"] = percentil(buckets, count, 0.50, rota["duration_ms_max"])
+            rota["p95_ms"] = percentil(buckets, count, 0.95, rota["duration_ms_max"])
+            rota["p99_ms"] = percentil(buckets, count, 0.99, rota["duration_ms_max"])
+            rota["histogram"] = dict(zip(BUCKET_NAMES, buckets))
+            routes.append(rota)
+        routes.sort(key=lambda r: r["count"], reverse=True)
+
+        series = []
+        if por_minuto:
+            serie_pipeline = [
+                {"$match": match},
+                {"$group": {
+                    "_id": "$minute",
+                    "count": {"$sum": "$count"},
+                    "errors_5xx": {"$sum": {"$cond": [{"$gte": ["$status", 500]}, "$count", 0]}},
+                }},
+                {"$sort": {"_id": 1}},
+            ]
+            async for row in self.collection.aggregate(serie_pipeline):
+                series.append({"minute": row["_id"], "count": row["count"], "errors_5xx": row["errors_5xx"]})
+
+        return {"routes": routes, "series": series}
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,71 @@
+"""Verificação de senhas (bcrypt) fora do event loop.
+
+`bcrypt.checkpw` leva ~250 ms no custo 12 e libera o GIL, então roda em um
+executor dedicado de `BCRYPT_MAX_WORKERS` threads. No máximo
+`BCRYPT_MAX_PENDING` verificações podem estar em execução ou na fila; acima
+disso a chamada falha na hora com `OverloadedError` (429 na API), para que um
+pico de logins não atrase as demais rotas.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import settings as app_settings
+from services.auth_service import verify_password
+from services.erros import OverloadedError
+
+
+class PasswordVerifier:
+    def __init__(self, max_workers: int | None = None, max_pending: int | None = None):
+        self.max_workers = max_workers or app_settings.BCRYPT_MAX_WORKERS
+        self.max_pending = max_pending or app_settings.BCRYPT_MAX_PENDING
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+
+        self.verified = 0
+        self.rejected = 0
+        self.wait_ms_sum = 0.0
+        self.wait_ms_max = 0.0
+        self.run_ms_sum = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "verified": self.verified,
+            "rejected": self.rejected,
+            "wait_ms_avg": round(self.wait_ms_sum / self.verified, 3) if self.verified else None,
+            "wait_ms_max": round(self.wait_ms_max, 3),
+            "run_ms_avg": round(self.run_ms_sum / self.verified, 3) if self.verified else None,
+        }
+
+    @staticmethod
+    def _run(plain_password: str, hashed_password: str, enqueued_at: float) -> tuple[bool, float, float]:
+        started_at = time.perf_counter()
+        ok = verify_password(plain_password, hashed_password)
+        return ok, started_at - enqueued_at, time.perf_counter() - started_at
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise OverloadedError("Muitas tentativas de login simultâneas, tente novamente")
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            ok, wait_s, run_s = await loop.run_in_executor(self._executor, self._run, plain_password, hashed_password, time.perf_counter())
+        finally:
+            self._pending -= 1
+
+        self.verified += 1
+        self.wait_ms_sum += wait_s * 1000
+        self.wait_ms_max = max(self.wait_ms_max, wait_s * 1000)
+        self.run_ms_sum += run_s * 1000
+        return ok
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_verifier = PasswordVerifier()
@@ -0,0 +1,297 @@
+"""Catálogo de questões em memória (por processo).
+
+QUESTOES é lida quase só para consulta, então o catálogo carrega todas as
+questões uma vez, já serializadas, e mantém índices por `(disciplina, ano)`
+e por `codigo`, mais um índice invertido do enunciado (`services/busca.py`).
+Listagem, busca por id, busca textual e contagens saem da memória.
+
+Atualização incremental:
+- change stream (replica set/Atlas) em QUESTOES e no documento de versão em
+  `CATALOGO_COLLECTION`, aplicando cada mudança assim que chega;
+- sem change stream, a cada `QUESTOES_CATALOG_POLL_S` lê a versão do
+  catálogo (incrementada a cada escrita em QUESTOES) e, se mudou, busca só os
+  documentos com `updated_at` a partir do último visto e compara os `_id`s do
+  banco com os da memória para descartar as questões removidas.
+
+Só `updated_at` datetime conta para a sincronização; valores em string (ainda
+não migrados por `scripts/migrate_timestamps.py`) entram na carga completa.
+"""
+import asyncio
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+
+from bson import ObjectId
+
+from connection import get_async_collection, get_collection
+from config.settings import settings as app_settings
+from services.cursor import encode_cursor
+from services.busca import IndiceInvertido
+from services.serializacao import dumps, recortar_questao
+from services.questao_service import CATALOGO_QUESTOES_ID, QuestaoServiceBase, shuffle_cache
+
+
+class QuestaoCatalog(QuestaoServiceBase):
+    def __init__(self, poll_interval: float | None = None):
+        self.poll_interval = poll_interval or app_settings.QUESTOES_CATALOG_POLL_S
+        self.collection = None
+        self.catalogo = None
+        self.version = 0
+        self.modo = None
+        self._questoes: dict[str, dict] = {}
+        # mesma questão já codificada em JSON, para respostas sem serializar de novo
+        self._json: dict[str, bytes] = {}
+        # (disciplina|None, ano|None) -> ids ordenados; None funciona como "qualquer"
+        self._por_filtro: dict[tuple, list[str]] = {}
+        self._por_codigo: dict[str, list[str]] = {}
+        self._indice = IndiceInvertido()
+        self._ultimo_updated_at = None
+        # muda a cada inserção/remoção; entra na chave das ordens de shuffle em cache
+        self._revisao = 0
+        self._ready = False
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def stats(self) -> dict:
+        return {"ready": self._ready, "running": self.running, "mode": self.modo, "version": self.version, "questoes": len(self._questoes)}
+
+    # índices ------------------------------------------------------------------
+
+    def _chaves(self, questao: dict) -> list[tuple]:
+        disc, ano = questao.get("disciplina"), questao.get("ano")
+        return [(disc, ano), (disc, None), (None, ano), (None, None)]
+
+    def _remover(self, questao_id: str):
+        antiga = self._questoes.pop(questao_id, None)
+        if antiga is None:
+            return
+        self._json.pop(questao_id, None)
+        self._indice.remover(questao_id)
+        self._revisao += 1
+        for chave in self._chaves(antiga):
+            ids = self._por_filtro.get(chave, [])
+            i = bisect_left(ids, questao_id)
+            if i < len(ids) and ids[i] == questao_id:
+                ids.pop(i)
+        ids = self._por_codigo.get(antiga.get("codigo"), [])
+        if questao_id in ids:
+            ids.remove(questao_id)
+
+    def _aplicar(self, doc: dict):
+        """Insere ou substitui uma questão a partir do documento do MongoDB"""
+        updated_at = doc.get("updated_at")
+        if isinstance(updated_at, datetime) and (self._ultimo_updated_at is None or updated_at > self._ultimo_updated_at):
+            self._ultimo_updated_at = updated_at
+        questao = self._normalize_and_serialize(doc)
+        questao_id = questao["id"]
+        self._remover(questao_id)
+        self._questoes[questao_id] = questao
+        self._json[questao_id] = dumps(questao)
+        self._indice.adicionar(questao_id, (questao.get("questao") or {}).get("enunciado"))
+        self._revisao += 1
+        for chave in self._chaves(questao):
+            insort(self._por_filtro.setdefault(chave, []), questao_id)
+        self._por_codigo.setdefault(questao.get("codigo"), []).append(questao_id)
+
+    # consultas ----------------------------------------------------------------
+
+    def buscar_questao_por_id(self, questao_id: str, campos: frozenset | None = None) -> dict | None:
+        questao = self._questoes.get(questao_id)
+        if questao is None or campos is None:
+            return questao
+        return recortar_questao(questao, campos)
+
+    def json_de(self, questao: dict) -> bytes:
+        """Bytes JSON da questão; usa a versão pré-codificada quando ela veio inteira do catálogo"""
+        questao_id = questao.get("id")
+        if self._questoes.get(questao_id) is questao:
+            return self._json[questao_id]
+        return dumps(questao)
+
+    def buscar_por_codigo(self, codigo: str) -> list[dict]:
+        return [self._questoes[i] for i in self._por_codigo.get(codigo, [])]
+
+    def grupos_por_codigo(self, disciplina: str | None, ano: str | None) -> dict[str, list[str]]:
+        """Ids do filtro agrupados por `codigo`, para o sorteio de provas"""
+        grupos: dict[str, list[str]] = {}
+        for questao_id in self._por_filtro.get((disciplina, ano), []):
+            grupos.setdefault(self._questoes[questao_id].get("codigo"), []).append(questao_id)
+        return grupos
+
+    def contar(self, disciplina: str | None = None, ano: str | None = None) -> int:
+        return len(self._por_filtro.get((disciplina, ano), []))
+
+    def _recortar(self, questoes: list[dict], campos: frozenset | None) -> list[dict]:
+        return questoes if campos is None else [recortar_questao(q, campos) for q in questoes]
+
+    def _ordem_do_filtro(self, disciplina: str | None, ano: str | None, seed: int) -> list[tuple]:
+        key = ("catalog", id(self), self._revisao, disciplina, ano, seed)
+        ordem = shuffle_cache.get(key)
+        if ordem is None:
+            ordem = self._ordem_embaralhada(self._por_filtro.get((disciplina, ano), []), seed)
+            shuffle_cache.set(key, ordem)
+        return ordem
+
+    def listar_questoes_paginated(self, page: int, limit: int, disciplina: str | None = None, ano: str | None = None, shuffle: bool = False, seed: int | None = None, cursor: str | None = None, include_total: bool = True, campos: frozenset | None = None) -> dict:
+        """Mesmo contrato de QuestaoService.listar_questoes_paginated, servido da memória"""
+        posicao = self._posicao(cursor)
+        if page < 1:
+            return self._empty_page(page, limit)
+
+        if shuffle or (posicao and "apos" in posicao):
+            seed = posicao["seed"] if posicao else self._resolver_seed(seed)
+            ordem = self._ordem_do_filtro(disciplina, ano, seed)
+            pagina, has_next, next_cursor = self._fatia_embaralhada(ordem, page, limit, seed, posicao)
+            data = self._recortar([self._questoes[i] for i in pagina], campos)
+            return {**self._page(page, limit, len(ordem), data, has_next, posicao is not None or page > 1, next_cursor), "seed": seed}
+
+        ids = self._por_filtro.get((disciplina, ano), [])
+        # a contagem em memória é gratuita, então `include_total` não muda nada aqui
+        total = len(ids)
+        inicio = bisect_right(ids, str(posicao["id"])) if posicao else (page - 1) * limit
+        pagina = ids[inicio:inicio + limit]
+        has_next = inicio + limit < total
+        next_cursor = encode_cursor({"id": ObjectId(pagina[-1])}) if has_next else None
+        data = self._recortar([self._questoes[i] for i in pagina], campos)
+        return self._page(page, limit, total, data, has_next, posicao is not None or page > 1, next_cursor)
+
+    def buscar(self, q: str | None = None, codigo: str | None = None, disciplina: str | None = None, ano: str | None = None, page: int = 1, limit: int = 10, campos: frozenset | None = None) -> dict:
+        """Mesmo contrato de QuestaoService.buscar_questoes, servido do índice invertido"""
+        permitidos = set()
+        if codigo:
+            prefixo = codigo.upper()
+            permitidos = {i for c, ids in self._por_codigo.items() if c and c.startswith(prefixo) for i in ids}
+
+        def aceita(questao_id: str) -> bool:
+            questao = self._questoes[questao_id]
+            return (not disciplina or questao.get("disciplina") == disciplina) and (not ano or questao.get("ano") == ano) and (not codigo or questao_id in permitidos)
+
+        if q:
+            scores = self._indice.buscar(q)
+            ids = sorted((i for i in scores if aceita(i)), key=lambda i: (-scores[i], i))
+        else:
+            ids = sorted((i for i in permitidos if aceita(i)), key=lambda i: (self._questoes[i].get("codigo"), i))
+
+        inicio = (page - 1) * limit
+        data = self._recortar([self._questoes[i] for i in ids[inicio:inicio + limit]], campos)
+        return self._page(page, limit, len(ids), data, inicio + limit < len(ids), page > 1)
+
+    # carga e atualização ------------------------------------------------------
+
+    async def _find(self, query: dict, projection: dict | None = None) -> list[dict]:
+        if self.collection is not None:
+            return await self.collection.find(query, projection).to_list(length=None)
+        return await asyncio.to_thread(lambda: list(get_collection(app_settings.QUESTOES_COLLECTION).find(query, projection)))
+
+    async def _ler_versao(self) -> int:
+        if self.catalogo is not None:
+            doc = await self.catalogo.find_one({"_id": CATALOGO_QUESTOES_ID})
+        else:
+            doc = await asyncio.to_thread(get_collection(app_settings.CATALOGO_COLLECTION).find_one, {"_id": CATALOGO_QUESTOES_ID})
+        return (doc or {}).get("version", 0)
+
+    async def carregar(self):
+        """Carga completa: substitui o conteúdo atual do catálogo"""
+        version = await self._ler_versao()
+        docs = await self._find({})
+        self._questoes, self._json, self._por_filtro, self._por_codigo, self._ultimo_updated_at = {}, {}, {}, {}, None
+        self._indice = IndiceInvertido()
+        for doc in docs:
+            self._aplicar(doc)
+        self.version = version
+        self._ready = True
+
+    async def sincronizar(self, reconciliar: bool = False):
+        """Busca só as questões com `updated_at` a partir da última vista.
+
+        Com `reconciliar`, também descarta as que não existem mais no banco.
+        """
+        version = await self._ler_versao()
+        query = {"updated_at": {"$gte": self._ultimo_updated_at}} if self._ultimo_updated_at else {}
+        for doc in await self._find(query):
+            self._aplicar(doc)
+        if reconciliar:
+            existentes = {str(doc["_id"]) for doc in await self._find({}, {"_id": 1})}
+            for questao_id in set(self._questoes) - existentes:
+                self._remover(questao_id)
+        self.version = version
+
+    async def _watch(self):
+        database = self.collection.database
+        pipeline = [{"$match": {"ns.coll": {"$in": [self.collection.name, self.catalogo.name]}}}]
+        async with database.watch(pipeline, full_document="updateLookup", max_await_time_ms=1000) as stream:
+            # cobre o intervalo entre a carga inicial e a abertura do stream
+            await self.sincronizar()
+            self.modo = "change_stream"
+            while not self._stopping:
+                change = await stream.try_next()
+                if change is not None:
+                    self._aplicar_mudanca(change)
+
+    def _aplicar_mudanca(self, change: dict):
+        doc = change.get("fullDocument")
+        if change["ns"]["coll"] == self.catalogo.name:
+            if doc and doc.get("_id") == CATALOGO_QUESTOES_ID:
+                self.version = doc.get("version", self.version)
+            return
+        if change["operationType"] == "delete":
+            self._remover(str(change["documentKey"]["_id"]))
+        elif doc is not None:
+            self._aplicar(doc)
+
+    async def _poll(self):
+        self.modo = "polling"
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._stopping:
+                return
+            try:
+                if await self._ler_versao() != self.version:
+                    await self.sincronizar(reconciliar=True)
+            except Exception as e:
+                print(f"❌ Erro ao atualizar catálogo de questões: {e}")
+
+    async def _run(self):
+        if app_settings.QUESTOES_CATALOG_CHANGE_STREAM and self.collection is not None and self.catalogo is not None:
+            try:
+                await self._watch()
+                return
+            except Exception as e:
+                print(f"❌ Change stream indisponível para o catálogo de questões, usando polling: {e}")
+        await self._poll()
+
+    async def start(self) -> bool:
+        if self.running:
+            return True
+        self.collection = get_async_collection(app_settings.QUESTOES_COLLECTION)
+        self.catalogo = get_async_collection(app_settings.CATALOGO_COLLECTION)
+        try:
+            await self.carregar()
+        except Exception as e:
+            print(f"❌ Erro ao carregar catálogo de questões: {e}")
+            return False
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        return True
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+
+
+questao_catalog = QuestaoCatalog()
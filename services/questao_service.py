@@ -1,167 +1,491 @@
+import hashlib
+import random
+import re
+from bisect import bisect_right
+from operator import itemgetter
 from connection import get_collection
-from models.questao_model import QuestaoCreate
+from models.questao_model import ProvaCreate, QuestaoCreate
 from bson import ObjectId
 from datetime import datetime, timezone
+from pydantic import TypeAdapter, ValidationError as PydanticValidationError
+from pymongo import ASCENDING, TEXT, IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError
 from models.questao_model import QuestaoResponse
 from config.settings import settings as app_settings
-from services.erros import ServiceError
+from services.busca import tokens
+from services.erros import ServiceError, ValidationError
+from services.cache import TTLCache
+from services.cursor import encode_cursor, decode_cursor
+from services.serializacao import questao_confiavel, recortar_questao
 
 
-class QuestaoService:
+CATALOGO_QUESTOES_ID = "questoes"
+
+LOTE_ADAPTER = TypeAdapter(list[QuestaoCreate])
+
+QUESTAO_INDEXES = [
+    # listagem por filtro, paginada por _id (keyset) e o $group do sorteio de provas
+    IndexModel([("disciplina", ASCENDING), ("ano", ASCENDING), ("_id", ASCENDING)], name="disciplina_ano_id"),
+    IndexModel([("ano", ASCENDING), ("_id", ASCENDING)], name="ano_id"),
+    # upsert idempotente do lote; só ele grava o hash, as demais questões ficam fora do índice
+    IndexModel([("codigo", ASCENDING), ("enunciado_hash", ASCENDING)], name="codigo_enunciado_hash", unique=True, partialFilterExpression={"enunciado_hash": {"$exists": True}}),
+    IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+    # busca sem o catálogo em memória: texto do enunciado e prefixo de código
+    IndexModel([("questao.enunciado", TEXT)], name="enunciado_text", default_language="portuguese"),
+    IndexModel([("codigo", ASCENDING), ("_id", ASCENDING)], name="codigo_id"),
+]
+
+# campos aceitos em `fields`; `questao` equivale a todos os `questao.*`
+CAMPOS_QUESTAO = ("id", "disciplina", "ano", "codigo", "questao.enunciado", "questao.alternativas", "questao.gabarito", "questao.url", "created_at", "updated_at")
+
+
+def resolver_campos(fields: str | None, incluir_gabarito: bool = True) -> frozenset | None:
+    """Converte `fields` (separados por vírgula) no conjunto de campos de saída; None = documento completo"""
+    if not fields and incluir_gabarito:
+        return None
+    pedidos = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(CAMPOS_QUESTAO)
+    # o id sempre volta, para o cliente poder buscar a questão completa depois
+    campos = {"id"}
+    for campo in pedidos:
+        if campo == "questao":
+            campos.update(c for c in CAMPOS_QUESTAO if c.startswith("questao."))
+        elif campo in CAMPOS_QUESTAO:
+            campos.add(campo)
+        else:
+            raise ValidationError(f"Campo inválido em fields: {campo}")
+    if not incluir_gabarito:
+        campos.discard("questao.gabarito")
+    return frozenset(campos)
+
+
+# (origem, filtro, seed) -> [(chave, id)] na ordem embaralhada
+shuffle_cache = TTLCache(maxsize=app_settings.SHUFFLE_CACHE_MAXSIZE, ttl=app_settings.SHUFFLE_CACHE_TTL_S)
+
+
+class QuestaoServiceBase:
+    """Regras compartilhadas entre as versões síncrona e assíncrona"""
+
+    def _build_query(self, disc: str | None, ano: str | None) -> dict:
+        query = {}
+    
+        if disc:
+            query["disciplina"] = disc
+        
+        if ano:
+            query["ano"] = ano
+        
+        return query
+
+    def _calc_total_pages(self, total: int, lim: int) -> int:
+        return (total + lim - 1) // lim if total > 0 else 0
+
+    def _normalize_and_serialize(self, doc: dict) -> dict:
+        """Converte o documento do MongoDB; datas viram string ISO só no model_dump.
+
+        Com `TRUSTED_SERIALIZATION`, só projeta o documento no formato de saída, sem revalidar.
+        """
+        if app_settings.TRUSTED_SERIALIZATION:
+            return questao_confiavel(doc)
+        doc["id"] = str(doc.get("_id"))
+        if "_id" in doc:
+            del doc["_id"]
+
+        qr = QuestaoResponse.model_validate(doc)
+        return qr.model_dump(mode="json")
+
+    def _projecao(self, campos: frozenset | None) -> dict | None:
+        """Projeção do MongoDB para os campos pedidos (`_id` sempre vem)"""
+        if campos is None:
+            return None
+        return {campo: 1 for campo in campos if campo != "id"} or {"_id": 1}
+
+    def _serializar(self, doc: dict, campos: frozenset | None = None) -> dict:
+        """Documento completo ou recortado nos campos pedidos (projetado, não passa pelo QuestaoResponse)"""
+        if campos is None:
+            return self._normalize_and_serialize(doc)
+        return recortar_questao(questao_confiavel(doc), campos)
+
+    def _busca_query(self, q: str | None, codigo: str | None, disciplina: str | None, ano: str | None) -> dict:
+        query = self._build_query(disciplina, ano)
+        if q:
+            # cada termo entre aspas é obrigatório (AND), como no índice invertido do catálogo;
+            # sem aspas o $text faria OR. Os termos são os mesmos tokens do catálogo.
+            query["$text"] = {"$search": " ".join(f'"{t}"' for t in tokens(q))}
+        if codigo:
+            query["codigo"] = {"$regex": f"^{re.escape(codigo.upper())}"}
+        return query
+
+    def _busca_sort(self, q: str | None) -> list:
+        """Por relevância do índice de texto; só com código, na ordem dos códigos"""
+        if q:
+            return [("score", {"$meta": "textScore"}), ("_id", ASCENDING)]
+        return [("codigo", ASCENDING), ("_id", ASCENDING)]
+
+    def _object_ids(self, ids: list) -> list[ObjectId]:
+        """Ids válidos como ObjectId (os inválidos não existem no banco e ficam de fora)"""
+        return [ObjectId(i) for i in ids if ObjectId.is_valid(i)]
+
+    def _grupos_pipeline(self, query: dict, tamanho: int) -> list[dict]:
+        """Ids das questões do filtro agrupados por `codigo`.
+
+        Cada grupo guarda no máximo `QUESTOES_PROVA_GRUPO_MAX` ids (nunca menos que
+        o tamanho da prova, o máximo que um código pode fornecer), escolhidos ao
+        acaso com `$rand` + `$topN` (MongoDB 5.2+), sem ordenar a coleção.
+        """
+        limite = max(app_settings.QUESTOES_PROVA_GRUPO_MAX, tamanho)
+        return [
+            {"$match": query},
+            {"$project": {"codigo": 1, "sorteio": {"$rand": {}}}},
+            {"$group": {"_id": "$codigo", "ids": {"$topN": {"n": limite, "sortBy": {"sorteio": 1}, "output": "$_id"}}}},
+        ]
+
+    def _sortear_prova(self, grupos: dict, tamanho: int, cotas: dict | None, seed: int) -> list:
+        """Sorteia os ids da prova: primeiro as cotas por código, depois uma questão
+        por código a cada rodada, para equilibrar as habilidades. Determinístico por seed."""
+        cotas = cotas or {}
+        if sum(cotas.values()) > tamanho:
+            raise ValidationError("A soma das cotas excede o tamanho da prova")
+        rng = random.Random(seed)
+        pools = {codigo: rng.sample(sorted(ids), len(ids)) for codigo, ids in sorted(grupos.items(), key=lambda g: str(g[0]))}
+
+        escolhidos = []
+        for codigo, quantidade in cotas.items():
+            pool = pools.get(codigo, [])
+            if quantidade > len(pool):
+                raise ValidationError(f"Apenas {len(pool)} questões disponíveis para o código {codigo}")
+            escolhidos += pool[:quantidade]
+
+        restantes = [pools[c] for c in rng.sample(sorted(pools, key=str), len(pools)) if c not in cotas]
+        while len(escolhidos) < tamanho and any(restantes):
+            for pool in restantes:
+                if pool and len(escolhidos) < tamanho:
+                    escolhidos.append(pool.pop())
+        if len(escolhidos) < tamanho:
+            raise ValidationError(f"Apenas {len(escolhidos)} questões disponíveis para a prova")
+
+        rng.shuffle(escolhidos)
+        return escolhidos
+
+    def _nova_prova(self, dados: ProvaCreate, grupos: dict, email: str | None) -> dict:
+        seed = self._resolver_seed(dados.seed)
+        ids = self._sortear_prova(grupos, dados.tamanho, dados.cotas, seed)
+        now = datetime.now(timezone.utc)
+        return {
+            "disciplina": dados.disciplina.value,
+            "ano": dados.ano,
+            "tamanho": dados.tamanho,
+            "cotas": dados.cotas,
+            "seed": seed,
+            "email": email,
+            "questoes": [ObjectId(i) for i in ids],
+            "created_at": now.replace(microsecond=now.microsecond // 1000 * 1000),
+        }
+
+    def _enunciado_hash(self, enunciado: str) -> str:
+        normalizado = " ".join((enunciado or "").split()).lower()
+        return hashlib.sha256(normalizado.encode("utf-8")).hexdigest()
+
+    def _novo_documento(self, questao_data: QuestaoCreate, com_hash: bool = False) -> dict:
+        """Documento a gravar; `com_hash` (só no upsert do lote) inclui o `enunciado_hash` do índice único"""
+        questao_dict = questao_data.model_dump(mode="json")
+        if com_hash:
+            questao_dict['enunciado_hash'] = self._enunciado_hash(questao_data.questao.enunciado)
+
+        now = datetime.now(timezone.utc)
+        # precisão de milissegundos, como o BSON devolve na leitura
+        now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+        questao_dict['created_at'] = now
+        questao_dict['updated_at'] = now
+        return questao_dict
+
+    def _validar_lote(self, itens: list, erros_previos: dict[int, str] | None = None) -> tuple[list[tuple[int, QuestaoCreate]], list[dict]]:
+        """Valida o lote com um único TypeAdapter; retorna ([(índice, questão)], erros por índice)"""
+        erros_por_indice = {i: [msg] for i, msg in (erros_previos or {}).items()}
+        indices = [i for i in range(len(itens)) if i not in erros_por_indice]
+        try:
+            validos = LOTE_ADAPTER.validate_python([itens[i] for i in indices])
+        except PydanticValidationError as e:
+            for err in e.errors():
+                indice = indices[err["loc"][0]]
+                campo = ".".join(str(p) for p in err["loc"][1:])
+                erros_por_indice.setdefault(indice, []).append(f"{campo}: {err['msg']}" if campo else err["msg"])
+            indices = [i for i in indices if i not in erros_por_indice]
+            # só os itens sem erro: não falha de novo
+            validos = LOTE_ADAPTER.validate_python([itens[i] for i in indices])
+        erros = [{"index": i, "erro": "; ".join(msgs)} for i, msgs in erros_por_indice.items()]
+        return list(zip(indices, validos)), erros
+
+    def _chunks(self, validos: list) -> list:
+        tamanho = app_settings.QUESTOES_LOTE_CHUNK
+        return [validos[i:i + tamanho] for i in range(0, len(validos), tamanho)]
+
+    def _upsert_op(self, doc: dict) -> UpdateOne:
+        created_at = doc.pop("created_at")
+        return UpdateOne(
+            {"codigo": doc["codigo"], "enunciado_hash": doc["enunciado_hash"]},
+            {"$set": doc, "$setOnInsert": {"created_at": created_at}},
+            upsert=True,
+        )
+
+    def _erros_bulk(self, e: BulkWriteError, indices: list[int], erros: list) -> tuple[int, int]:
+        """Registra os erros do chunk pelo índice original; retorna (inseridos, atualizados)"""
+        details = e.details
+        for err in details.get("writeErrors", []):
+            erros.append({"index": indices[err["index"]], "erro": err.get("errmsg")})
+        return details.get("nInserted", 0) + details.get("nUpserted", 0), details.get("nMatched", 0)
+
+    def _resultado_lote(self, total: int, inseridos: int, atualizados: int, erros: list) -> dict:
+        return {"total": total, "inseridos": inseridos, "atualizados": atualizados, "erros": sorted(erros, key=lambda e: e["index"])}
+
+    def _empty_page(self, page: int, limit: int, total: int | None = 0) -> dict:
+        return self._page(page, limit, total, [], has_next=False, has_prev=page > 1)
+
+    def _resolver_seed(self, seed: int | None) -> int:
+        return seed if seed is not None else random.randrange(1 << 31)
+
+    def _chave_embaralhada(self, seed: int):
+        """Função id -> posição fixa na ordem do seed (hash de seed + id): inserir ou remover outras questões não a move"""
+        prefixo = hashlib.blake2b(f"{seed}:".encode(), digest_size=8)
+
+        def chave(questao_id) -> bytes:
+            h = prefixo.copy()
+            h.update(str(questao_id).encode())
+            return h.digest()
+        return chave
+
+    def _shuffle_key(self, query: dict, seed: int) -> tuple:
+        return ("db", tuple(sorted(query.items())), seed)
+
+    def _ordem_embaralhada(self, ids, seed: int) -> list[tuple]:
+        """[(chave, id)] de todos os ids na ordem do seed; calculada uma vez e guardada em `shuffle_cache`"""
+        chave = self._chave_embaralhada(seed)
+        return sorted(((chave(i), i) for i in ids), key=itemgetter(0))
+
+    def _ordenar_por_ids(self, docs, ids: list) -> list:
+        por_id = {doc["_id"]: doc for doc in docs}
+        return [por_id[i] for i in ids if i in por_id]
+
+    def _posicao(self, cursor: str | None) -> dict | None:
+        """Decodifica o cursor: {'id'} no modo keyset, {'seed', 'apos'} no shuffle"""
+        if not cursor:
+            return None
+        posicao = decode_cursor(cursor)
+        if "apos" in posicao:
+            if not isinstance(posicao.get("seed"), int) or not isinstance(posicao["apos"], ObjectId):
+                raise ValidationError("Cursor inválido")
+        elif not isinstance(posicao.get("id"), ObjectId):
+            raise ValidationError("Cursor inválido")
+        return posicao
+
+    def _fatia_embaralhada(self, ordem: list[tuple], page: int, limit: int, seed: int, posicao: dict | None) -> tuple[list, bool, str | None]:
+        """Fatia de `_ordem_embaralhada` a partir da página ou do cursor: (ids, has_next, next_cursor).
+
+        O cursor guarda a última questão vista e a próxima página começa na chave
+        seguinte à dela, então escritas entre as páginas não repetem nem pulam questões.
+        """
+        if posicao:
+            inicio = bisect_right(ordem, self._chave_embaralhada(seed)(posicao["apos"]), key=itemgetter(0))
+        else:
+            inicio = (page - 1) * limit
+        fim = inicio + limit
+        pagina = [i for _, i in ordem[inicio:fim]]
+        has_next = fim < len(ordem)
+        return pagina, has_next, (encode_cursor({"seed": seed, "apos": ObjectId(pagina[-1])}) if has_next else None)
+
+    def _keyset_query(self, query: dict, posicao: dict | None) -> dict:
+        return {**query, "_id": {"$gt": posicao["id"]}} if posicao else query
+
+    def _fechar_keyset(self, docs: list, limit: int) -> tuple[list, bool, str | None]:
+        """Recebe até limit + 1 documentos ordenados por _id: (docs, has_next, next_cursor)"""
+        has_next = len(docs) > limit
+        docs = docs[:limit]
+        return docs, has_next, (encode_cursor({"id": docs[-1]["_id"]}) if has_next else None)
+
+    def _page(self, page: int, limit: int, total: int | None, data: list, has_next: bool, has_prev: bool, next_cursor: str | None = None) -> dict:
+        """Monta a resposta paginada; sem `total` (include_total=false), totalPages fica None"""
+        return {
+            "total": total,
+            "totalPages": self._calc_total_pages(total, limit) if total is not None else None,
+            "page": page,
+            "limit": limit,
+            "hasNext": has_next,
+            "hasPrev": has_prev,
+            "next_cursor": next_cursor,
+            "data": data,
+        }
+
+
+class QuestaoService(QuestaoServiceBase):
     def __init__(self):
         self.collection = get_collection(app_settings.QUESTOES_COLLECTION)
+        self.catalogo = get_collection(app_settings.CATALOGO_COLLECTION)
+        self.provas = get_collection(app_settings.PROVAS_COLLECTION)
+
+    def _incrementar_versao(self):
+        """Sinaliza aos catálogos em memória que QUESTOES mudou (e descarta as ordens de shuffle deste processo)"""
+        shuffle_cache.clear()
+        try:
+            self.catalogo.update_one({"_id": CATALOGO_QUESTOES_ID}, {"$inc": {"version": 1}}, upsert=True)
+        except Exception as e:
+            print(f"❌ Erro ao atualizar versão do catálogo: {e}")
+
+    def versao_catalogo(self) -> int:
+        """Versão atual do catálogo (base das ETags)"""
+        doc = self.catalogo.find_one({"_id": CATALOGO_QUESTOES_ID})
+        return (doc or {}).get("version", 0)
 
     def adicionar_questao(self, questao_data: QuestaoCreate):
         """Adiciona uma nova questão ao banco de dados"""
         try:
-            questao_dict = questao_data.model_dump(mode="json")
-            
-            now_iso = datetime.now(timezone.utc).isoformat()
-            questao_dict['created_at'] = now_iso
-            questao_dict['updated_at'] = now_iso
-            
+            questao_dict = self._novo_documento(questao_data)
+
             result = self.collection.insert_one(questao_dict)
-            
-            questao_inserida = self.collection.find_one({"_id": result.inserted_id})
-            questao_inserida["id"] = str(questao_inserida["_id"])
-            
-            if "_id" in questao_inserida:
-                del questao_inserida["_id"]
-
-            for t in ("created_at", "updated_at"):
-                if t in questao_inserida and not isinstance(questao_inserida[t], str):
-                    try:
-                        questao_inserida[t] = questao_inserida[t].isoformat() + "Z"
-                    except Exception:
-                        questao_inserida[t] = str(questao_inserida[t])
-
-            qr = QuestaoResponse.model_validate(questao_inserida)
-            return qr.model_dump(mode="json")
+            self._incrementar_versao()
+
+            questao_dict["_id"] = result.inserted_id
+            return self._normalize_and_serialize(questao_dict)
             
         except Exception as e:
             raise ServiceError(f"Erro ao adicionar questão: {str(e)}")
     
-    def buscar_questao_por_id(self, questao_id: str):
-        """Busca uma questão pelo ID"""
+    def buscar_questao_por_id(self, questao_id: str, campos: frozenset | None = None):
+        """Busca uma questão pelo ID (só com os `campos` pedidos, se informados)"""
         try:
-            questao = self.collection.find_one({"_id": ObjectId(questao_id)})
+            questao = self.collection.find_one({"_id": ObjectId(questao_id)}, self._projecao(campos))
             if questao:
-                questao["id"] = str(questao["_id"])
-                if "_id" in questao:
-                    del questao["_id"]
-                for t in ("created_at", "updated_at"):
-                    if t in questao and not isinstance(questao[t], str):
-                        try:
-                            questao[t] = questao[t].isoformat() + "Z"
-                        except Exception:
-                            questao[t] = str(questao[t])
-                qr = QuestaoResponse.model_validate(questao)
-                return qr.model_dump(mode="json")
+                return self._serializar(questao, campos)
             return None
         except Exception as e:
             raise ServiceError(f"Erro ao buscar questão: {str(e)}")
         
+    def buscar_questoes_por_ids(self, ids: list, campos: frozenset | None = None) -> list[dict]:
+        """Busca várias questões com um único $in, na ordem dos ids (as ausentes ficam de fora)"""
+        try:
+            object_ids = self._object_ids(ids)
+            docs = self.collection.find({"_id": {"$in": object_ids}}, self._projecao(campos)) if object_ids else []
+            return [self._serializar(doc, campos) for doc in self._ordenar_por_ids(docs, object_ids)]
+        except Exception as e:
+            raise ServiceError(f"Erro ao buscar questões: {str(e)}")
+
+    def buscar_questoes(self, q: str | None = None, codigo: str | None = None, disciplina: str | None = None, ano: str | None = None, page: int = 1, limit: int = 10, campos: frozenset | None = None) -> dict:
+        """Busca por palavra-chave no enunciado (índice de texto) e/ou prefixo de `codigo`, paginada por relevância"""
+        try:
+            if q and not tokens(q):
+                return self._empty_page(page, limit)
+            query = self._busca_query(q, codigo, disciplina, ano)
+            total = self.collection.count_documents(query)
+            find = self.collection.find(query, self._projecao(campos)).sort(self._busca_sort(q)).skip((page - 1) * limit).limit(limit)
+            data = [self._serializar(doc, campos) for doc in find]
+            return self._page(page, limit, total, data, page * limit < total, page > 1)
+        except Exception as e:
+            raise ServiceError(f"Erro ao buscar questões: {str(e)}")
+
+    def gerar_prova(self, dados: ProvaCreate, email: str | None = None, grupos: dict | None = None) -> dict:
+        """Sorteia e grava uma prova; `grupos` (ids por código) pode vir do catálogo em memória"""
+        if grupos is None:
+            query = self._build_query(dados.disciplina.value, dados.ano)
+            try:
+                grupos = {g["_id"]: g["ids"] for g in self.collection.aggregate(self._grupos_pipeline(query, dados.tamanho))}
+            except Exception as e:
+                raise ServiceError(f"Erro ao sortear prova: {str(e)}")
+        prova = self._nova_prova(dados, grupos, email)
+        try:
+            prova["_id"] = self.provas.insert_one(prova).inserted_id
+        except Exception as e:
+            raise ServiceError(f"Erro ao gravar prova: {str(e)}")
+        return prova
+
+    def buscar_prova(self, prova_id: str, email: str | None = None) -> dict | None:
+        """Prova gerada por `email`; a de outro usuário conta como inexistente"""
+        if not ObjectId.is_valid(prova_id):
+            return None
+        try:
+            return self.provas.find_one({"_id": ObjectId(prova_id), "email": email})
+        except Exception as e:
+            raise ServiceError(f"Erro ao buscar prova: {str(e)}")
+
+    def importar_lote(self, itens: list, erros_previos: dict[int, str] | None = None, upsert: bool = False) -> dict:
+        """Valida e grava várias questões com insert_many (ou upsert por codigo + hash do enunciado)"""
+        validos, erros = self._validar_lote(itens, erros_previos)
+        inseridos = atualizados = 0
+        try:
+            for chunk in self._chunks(validos):
+                indices = [i for i, _ in chunk]
+                docs = [self._novo_documento(q, com_hash=upsert) for _, q in chunk]
+                try:
+                    if upsert:
+                        result = self.collection.bulk_write([self._upsert_op(d) for d in docs], ordered=False)
+                        inseridos += result.upserted_count
+                        atualizados += result.matched_count
+                    else:
+                        inseridos += len(self.collection.insert_many(docs, ordered=False).inserted_ids)
+                except BulkWriteError as e:
+                    n_inseridos, n_atualizados = self._erros_bulk(e, indices, erros)
+                    inseridos += n_inseridos
+                    atualizados += n_atualizados
+        except Exception as e:
+            raise ServiceError(f"Erro ao importar questões: {str(e)}")
+        finally:
+            if inseridos or atualizados:
+                self._incrementar_versao()
+        return self._resultado_lote(len(itens), inseridos, atualizados, erros)
+
     def listar_questoes(self):
         """Lista todas as questões"""
         try:
             questoes = []
             for questao in self.collection.find():
-                questao["id"] = str(questao["_id"])
-                if "_id" in questao:
-                    del questao["_id"]
-                for t in ("created_at", "updated_at"):
-                    if t in questao and not isinstance(questao[t], str):
-                        try:
-                            questao[t] = questao[t].isoformat() + "Z"
-                        except Exception:
-                            questao[t] = str(questao[t])
-
-                qr = QuestaoResponse.model_validate(questao)
-                questoes.append(qr.model_dump(mode="json"))
+                questoes.append(self._normalize_and_serialize(questao))
             return questoes
         except Exception as e:
             raise ServiceError(f"Erro ao listar questões: {str(e)}")
 
-    def _build_query(self, disc: str | None, ano: str | None) -> dict:
-        query = {}
-    
-        if disc:
-            query["disciplina"] = disc
-        
-        if ano:
-            query["ano"] = ano
-        
-        return query
-
-    def _calc_total_pages(self, total: int, lim: int) -> int:
-        return (total + lim - 1) // lim if total > 0 else 0
+    def _ordem_do_filtro(self, query: dict, seed: int) -> list[tuple]:
+        key = self._shuffle_key(query, seed)
+        ordem = shuffle_cache.get(key)
+        if ordem is None:
+            ordem = self._ordem_embaralhada([doc["_id"] for doc in self.collection.find(query, {"_id": 1})], seed)
+            shuffle_cache.set(key, ordem)
+        return ordem
 
-    def _normalize_and_serialize(self, doc: dict) -> dict:
-        doc["id"] = str(doc.get("_id"))
-        if "_id" in doc:
-            del doc["_id"]
-
-        for t in ("created_at", "updated_at"):
-            if t in doc and not isinstance(doc[t], str):
-                try:
-                    doc[t] = doc[t].isoformat() + "Z"
-                except Exception:
-                    doc[t] = str(doc[t])
-
-        qr = QuestaoResponse.model_validate(doc)
-        return qr.model_dump(mode="json")
-
-    def listar_questoes_paginated(self, page: int, limit: int, disciplina: str | None = None, ano: str | None = None, shuffle: bool = False) -> dict:
+    def listar_questoes_paginated(self, page: int, limit: int, disciplina: str | None = None, ano: str | None = None, shuffle: bool = False, seed: int | None = None, cursor: str | None = None, include_total: bool = True, campos: frozenset | None = None) -> dict:
         """Lista questões com paginação e filtro opcional por disciplina e ano.
 
-        Retorna um dict: { 'total': int, 'totalPages': int, 'page': int, 'limit': int, 'data': list }
+        Com `cursor` (o `next_cursor` da página anterior) a paginação é keyset
+        em `_id` e `page` é ignorado; `include_total=False` dispensa o
+        `count_documents`. Com `shuffle`, as páginas seguem uma ordem estável
+        por seed (ver `_chave_embaralhada`); o seed usado volta na resposta.
+        `campos` (ver `resolver_campos`) vira projeção no MongoDB.
+
+        Retorna um dict: { 'total': int, 'totalPages': int, 'page': int, 'limit': int, 'next_cursor': str, 'data': list }
         """
+        posicao = self._posicao(cursor)
 
         try:
             if page < 1:
-                return {"total": 0, "totalPages": 0, "page": page, "limit": limit, "data": []}
+                return self._empty_page(page, limit)
 
             query = self._build_query(disciplina, ano)
-            
-            total = self.collection.count_documents(query)
-            total_pages = self._calc_total_pages(total, limit)
-            
-            if shuffle:
-                pipeline = []
-                
-                if query:
-                    pipeline.append({"$match": query})
-                
-                pipeline.extend([
-                    {"$addFields": {"random": {"$rand": {}}}},
-                    {"$sort": {"random": 1}}
-                ])
-                
-                skip = (page - 1) * limit
-                pipeline.extend([
-                    {"$skip": skip},
-                    {"$limit": limit}
-                ])
-                
-                cursor = self.collection.aggregate(pipeline)
-                data = [self._normalize_and_serialize(q) for q in cursor]
-                
-            else:
-                if total_pages > 0 and page > total_pages:
-                    return {"total": total, "totalPages": total_pages, "page": page, "limit": limit, "data": []}
-
-                skip = (page - 1) * limit
-                cursor = self.collection.find(query).skip(skip).limit(limit)
-                data = [self._normalize_and_serialize(q) for q in cursor]
-
-            return {
-                "total": total,
-                "totalPages": total_pages,
-                "page": page,
-                "limit": limit,
-                "hasNext": page < total_pages,
-                "hasPrev": page > 1 and total_pages > 0,
-                "data": data,
-            }
+
+            if shuffle or (posicao and "apos" in posicao):
+                seed = posicao["seed"] if posicao else self._resolver_seed(seed)
+                ordem = self._ordem_do_filtro(query, seed)
+                pagina, has_next, next_cursor = self._fatia_embaralhada(ordem, page, limit, seed, posicao)
+                docs = self._ordenar_por_ids(self.collection.find({"_id": {"$in": pagina}}, self._projecao(campos)), pagina) if pagina else []
+                data = [self._serializar(q, campos) for q in docs]
+                return {**self._page(page, limit, len(ordem), data, has_next, posicao is not None or page > 1, next_cursor), "seed": seed}
+
+            total = self.collection.count_documents(query) if include_total else None
+
+            if posicao is None and total is not None and (page - 1) * limit >= total > 0:
+                return self._empty_page(page, limit, total)
+
+            find = self.collection.find(self._keyset_query(query, posicao), self._projecao(campos)).sort("_id", 1)
+            if posicao is None:
+                find = find.skip((page - 1) * limit)
+            docs, has_next, next_cursor = self._fechar_keyset(list(find.limit(limit + 1)), limit)
+            data = [self._serializar(q, campos) for q in docs]
+
+            return self._page(page, limit, total, data, has_next, posicao is not None or page > 1, next_cursor)
         except Exception as e:
-            raise ServiceError(f"Erro ao listar questões paginadas: {str(e)}")
\ No newline at end of file
+            raise ServiceError(f"Erro ao listar questões paginadas: {str(e)}")
@@ -0,0 +1,185 @@
+from bson import ObjectId
+from fastapi.concurrency import run_in_threadpool
+from pymongo.errors import BulkWriteError
+from connection import get_async_collection
+from config.settings import settings as app_settings
+from models.questao_model import ProvaCreate, QuestaoCreate
+from services.busca import tokens
+from services.erros import ServiceError
+from services.questao_service import CATALOGO_QUESTOES_ID, QuestaoServiceBase, shuffle_cache
+
+
+class QuestaoServiceAsync(QuestaoServiceBase):
+    """Versão Motor do QuestaoService, com o mesmo contrato de paginação/shuffle"""
+
+    def __init__(self):
+        self.collection = get_async_collection(app_settings.QUESTOES_COLLECTION)
+        self.catalogo = get_async_collection(app_settings.CATALOGO_COLLECTION)
+        self.provas = get_async_collection(app_settings.PROVAS_COLLECTION)
+
+    async def _incrementar_versao(self):
+        """Sinaliza aos catálogos em memória que QUESTOES mudou (e descarta as ordens de shuffle deste processo)"""
+        shuffle_cache.clear()
+        try:
+            await self.catalogo.update_one({"_id": CATALOGO_QUESTOES_ID}, {"$inc": {"version": 1}}, upsert=True)
+        except Exception as e:
+            print(f"❌ Erro ao atualizar versão do catálogo: {e}")
+
+    async def versao_catalogo(self) -> int:
+        """Versão atual do catálogo (base das ETags)"""
+        doc = await self.catalogo.find_one({"_id": CATALOGO_QUESTOES_ID})
+        return (doc or {}).get("version", 0)
+
+    async def adicionar_questao(self, questao_data: QuestaoCreate):
+        """Adiciona uma nova questão ao banco de dados"""
+        try:
+            questao_dict = self._novo_documento(questao_data)
+
+            result = await self.collection.insert_one(questao_dict)
+            await self._incrementar_versao()
+
+            questao_dict["_id"] = result.inserted_id
+            return self._normalize_and_serialize(questao_dict)
+
+        except Exception as e:
+            raise ServiceError(f"Erro ao adicionar questão: {str(e)}")
+
+    async def buscar_questao_por_id(self, questao_id: str, campos: frozenset | None = None):
+        """Busca uma questão pelo ID (só com os `campos` pedidos, se informados)"""
+        try:
+            questao = await self.collection.find_one({"_id": ObjectId(questao_id)}, self._projecao(campos))
+            if questao:
+                return self._serializar(questao, campos)
+            return None
+        except Exception as e:
+            raise ServiceError(f"Erro ao buscar questão: {str(e)}")
+
+    async def buscar_questoes_por_ids(self, ids: list, campos: frozenset | None = None) -> list[dict]:
+        """Busca várias questões com um único $in, na ordem dos ids (as ausentes ficam de fora)"""
+        try:
+            object_ids = self._object_ids(ids)
+            docs = await self.collection.find({"_id": {"$in": object_ids}}, self._projecao(campos)).to_list(length=None) if object_ids else []
+            return [self._serializar(doc, campos) for doc in self._ordenar_por_ids(docs, object_ids)]
+        except Exception as e:
+            raise ServiceError(f"Erro ao buscar questões: {str(e)}")
+
+    async def buscar_questoes(self, q: str | None = None, codigo: str | None = None, disciplina: str | None = None, ano: str | None = None, page: int = 1, limit: int = 10, campos: frozenset | None = None) -> dict:
+        """Busca por palavra-chave no enunciado (índice de texto) e/ou prefixo de `codigo`, paginada por relevância"""
+        try:
+            if q and not tokens(q):
+                return self._empty_page(page, limit)
+            query = self._busca_query(q, codigo, disciplina, ano)
+            total = await self.collection.count_documents(query)
+            find = self.collection.find(query, self._projecao(campos)).sort(self._busca_sort(q)).skip((page - 1) * limit).limit(limit)
+            data = [self._serializar(doc, campos) async for doc in find]
+            return self._page(page, limit, total, data, page * limit < total, page > 1)
+        except Exception as e:
+            raise ServiceError(f"Erro ao buscar questões: {str(e)}")
+
+    async def gerar_prova(self, dados: ProvaCreate, email: str | None = None, grupos: dict | None = None) -> dict:
+        """Sorteia e grava uma prova; `grupos` (ids por código) pode vir do catálogo em memória"""
+        if grupos is None:
+            query = self._build_query(dados.disciplina.value, dados.ano)
+            try:
+                grupos = {g["_id"]: g["ids"] async for g in self.collection.aggregate(self._grupos_pipeline(query, dados.tamanho))}
+            except Exception as e:
+                raise ServiceError(f"Erro ao sortear prova: {str(e)}")
+        prova = self._nova_prova(dados, grupos, email)
+        try:
+            prova["_id"] = (await self.provas.insert_one(prova)).inserted_id
+        except Exception as e:
+            raise ServiceError(f"Erro ao gravar prova: {str(e)}")
+        return prova
+
+    async def buscar_prova(self, prova_id: str, email: str | None = None) -> dict | None:
+        """Prova gerada por `email`; a de outro usuário conta como inexistente"""
+        if not ObjectId.is_valid(prova_id):
+            return None
+        try:
+            return await self.provas.find_one({"_id": ObjectId(prova_id), "email": email})
+        except Exception as e:
+            raise ServiceError(f"Erro ao buscar prova: {str(e)}")
+
+    async def importar_lote(self, itens: list, erros_previos: dict[int, str] | None = None, upsert: bool = False) -> dict:
+        """Valida e grava várias questões com insert_many (ou upsert por codigo + hash do enunciado)"""
+        # até QUESTOES_LOTE_MAX_ITENS validações pydantic: fora do event loop
+        validos, erros = await run_in_threadpool(self._validar_lote, itens, erros_previos)
+        inseridos = atualizados = 0
+        try:
+            for chunk in self._chunks(validos):
+                indices = [i for i, _ in chunk]
+                docs = [self._novo_documento(q, com_hash=upsert) for _, q in chunk]
+                try:
+                    if upsert:
+                        result = await self.collection.bulk_write([self._upsert_op(d) for d in docs], ordered=False)
+                        inseridos += result.upserted_count
+                        atualizados += result.matched_count
+                    else:
+                        inseridos += len((await self.collection.insert_many(docs, ordered=False)).inserted_ids)
+                except BulkWriteError as e:
+                    n_inseridos, n_atualizados = self._erros_bulk(e, indices, erros)
+                    inseridos += n_inseridos
+                    atualizados += n_atualizados
+        except Exception as e:
+            raise ServiceError(f"Erro ao importar questões: {str(e)}")
+        finally:
+            if inseridos or atualizados:
+                await self._incrementar_versao()
+        return self._resultado_lote(len(itens), inseridos, atualizados, erros)
+
+    async def listar_questoes(self):
+        """Lista todas as questões"""
+        try:
+            return [self._normalize_and_serialize(questao) async for questao in self.collection.find()]
+        except Exception as e:
+            raise ServiceError(f"Erro ao listar questões: {str(e)}")
+
+    async def _ordem_do_filtro(self, query: dict, seed: int) -> list[tuple]:
+        key = self._shuffle_key(query, seed)
+        ordem = shuffle_cache.get(key)
+        if ordem is None:
+            ordem = self._ordem_embaralhada([doc["_id"] async for doc in self.collection.find(query, {"_id": 1})], seed)
+            shuffle_cache.set(key, ordem)
+        return ordem
+
+    async def listar_questoes_paginated(self, page: int, limit: int, disciplina: str | None = None, ano: str | None = None, shuffle: bool = False, seed: int | None = None, cursor: str | None = None, include_total: bool = True, campos: frozenset | None = None) -> dict:
+        """Lista questões com paginação e filtro opcional por disciplina e ano.
+
+        Com `cursor` (o `next_cursor` da página anterior) a paginação é keyset
+        em `_id` e `page` é ignorado; `include_total=False` dispensa o
+        `count_documents`. Com `shuffle`, as páginas seguem uma ordem estável
+        por seed (ver `_chave_embaralhada`); o seed usado volta na resposta.
+        `campos` (ver `resolver_campos`) vira projeção no MongoDB.
+
+        Retorna um dict: { 'total': int, 'totalPages': int, 'page': int, 'limit': int, 'next_cursor': str, 'data': list }
+        """
+        posicao = self._posicao(cursor)
+
+        try:
+            if page < 1:
+                return self._empty_page(page, limit)
+
+            query = self._build_query(disciplina, ano)
+
+            if shuffle or (posicao and "apos" in posicao):
+                seed = posicao["seed"] if posicao else self._resolver_seed(seed)
+                ordem = await self._ordem_do_filtro(query, seed)
+                pagina, has_next, next_cursor = self._fatia_embaralhada(ordem, page, limit, seed, posicao)
+                docs = self._ordenar_por_ids(await self.collection.find({"_id": {"$in": pagina}}, self._projecao(campos)).to_list(length=None), pagina) if pagina else []
+                data = [self._serializar(q, campos) for q in docs]
+                return {**self._page(page, limit, len(ordem), data, has_next, posicao is not None or page > 1, next_cursor), "seed": seed}
+
+            total = await self.collection.count_documents(query) if include_total else None
+
+            if posicao is None and total is not None and (page - 1) * limit >= total > 0:
+                return self._empty_page(page, limit, total)
+
+            find = self.collection.find(self._keyset_query(query, posicao), self._projecao(campos)).sort("_id", 1)
+            if posicao is None:
+                find = find.skip((page - 1) * limit)
+            docs, has_next, next_cursor = self._fechar_keyset(await find.limit(limit + 1).to_list(length=limit + 1), limit)
+            data = [self._serializar(q, campos) for q in docs]
+
+            return self._page(page, limit, total, data, has_next, posicao is not None or page > 1, next_cursor)
+        except Exception as e:
+            raise ServiceError(f"Erro ao listar questões paginadas: {str(e)}")
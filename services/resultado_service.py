@@ -2,8 +2,20 @@ from connection import get_collection
 from models.resultado_model import ResultadoCreate, ResultadoResponse
 from bson import ObjectId
 from datetime import datetime, timezone
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from config.settings import settings as app_settings
-from services.erros import ServiceError
+from services.erros import ServiceError, ValidationError
+from services.cursor import encode_cursor, decode_cursor
+from services.serializacao import resultado_confiavel
+
+RESULTADO_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+RESULTADO_INDEXES = [
+    IndexModel(RESULTADO_SORT, name="created_at_id"),
+    IndexModel([("email", ASCENDING)] + RESULTADO_SORT, name="email_created_at_id"),
+    IndexModel([("disciplina", ASCENDING), ("ano", ASCENDING)] + RESULTADO_SORT, name="disciplina_ano_created_at_id"),
+    IndexModel([("ano", ASCENDING)] + RESULTADO_SORT, name="ano_created_at_id"),
+]
 
 
 class ResultadoService:
@@ -18,17 +30,16 @@ class ResultadoService:
             percentual_acerto = (resultado_data.pontuacao / resultado_data.total_questoes) * 100 if resultado_data.total_questoes > 0 else 0.0
             resultado_dict['percentual_acerto'] = round(percentual_acerto, 2)
             
-            now_iso = datetime.now(timezone.utc).isoformat()
-            resultado_dict['created_at'] = now_iso
-            resultado_dict['updated_at'] = now_iso
+            now = datetime.now(timezone.utc)
+            # precisão de milissegundos, como o BSON devolve na leitura
+            now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+            resultado_dict['created_at'] = now
+            resultado_dict['updated_at'] = now
             
             result = self.collection.insert_one(resultado_dict)
-            
-            resultado_inserido = self.collection.find_one({"_id": result.inserted_id})
-            if not resultado_inserido:
-                raise ServiceError("Erro ao recuperar resultado inserido")
-            
-            return self._normalize_and_serialize(resultado_inserido)
+
+            resultado_dict["_id"] = result.inserted_id
+            return self._normalize_and_serialize(resultado_dict)
             
         except Exception as e:
             raise ServiceError(f"Erro ao salvar resultado: {str(e)}")
@@ -73,47 +84,67 @@ class ResultadoService:
         return (total + limit - 1) // limit if total > 0 else 0
 
     def _normalize_and_serialize(self, doc: dict) -> dict:
-        """Normaliza documento do MongoDB e serializa"""
+        """Normaliza documento do MongoDB e serializa (datas viram ISO no model_dump)"""
+        if app_settings.TRUSTED_SERIALIZATION:
+            return resultado_confiavel(doc)
         doc["id"] = str(doc.get("_id"))
         if "_id" in doc:
             del doc["_id"]
 
-        for timestamp_field in ("created_at", "updated_at"):
-            if timestamp_field in doc and not isinstance(doc[timestamp_field], str):
-                try:
-                    doc[timestamp_field] = doc[timestamp_field].isoformat() + "Z"
-                except Exception:
-                    doc[timestamp_field] = str(doc[timestamp_field])
-
         resultado_response = ResultadoResponse.model_validate(doc)
         return resultado_response.model_dump(mode="json")
 
-    def listar_resultados_paginated(self, page: int, limit: int, disciplina: str | None = None, ano: int | None = None, email: str | None = None) -> dict:
-        """Lista resultados com paginação e filtro opcional por disciplina, ano e email"""
-        
+    def _cursor_query(self, query: dict, cursor: str | None) -> dict:
+        """Aplica a posição keyset (created_at, _id) do cursor, na ordem decrescente"""
+        if not cursor:
+            return query
+        posicao = decode_cursor(cursor)
+        ts, last_id = posicao.get("ts"), posicao.get("id")
+        if not isinstance(last_id, ObjectId):
+            raise ValidationError("Cursor inválido")
+        return {**query, "$or": [
+            {"created_at": {"$lt": ts}},
+            {"created_at": ts, "_id": {"$lt": last_id}},
+        ]}
+
+    def listar_resultados_paginated(self, page: int, limit: int, disciplina: str | None = None, ano: int | None = None, email: str | None = None, cursor: str | None = None, include_total: bool = True) -> dict:
+        """Lista resultados com paginação e filtro opcional por disciplina, ano e email
+
+        Com `cursor` (o `next_cursor` da página anterior) a paginação é keyset
+        em (created_at, _id) e `page` é ignorado; `include_total=False`
+        dispensa o `count_documents`.
+        """
+        query = self._build_query(disciplina, ano, email)
+        find_query = self._cursor_query(query, cursor)
+
         try:
             if page < 1:
                 return {"total": 0, "totalPages": 0, "page": page, "limit": limit, "data": []}
 
-            query = self._build_query(disciplina, ano, email)
-            
-            total = self.collection.count_documents(query)
-            total_pages = self._calc_total_pages(total, limit)
+            total = self.collection.count_documents(query) if include_total else None
+            total_pages = self._calc_total_pages(total, limit) if total is not None else None
             
-            if total_pages > 0 and page > total_pages:
+            if not cursor and total_pages and page > total_pages:
                 return {"total": total, "totalPages": total_pages, "page": page, "limit": limit, "data": []}
 
-            skip = (page - 1) * limit
-            cursor = self.collection.find(query).sort("created_at", -1).skip(skip).limit(limit)
-            data = [self._normalize_and_serialize(resultado) for resultado in cursor]
+            find = self.collection.find(find_query).sort(RESULTADO_SORT)
+            if not cursor:
+                find = find.skip((page - 1) * limit)
+            docs = list(find.limit(limit + 1))
+
+            has_next = len(docs) > limit
+            docs = docs[:limit]
+            next_cursor = encode_cursor({"ts": docs[-1].get("created_at"), "id": docs[-1]["_id"]}) if has_next else None
+            data = [self._normalize_and_serialize(resultado) for resultado in docs]
 
             return {
                 "total": total,
                 "totalPages": total_pages,
                 "page": page,
                 "limit": limit,
-                "hasNext": page < total_pages,
-                "hasPrev": page > 1 and total_pages > 0,
+                "hasNext": has_next,
+                "hasPrev": bool(cursor) or page > 1,
+                "next_cursor": next_cursor,
                 "data": data,
             }
         except Exception as e:
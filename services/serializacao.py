@@ -0,0 +1,112 @@
+"""Serialização rápida de documentos confiáveis (gravados pela própria API).
+
+Documentos de QUESTOES e RESULTADOS já foram validados na escrita, então na
+leitura basta projetá-los no formato de saída (`QuestaoResponse` /
+`ResultadoResponse` com `model_dump(mode="json")`), sem revalidar. As rotas
+devolvem os bytes já codificados em um `Response`, o que também dispensa a
+validação do `response_model` pelo FastAPI.
+
+`orjson` é usado quando instalado; sem ele, `json` da biblioteca padrão.
+"""
+import json
+from datetime import datetime
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_datetime(value):
+    """Mesmo formato do pydantic em modo json (UTC com sufixo Z)"""
+    if not isinstance(value, datetime):
+        return value
+    iso = value.isoformat()
+    return iso[:-6] + "Z" if iso.endswith("+00:00") else iso
+
+
+def questao_confiavel(doc: dict) -> dict:
+    questao = doc.get("questao") or {}
+    return {
+        "disciplina": doc.get("disciplina"),
+        "ano": doc.get("ano"),
+        "codigo": doc.get("codigo"),
+        "questao": {
+            "enunciado": questao.get("enunciado"),
+            "alternativas": questao.get("alternativas"),
+            "gabarito": questao.get("gabarito"),
+            "url": questao.get("url"),
+        },
+        "id": str(doc.get("_id", doc.get("id"))),
+        "created_at": json_datetime(doc.get("created_at")),
+        "updated_at": json_datetime(doc.get("updated_at")),
+    }
+
+
+def recortar_questao(questao: dict, campos) -> dict:
+    """Mantém só os campos pedidos (`questao.*` em notação de ponto), na ordem de saída"""
+    saida = {}
+    for chave, valor in questao.items():
+        if chave == "questao":
+            interno = {k: v for k, v in (valor or {}).items() if f"questao.{k}" in campos}
+            if interno:
+                saida[chave] = interno
+        elif chave in campos:
+            saida[chave] = valor
+    return saida
+
+
+def resultado_confiavel(doc: dict) -> dict:
+    return {
+        "id": str(doc.get("_id", doc.get("id"))),
+        "email": doc.get("email"),
+        "disciplina": doc.get("disciplina"),
+        "ano": doc.get("ano"),
+        "respostas": [
+            {
+                "questao_id": r.get("questao_id"),
+                "codigo": r.get("codigo"),
+                "resposta_dada": r.get("resposta_dada"),
+                "gabarito": r.get("gabarito"),
+                "acertou": r.get("acertou"),
+            }
+            for r in doc.get("respostas") or []
+        ],
+        "pontuacao": doc.get("pontuacao"),
+        "total_questoes": doc.get("total_questoes"),
+        "percentual_acerto": float(doc.get("percentual_acerto") or 0.0),
+        "created_at": json_datetime(doc.get("created_at")),
+        "updated_at": json_datetime(doc.get("updated_at")),
+    }
+
+
+def prova_confiavel(doc: dict) -> dict:
+    """Cabeçalho da prova; as questões são anexadas já codificadas"""
+    return {
+        "id": str(doc.get("_id", doc.get("id"))),
+        "disciplina": doc.get("disciplina"),
+        "ano": doc.get("ano"),
+        "tamanho": doc.get("tamanho"),
+        "cotas": doc.get("cotas"),
+        "seed": doc.get("seed"),
+        "email": doc.get("email"),
+        "created_at": json_datetime(doc.get("created_at")),
+    }
+
+
+def pagina_json(pagina: dict, itens: list[bytes], chave: str = "data") -> bytes:
+    """Codifica a página reaproveitando os itens já codificados (`chave` vai por último)"""
+    meta = dumps({k: v for k, v in pagina.items() if k != chave})
+    return meta[:-1] + (b"," if len(meta) > 2 else b"") + f'"{chave}":['.encode() + b",".join(itens) + b"]}"
+
+
+def json_response(content: bytes, status_code: int = 200, headers: dict | None = None) -> Response:
+    return Response(content=content, status_code=status_code, media_type="application/json", headers=headers)
@@ -0,0 +1,18 @@
+"""Os testes cobrem só lógica pura, sem MongoDB.
+
+O `connection` real cria o MongoClient (e resolve o SRV do Atlas) já no
+import; aqui ele é trocado por um módulo sem cliente, em que as coleções são
+None, como quando o Motor não está disponível.
+"""
+import sys
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+conexao = types.ModuleType("connection")
+conexao.get_collection = lambda nome: None
+conexao.get_async_collection = lambda nome: None
+conexao.get_database = lambda: None
+conexao.test_connection = lambda: False
+sys.modules.setdefault("connection", conexao)
@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from services.auth_service import create_access_token, decode_token
+from services.auth_service_async import AuthServiceAsync, invalidate_user
+from services.erros import ValidationError
+
+
+class _Usuarios:
+    """Só o que a revogação usa de uma coleção Motor"""
+
+    def __init__(self, user):
+        self.user = user
+
+    async def find_one(self, query, projection=None):
+        return dict(self.user) if query["_id"] == self.user["_id"] else None
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=None):
+        if query["_id"] != self.user["_id"]:
+            return None
+        self.user["token_version"] = self.user.get("token_version", 0) + update["$inc"]["token_version"]
+        return dict(self.user)
+
+
+def test_token_deixa_de_valer_depois_de_revogar(monkeypatch):
+    from config.settings import settings
+
+    monkeypatch.setattr(settings, "SECRET_KEY", "segredo-de-teste")
+    user = {"_id": ObjectId(), "email": "prof@escola.br", "token_version": 0}
+    user_id = str(user["_id"])
+    invalidate_user()
+    service = AuthServiceAsync()
+    service.collection = _Usuarios(user)
+    token = create_access_token({"sub": user_id, "email": user["email"]}, profile={"email": user["email"]}, token_version=0)
+
+    assert asyncio.run(service.user_from_token(decode_token(token))) == {"email": user["email"]}
+    assert asyncio.run(service.revoke_tokens(user_id)) == 1
+    with pytest.raises(ValidationError, match="revogado"):
+        asyncio.run(service.user_from_token(decode_token(token)))
@@ -0,0 +1,56 @@
+from services.busca import IndiceInvertido, normalizar, tokens
+from services.questao_service import QuestaoServiceBase
+
+
+def _indice():
+    indice = IndiceInvertido()
+    indice.adicionar("1", "Frações equivalentes: some as frações")
+    indice.adicionar("2", "Fração de um número inteiro")
+    indice.adicionar("3", "Números decimais e porcentagem")
+    return indice
+
+
+def test_normaliza_acentos_e_remove_stopwords():
+    assert normalizar("Ação") == "acao"
+    assert tokens("A fração de um número") == ["fracao", "numero"]
+
+
+def test_todos_os_termos_sao_obrigatorios():
+    indice = _indice()
+    assert set(indice.buscar("fração número")) == {"2"}
+    assert indice.buscar("fração porcentagem") == {}
+
+
+def test_ultimo_termo_casa_por_prefixo():
+    indice = _indice()
+    assert set(indice.buscar("fra")) == {"1", "2"}
+    assert set(indice.buscar("números dec")) == {"3"}
+    # prefixos curtos demais não expandem
+    assert indice.buscar("fr") == {}
+
+
+def test_frequencia_pesa_no_ranking():
+    scores = _indice().buscar("fracoes")
+    assert list(scores) == ["1"]
+    indice = IndiceInvertido()
+    indice.adicionar("a", "soma soma soma")
+    indice.adicionar("b", "soma de parcelas")
+    scores = indice.buscar("soma")
+    assert scores["a"] > scores["b"]
+
+
+def test_remover_e_readicionar_atualiza_o_indice():
+    indice = _indice()
+    indice.remover("2")
+    assert set(indice.buscar("fra")) == {"1"}
+    indice.adicionar("1", "Geometria plana")
+    assert indice.buscar("fra") == {}
+    assert set(indice.buscar("geometria")) == {"1"}
+    assert len(indice) == 2
+
+
+def test_busca_no_mongodb_exige_todos_os_termos():
+    query = QuestaoServiceBase()._busca_query("A fração do número", "ef05", "MA", None)
+    assert query["$text"] == {"$search": '"fracao" "numero"'}
+    assert query["codigo"] == {"$regex": "^EF05"}
+    assert query["disciplina"] == "MA"
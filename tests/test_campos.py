@@ -0,0 +1,38 @@
+import pytest
+
+from services.erros import ValidationError
+from services.questao_service import resolver_campos
+from services.serializacao import recortar_questao
+
+QUESTAO = {
+    "id": "1",
+    "disciplina": "MA",
+    "ano": "5",
+    "codigo": "EF05MA01",
+    "questao": {"enunciado": "Quanto é 2+2?", "alternativas": {"a": "4"}, "gabarito": "a", "url": None},
+}
+
+
+def test_sem_fields_e_com_gabarito_devolve_documento_completo():
+    assert resolver_campos(None) is None
+    assert resolver_campos("") is None
+
+
+def test_fields_sempre_inclui_id_e_expande_questao():
+    assert resolver_campos("codigo") == {"id", "codigo"}
+    assert resolver_campos("questao") >= {"questao.enunciado", "questao.alternativas", "questao.gabarito", "questao.url"}
+
+
+def test_sem_gabarito_remove_o_campo_mesmo_quando_pedido():
+    assert "questao.gabarito" not in resolver_campos("questao.gabarito", incluir_gabarito=False)
+    assert "questao.gabarito" not in resolver_campos(None, incluir_gabarito=False)
+
+
+def test_campo_invalido():
+    with pytest.raises(ValidationError):
+        resolver_campos("id,bogus")
+
+
+def test_recortar_mantem_so_os_campos_pedidos():
+    assert recortar_questao(QUESTAO, resolver_campos("codigo,questao.enunciado")) == {"id": "1", "codigo": "EF05MA01", "questao": {"enunciado": "Quanto é 2+2?"}}
+    assert "questao" not in recortar_questao(QUESTAO, resolver_campos("ano"))
@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+
+from services.cursor import decode_cursor, encode_cursor
+from services.erros import ValidationError
+
+
+def test_ida_e_volta_preserva_tipos():
+    posicao = {"timestamp": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc), "id": ObjectId()}
+    cursor = encode_cursor(posicao)
+    assert "=" not in cursor
+    volta = decode_cursor(cursor)
+    assert volta["id"] == posicao["id"]
+    assert volta["timestamp"].replace(tzinfo=timezone.utc) == posicao["timestamp"]
+
+
+@pytest.mark.parametrize("cursor", ["nao-e-base64!", encode_cursor([1, 2])[:-1], "W10"])
+def test_cursor_invalido(cursor):
+    with pytest.raises(ValidationError):
+        decode_cursor(cursor)
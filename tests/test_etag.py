@@ -0,0 +1,36 @@
+from starlette.requests import Request
+
+from services.cache import TTLCache
+from services.etag import gerar_etag, nao_modificado
+
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/questoes", "headers": headers})
+
+
+def test_etag_ignora_ordem_da_query_e_muda_com_a_versao():
+    assert gerar_etag(3, "/questoes", "ano=5&page=2") == gerar_etag(3, "/questoes", "page=2&ano=5")
+    assert gerar_etag(3, "/questoes", "ano=5") != gerar_etag(4, "/questoes", "ano=5")
+    assert gerar_etag(3, "/questoes", "ano=5", "id") != gerar_etag(3, "/questoes", "ano=5")
+
+
+def test_nao_modificado_com_comparacao_fraca():
+    etag = gerar_etag(1, "/questoes")
+    assert not nao_modificado(_request(), etag)
+    assert nao_modificado(_request(f'"outra", W/{etag}'), etag)
+    assert nao_modificado(_request("*"), etag)
+    assert not nao_modificado(_request('"outra"'), etag)
+
+
+def test_ttl_cache_expira_e_descarta_o_menos_usado(monkeypatch):
+    agora = [100.0]
+    monkeypatch.setattr("services.cache.time.monotonic", lambda: agora[0])
+    cache = TTLCache(maxsize=2, ttl=1.0)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1
+    agora[0] += 1.0
+    assert cache.get("a") is None
@@ -0,0 +1,109 @@
+import asyncio
+
+from services.log_journal import LogJournal
+
+
+def _journal(tmp_path):
+    return LogJournal(directory=str(tmp_path), segment_max_bytes=1 << 20, max_bytes=1 << 24, batch_size=100)
+
+
+def test_append_depois_de_queda_nao_cola_na_linha_incompleta(tmp_path):
+    journal = _journal(tmp_path)
+    journal.append([{"n": 1}])
+    segmento = journal._segments()[-1]
+    with open(segmento, "ab") as f:
+        f.write(b'{"n": 2, "resto')  # escrita interrompida
+
+    reaberto = _journal(tmp_path)
+    reaberto.append([{"n": 3}])
+    docs, _, _, avancou = reaberto._read_batch()
+
+    assert avancou
+    assert [d["n"] for d in docs] == [1, 3]
+    assert reaberto.corrupted == 1
+
+
+def test_segmento_integro_nao_e_alterado(tmp_path):
+    journal = _journal(tmp_path)
+    journal.append([{"n": 1}, {"n": 2}])
+    reaberto = _journal(tmp_path)
+    reaberto.append([{"n": 3}])
+
+    docs, _, _, _ = reaberto._read_batch()
+    assert [d["n"] for d in docs] == [1, 2, 3]
+    assert reaberto.corrupted == 0
+
+
+def test_segmento_so_com_linha_incompleta_fica_vazio(tmp_path):
+    (tmp_path / f"{1:012d}.jsonl").write_bytes(b'{"n": 1')
+    journal = _journal(tmp_path)
+    journal.append([{"n": 2}])
+
+    docs, _, _, _ = journal._read_batch()
+    assert [d["n"] for d in docs] == [2]
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _Colecao:
+    """Coleção Motor sem índice único em `_id`, como uma time-series"""
+
+    def __init__(self):
+        self.docs = []
+
+    def find(self, query, projection=None):
+        ids = set(query["_id"]["$in"])
+        return _Cursor([{"_id": d["_id"]} for d in self.docs if d["_id"] in ids])
+
+    async def insert_many(self, docs, ordered=True):
+        self.docs += docs
+
+
+def test_replay_em_time_series_nao_duplica_lote_gravado_em_parte(tmp_path, monkeypatch):
+    from datetime import datetime
+
+    from config.settings import settings
+
+    monkeypatch.setattr(settings, "LOG_TIMESERIES", True)
+    journal = _journal(tmp_path)
+    journal.append([{"n": n, "timestamp": datetime(2024, 1, 1, 0, n)} for n in range(4)])
+    journal.collection = _Colecao()
+    docs, _, _, _ = journal._read_batch()
+    asyncio.run(journal.collection.insert_many(docs[:2]))  # gravado antes do timeout
+
+    asyncio.run(journal.replay())
+
+    assert sorted(d["n"] for d in journal.collection.docs) == [0, 1, 2, 3]
+
+
+def test_erro_de_disco_no_replay_nao_encerra_a_tarefa(tmp_path):
+    journal = _journal(tmp_path)
+    journal.replay_interval = 0.01
+    chamadas = []
+
+    async def replay():
+        chamadas.append(1)
+        raise OSError("disco cheio")
+
+    journal.replay = replay
+
+    async def rodar():
+        await journal.start(collection=_Colecao())
+        await asyncio.sleep(0.05)
+        assert journal.running
+        await journal.stop()
+
+    asyncio.run(rodar())
+    assert len(chamadas) > 1
@@ -0,0 +1,9 @@
+from services.log_service import build_log_query
+
+
+def test_endpoint_sem_curinga_e_igualdade():
+    assert build_log_query(endpoint="/questoes") == {"endpoint": "/questoes"}
+
+
+def test_endpoint_com_asterisco_vira_prefixo_escapado():
+    assert build_log_query(endpoint="/questoes?ano=5*") == {"endpoint": {"$regex": r"^/questoes\?ano=5"}}
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services.log_writer import LogBatchWriter
+
+INICIO = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def evento(i: int, resultado: str) -> dict:
+    return {"i": i, "resultado_consumo": resultado, "timestamp": INICIO + timedelta(seconds=i)}
+
+
+def encher(writer: LogBatchWriter, resultados: list[str]):
+    for i, resultado in enumerate(resultados):
+        writer.enqueue(evento(i, resultado))
+
+
+def test_drop_success_expulsa_sucesso_para_erro():
+    writer = LogBatchWriter(maxsize=2, overflow_policy="drop_success")
+    encher(writer, ["sucesso", "sucesso", "erro"])
+    assert sorted(e["i"] for e in writer._take(10)) == [1, 2]
+    assert writer.dropped == 1
+
+
+def test_drop_success_descarta_sucesso_com_fila_cheia():
+    writer = LogBatchWriter(maxsize=2, overflow_policy="drop_success")
+    encher(writer, ["erro", "erro", "sucesso"])
+    assert [e["i"] for e in writer._take(10)] == [0, 1]
+    assert writer.dropped == 1
+
+
+def test_drop_oldest_descarta_o_mais_antigo_entre_as_filas():
+    writer = LogBatchWriter(maxsize=3, overflow_policy="drop_oldest")
+    encher(writer, ["erro", "sucesso", "sucesso", "erro", "sucesso"])
+    assert sorted(e["i"] for e in writer._take(10)) == [2, 3, 4]
+    assert writer.dropped == 2
+
+
+def test_drop_new_descarta_o_que_chega():
+    writer = LogBatchWriter(maxsize=2, overflow_policy="drop_new")
+    encher(writer, ["sucesso", "sucesso", "erro"])
+    assert [e["i"] for e in writer._take(10)] == [0, 1]
+
+
+def test_politica_desconhecida_e_rejeitada():
+    with pytest.raises(ValueError):
+        LogBatchWriter(overflow_policy="drop_random")
@@ -0,0 +1,17 @@
+from models.questao_model import QuestaoCreate
+from services.questao_service import QuestaoServiceBase
+
+base = QuestaoServiceBase()
+QUESTAO = QuestaoCreate(disciplina="MA", ano="5", codigo="EF05MA01", questao={"enunciado": "Quanto é  2+2?", "alternativas": {"a": "4", "b": "5"}, "gabarito": "a"})
+
+
+def test_insercao_comum_nao_grava_o_hash_do_indice_unico():
+    assert "enunciado_hash" not in base._novo_documento(QUESTAO)
+
+
+def test_upsert_casa_por_codigo_e_enunciado_normalizado():
+    doc = base._novo_documento(QUESTAO, com_hash=True)
+    assert doc["enunciado_hash"] == base._enunciado_hash("quanto é 2+2?")
+    op = base._upsert_op(doc)
+    assert op._filter == {"codigo": "EF05MA01", "enunciado_hash": doc["enunciado_hash"]}
+    assert "created_at" in op._doc["$setOnInsert"] and "created_at" not in op._doc["$set"]
@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timezone
+
+from services.metrics_service import BUCKET_NAMES, RequestMetrics, percentil
+
+MINUTO = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class _Cursor:
+    def __init__(self, rows):
+        self._rows = iter(rows)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._rows)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _Metricas:
+    """Coleção Motor de rollups: `bulk_write` aplica os `$inc`/`$max`, `aggregate` devolve linhas prontas"""
+
+    def __init__(self, falhar=False, rows=None):
+        self.falhar = falhar
+        self.rows = rows or []
+        self.docs = {}
+
+    async def bulk_write(self, ops, ordered=True):
+        if self.falhar:
+            raise ConnectionError("banco fora do ar")
+        for op in ops:
+            chave = tuple(op._filter.values())
+            doc = self.docs.setdefault(chave, {"count": 0, "duration_ms_sum": 0.0, "duration_ms_max": 0.0, "buckets": {}})
+            for campo, n in op._doc["$inc"].items():
+                if campo.startswith("buckets."):
+                    nome = campo.split(".", 1)[1]
+                    doc["buckets"][nome] = doc["buckets"].get(nome, 0) + n
+                else:
+                    doc[campo] += n
+            doc["duration_ms_max"] = max(doc["duration_ms_max"], op._doc["$max"]["duration_ms_max"])
+
+    def aggregate(self, pipeline):
+        return _Cursor(self.rows)
+
+
+def _metricas(colecao):
+    metricas = RequestMetrics(flush_interval=60)
+    metricas.collection = colecao
+    return metricas
+
+
+def test_record_soma_no_bucket_de_latencia():
+    metricas = _metricas(None)
+    for duracao in (0.004, 0.005, 0.020, 7.0):
+        metricas.record("/questoes/", "GET", 200, duracao)
+
+    (rollup,) = metricas._rollups.values()
+    histograma = dict(zip(BUCKET_NAMES, rollup["buckets"]))
+    assert rollup["count"] == 4
+    assert histograma["le_5"] == 2 and histograma["le_25"] == 1 and histograma["gt_5000"] == 1
+    assert rollup["duration_ms_max"] == 7000.0
+
+
+def test_flush_grava_incrementos_e_acumula_entre_flushes():
+    colecao = _Metricas()
+    metricas = _metricas(colecao)
+    metricas.record("/questoes/", "GET", 200, 0.003)
+    asyncio.run(metricas.flush())
+    metricas.record("/questoes/", "GET", 200, 0.040)
+    asyncio.run(metricas.flush())
+
+    (doc,) = colecao.docs.values()
+    assert doc["count"] == 2
+    assert doc["buckets"] == {"le_5": 1, "le_50": 1}
+    assert doc["duration_ms_max"] == 40.0
+    assert metricas._rollups == {}
+
+
+def test_flush_com_falha_devolve_rollups_e_mescla_histogramas():
+    metricas = _metricas(_Metricas(falhar=True))
+    metricas.record("/questoes/", "GET", 200, 0.003)
+    asyncio.run(metricas.flush())
+    metricas.record("/questoes/", "GET", 200, 0.003)
+    metricas.record("/questoes/", "GET", 200, 0.300)
+
+    (rollup,) = metricas._rollups.values()
+    histograma = dict(zip(BUCKET_NAMES, rollup["buckets"]))
+    assert rollup["count"] == 3
+    assert histograma["le_5"] == 2 and histograma["le_500"] == 1
+    assert rollup["duration_ms_max"] == 300.0
+
+
+def test_buscar_stats_junta_status_da_rota_e_calcula_percentis():
+    def linha(status, count, buckets):
+        return {"_id": {"route": "/questoes/", "method": "GET", "status": status}, "count": count, "duration_ms_sum": 10.0 * count, "duration_ms_max": 900.0, **buckets}
+
+    rows = [linha(200, 90, {"le_10": 90}), linha(404, 5, {"le_10": 5}), linha(500, 5, {"le_1000": 5})]
+    stats = asyncio.run(_metricas(_Metricas(rows=rows)).buscar_stats())
+
+    (rota,) = stats["routes"]
+    assert rota["count"] == 100
+    assert rota["by_status"] == {"200": 90, "404": 5, "500": 5}
+    assert (rota["errors_4xx"], rota["errors_5xx"], rota["error_rate"]) == (5, 5, 0.05)
+    assert rota["p50_ms"] == 10.0 and rota["p99_ms"] == 1000.0
+    assert rota["histogram"]["le_10"] == 95
+
+
+def test_percentil_acima_do_ultimo_limite_usa_o_maximo():
+    buckets = [0] * (len(BUCKET_NAMES) - 1) + [3]
+    assert percentil(buckets, 3, 0.5, 8000.0) == 8000.0
+    assert percentil(buckets, 0, 0.5, 0.0) is None
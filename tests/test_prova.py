@@ -0,0 +1,46 @@
+from collections import Counter
+
+import pytest
+
+from services.erros import ValidationError
+from services.questao_service import QuestaoServiceBase
+
+base = QuestaoServiceBase()
+GRUPOS = {"EF05MA01": [f"a{i}" for i in range(10)], "EF05MA02": [f"b{i}" for i in range(10)], "EF05MA03": [f"c{i}" for i in range(2)]}
+
+
+def _codigo(questao_id):
+    return {"a": "EF05MA01", "b": "EF05MA02", "c": "EF05MA03"}[questao_id[0]]
+
+
+def test_sorteio_deterministico_por_seed_e_sem_repeticao():
+    prova = base._sortear_prova(GRUPOS, 9, None, 7)
+    assert prova == base._sortear_prova(GRUPOS, 9, None, 7)
+    assert len(set(prova)) == 9
+
+
+def test_rodadas_equilibram_os_codigos():
+    contagem = Counter(_codigo(i) for i in base._sortear_prova(GRUPOS, 6, None, 1))
+    assert contagem == {"EF05MA01": 2, "EF05MA02": 2, "EF05MA03": 2}
+
+
+def test_cotas_vem_primeiro():
+    contagem = Counter(_codigo(i) for i in base._sortear_prova(GRUPOS, 8, {"EF05MA01": 6}, 3))
+    assert contagem["EF05MA01"] == 6
+
+
+def test_cotas_e_tamanho_impossiveis():
+    with pytest.raises(ValidationError):
+        base._sortear_prova(GRUPOS, 5, {"EF05MA03": 3}, 1)
+    with pytest.raises(ValidationError):
+        base._sortear_prova(GRUPOS, 4, {"EF05MA01": 5}, 1)
+    with pytest.raises(ValidationError):
+        base._sortear_prova(GRUPOS, 30, None, 1)
+
+
+def test_pipeline_limita_ids_por_codigo_sem_ficar_abaixo_do_tamanho(monkeypatch):
+    monkeypatch.setattr("services.questao_service.app_settings.QUESTOES_PROVA_GRUPO_MAX", 50)
+    grupo = base._grupos_pipeline({"disciplina": "MA"}, 10)[-1]["$group"]
+    # amostra aleatória de cada código, não os primeiros ids na ordem do índice
+    assert grupo["ids"] == {"$topN": {"n": 50, "sortBy": {"sorteio": 1}, "output": "$_id"}}
+    assert base._grupos_pipeline({}, 80)[-1]["$group"]["ids"]["$topN"]["n"] == 80
@@ -0,0 +1,69 @@
+import asyncio
+from datetime import datetime
+
+from bson import ObjectId
+
+from services.questao_catalog import QuestaoCatalog
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    async def to_list(self, length=None):
+        return self._docs
+
+
+class _Colecao:
+    """Só o que o catálogo usa de uma coleção Motor: find por `updated_at` e find_one da versão"""
+
+    def __init__(self, docs=None, version=0):
+        self.docs = docs or []
+        self.version = version
+
+    def find(self, query, projection=None):
+        docs = self.docs
+        limite = query.get("updated_at", {}).get("$gte")
+        if limite is not None:
+            docs = [d for d in docs if isinstance(d.get("updated_at"), datetime) and d["updated_at"] >= limite]
+        if projection == {"_id": 1}:
+            docs = [{"_id": d["_id"]} for d in docs]
+        return _Cursor([dict(d) for d in docs])
+
+    async def find_one(self, query):
+        return {"_id": query["_id"], "version": self.version}
+
+
+def _questao(updated_at, codigo="EF05MA01"):
+    return {"_id": ObjectId(), "disciplina": "MA", "ano": "5", "codigo": codigo, "questao": {"enunciado": "Quanto é 2+2?", "alternativas": {"a": "4"}, "gabarito": "a"}, "updated_at": updated_at}
+
+
+def _catalogo(docs, version=1):
+    catalogo = QuestaoCatalog()
+    catalogo.collection = _Colecao(docs)
+    catalogo.catalogo = _Colecao(version=version)
+    return catalogo
+
+
+def test_updated_at_em_string_nao_quebra_a_carga():
+    docs = [_questao(datetime(2024, 1, 2)), _questao("2024-01-03T00:00:00Z"), _questao(datetime(2024, 1, 1))]
+    catalogo = _catalogo(docs)
+    asyncio.run(catalogo.carregar())
+
+    assert catalogo.contar() == 3
+    assert catalogo._ultimo_updated_at == datetime(2024, 1, 2)
+
+
+def test_sincronizar_reconciliando_descarta_removidas():
+    docs = [_questao(datetime(2024, 1, 1)), _questao(datetime(2024, 1, 2))]
+    catalogo = _catalogo(docs)
+    asyncio.run(catalogo.carregar())
+
+    removida = str(docs.pop(0)["_id"])
+    catalogo.catalogo.version = 2
+    asyncio.run(catalogo.sincronizar(reconciliar=True))
+
+    assert catalogo.contar() == 1
+    assert catalogo.buscar_questao_por_id(removida) is None
+    assert catalogo.buscar_por_codigo("EF05MA01") == [catalogo.buscar_questao_por_id(str(docs[0]["_id"]))]
+    assert catalogo.version == 2
@@ -0,0 +1,73 @@
+from bson import ObjectId
+
+from services.cursor import decode_cursor
+from services.questao_service import QuestaoServiceBase
+
+base = QuestaoServiceBase()
+
+
+def _ordem(ids, seed):
+    return [i for _, i in base._ordem_embaralhada(ids, seed)]
+
+
+def _fatia(ids, page, limit, seed, posicao):
+    return base._fatia_embaralhada(base._ordem_embaralhada(ids, seed), page, limit, seed, posicao)
+
+
+def test_mesmo_seed_mesma_ordem_e_seeds_diferentes_mudam():
+    ids = [ObjectId() for _ in range(50)]
+    assert _ordem(ids, 42) == _ordem(list(reversed(ids)), 42)
+    assert _ordem(ids, 42) != _ordem(ids, 43)
+    assert sorted(_ordem(ids, 42)) == sorted(ids)
+
+
+def test_insercao_nao_move_as_questoes_existentes():
+    ids = [ObjectId() for _ in range(50)]
+    antes = _ordem(ids, 42)
+    depois = _ordem(ids + [ObjectId() for _ in range(10)], 42)
+    assert [i for i in depois if i in set(ids)] == antes
+
+
+def test_cursor_nao_repete_nem_pula_com_escritas_entre_paginas():
+    ids = [ObjectId() for _ in range(30)]
+    originais = set(ids)
+    vistos, posicao, page = [], None, 1
+    while True:
+        pagina, has_next, cursor = _fatia(ids, page, 7, 42, posicao)
+        vistos += pagina
+        if not has_next:
+            break
+        posicao = decode_cursor(cursor)
+        ids = ids[1:] + [ObjectId()]  # remove uma e insere outra a cada página
+    assert len(vistos) == len(set(vistos))
+    # as que continuaram no filtro até o fim aparecem todas
+    assert originais & set(ids) <= set(vistos)
+
+
+def test_paginas_por_numero_e_por_cursor_coincidem():
+    ids = [str(ObjectId()) for _ in range(25)]
+    por_pagina = [_fatia(ids, p, 10, 7, None)[0] for p in (1, 2, 3)]
+    primeira, _, cursor = _fatia(ids, 1, 10, 7, None)
+    segunda, _, _ = _fatia(ids, 1, 10, 7, decode_cursor(cursor))
+    assert [primeira, segunda] == por_pagina[:2]
+    assert sum(len(p) for p in por_pagina) == 25
+
+
+class _Catalogo:
+    def update_one(self, *args, **kwargs):
+        pass
+
+
+def test_ordem_calculada_uma_vez_por_filtro_e_seed_e_descartada_em_escritas():
+    from services.questao_service import QuestaoService, shuffle_cache
+
+    ids = [ObjectId() for _ in range(5)]
+    servico = QuestaoService()
+    servico.collection = type("Colecao", (), {"find": lambda self, *a: [{"_id": i} for i in ids]})()
+    servico.catalogo = _Catalogo()
+    shuffle_cache.clear()
+
+    ordem = servico._ordem_do_filtro({"ano": "5"}, 42)
+    assert servico._ordem_do_filtro({"ano": "5"}, 42) is ordem
+    servico._incrementar_versao()
+    assert len(shuffle_cache) == 0